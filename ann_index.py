@@ -0,0 +1,148 @@
+import os
+import sys
+import argparse
+import numpy as np
+from chunk_store import ChunkStore, STORE_DIR
+from retrieval import normalize_rows, top_k_indices, units_in_query, filter_mask
+
+# hnswlib is optional: exact search in retrieval.py works without it
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# ---------- Settings ----------
+ANN_FILE = "hnsw_index.bin"       # HNSW graph, saved next to the chunk store
+ANN_META_FILE = "hnsw_meta.npz"   # chunk IDs currently live in the graph
+M = 16                            # graph degree
+EF_CONSTRUCTION = 200
+EF_SEARCH = 64
+
+def require_hnswlib():
+    if hnswlib is None:
+        raise ImportError("hnswlib is not installed; run `pip install hnswlib` or use exact search")
+
+# ---------- HNSW index keyed on stable chunk IDs ----------
+class HnswIndex:
+    def __init__(self, dim, max_elements=1024):
+        require_hnswlib()
+        self.dim = dim
+        self.graph = hnswlib.Index(space="ip", dim=dim)  # inner product on normalised vectors = cosine
+        self.graph.init_index(max_elements=max_elements, M=M, ef_construction=EF_CONSTRUCTION, allow_replace_deleted=True)
+        self.graph.set_ef(EF_SEARCH)
+        self.live_ids = np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def load(cls, store_dir=STORE_DIR):
+        require_hnswlib()
+        with np.load(os.path.join(store_dir, ANN_META_FILE)) as meta:
+            dim = int(meta["dim"])
+            live_ids = meta["live_ids"]
+        index = cls.__new__(cls)
+        index.dim = dim
+        index.graph = hnswlib.Index(space="ip", dim=dim)
+        index.graph.load_index(os.path.join(store_dir, ANN_FILE), allow_replace_deleted=True)
+        index.graph.set_ef(EF_SEARCH)
+        index.live_ids = live_ids
+        return index
+
+    def save(self, store_dir=STORE_DIR):
+        self.graph.save_index(os.path.join(store_dir, ANN_FILE))
+        with open(os.path.join(store_dir, ANN_META_FILE), "wb") as f:
+            np.savez(f, dim=self.dim, live_ids=self.live_ids)
+
+    def sync(self, store):
+        # Incremental update: insert chunks the graph has not seen, tombstone ones that are gone
+        store_ids, first_rows = np.unique(store.chunk_ids, return_index=True)
+        new = ~np.isin(store_ids, self.live_ids)
+        removed = self.live_ids[~np.isin(self.live_ids, store_ids)]
+
+        for label in removed:
+            self.graph.mark_deleted(int(label))
+
+        added = 0
+        if new.any():
+            rows = first_rows[new]
+            needed = self.graph.get_current_count() + len(rows)
+            if needed > self.graph.get_max_elements():
+                self.graph.resize_index(max(needed, 2 * self.graph.get_max_elements()))
+            vectors = normalize_rows(store.embeddings[np.sort(rows)])
+            self.graph.add_items(vectors, store_ids[new][np.argsort(rows)], replace_deleted=True)
+            added = len(rows)
+
+        self.live_ids = store_ids
+        return added, len(removed)
+
+# ---------- Retriever with the same interface as DenseRetriever ----------
+class AnnRetriever:
+    def __init__(self, index, store):
+        self.index = index
+        self.store = store
+        self.units = store.units
+        self.titles = store.titles
+        order = np.argsort(store.chunk_ids)
+        self._sorted_ids = store.chunk_ids[order]
+        self._sorted_rows = order
+
+    @classmethod
+    def load(cls, store, store_dir=STORE_DIR):
+        index = HnswIndex.load(store_dir)
+        added, removed = index.sync(store)
+        if added or removed:
+            # The chunk store was rebuilt without updating the graph; patch it in memory for this run
+            print(f"⚠️ HNSW index was stale (+{added} / -{removed}); run `python ann_index.py` to persist the update")
+        return cls(index, store)
+
+    def units_in_query(self, query):
+        return units_in_query(query, self.units)
+
+    def search_subset(self, query_vecs, k, mask):
+        # Filtered queries (one unit, one section title) cover a tiny slice, so score it exactly
+        rows = np.flatnonzero(mask)
+        all_scores = query_vecs @ normalize_rows(self.store.embeddings[rows]).T
+        return [[(int(rows[i]), float(scores[i])) for i in top_k_indices(scores, k)] for scores in all_scores]
+
+    def rows_for(self, labels):
+        # Map chunk IDs returned by the graph back to rows of the chunk store
+        pos = np.clip(np.searchsorted(self._sorted_ids, labels), 0, len(self._sorted_ids) - 1)
+        return self._sorted_rows[pos], self._sorted_ids[pos] == labels
+
+    def search_batch(self, query_vecs, k=3, units=None, titles=None):
+        query_vecs = normalize_rows(np.atleast_2d(query_vecs))
+        mask = filter_mask(self.units, self.titles, units, titles)
+        if mask is not None:
+            return self.search_subset(query_vecs, k, mask)
+
+        k = min(k, len(self.index.live_ids))
+        labels, distances = self.index.graph.knn_query(query_vecs, k=k)
+        results = []
+        for row_labels, row_distances in zip(labels, distances):
+            rows, found = self.rows_for(row_labels.astype(np.int64))
+            # hnswlib "ip" distance is 1 - inner product
+            results.append([(int(r), float(1.0 - d)) for r, d, ok in zip(rows, row_distances, found) if ok])
+        return results
+
+    def search(self, query_vec, k=3, units=None, titles=None):
+        return self.search_batch(query_vec, k, units, titles)[0]
+
+# ---------- Build / update ----------
+def update_ann_index(store_dir=STORE_DIR, rebuild=False):
+    store = ChunkStore(store_dir)
+    if not rebuild and os.path.exists(os.path.join(store_dir, ANN_FILE)):
+        index = HnswIndex.load(store_dir)
+    else:
+        index = HnswIndex(store.embeddings.shape[1], max_elements=max(1024, len(store)))
+    added, removed = index.sync(store)
+    index.save(store_dir)
+    print(f"✅ HNSW index in {store_dir}: +{added} / -{removed} chunks, {len(index.live_ids)} live")
+    return index
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or incrementally update the HNSW index for unit chunks")
+    parser.add_argument("-d", "--store-dir", default=STORE_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="start a fresh graph instead of updating")
+    args = parser.parse_args(argv)
+    update_ann_index(args.store_dir, args.rebuild)
+
+if __name__ == "__main__":
+    sys.exit(main())
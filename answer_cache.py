@@ -0,0 +1,101 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+# ---------- Settings ----------
+ANSWER_CACHE_DB = os.environ.get("ANSWER_CACHE_DB", "answer_cache.sqlite")
+SIMILARITY_THRESHOLD = 0.92     # cosine between questions to count as a paraphrase
+TTL_SEC = 7 * 24 * 3600         # answers older than a week are asked again
+MAX_ENTRIES = 5000              # least recently used answers are evicted beyond this
+
+def corpus_version(paths):
+    # Changes whenever any source file is rewritten (chunk store, Chroma DB, course JSON)
+    h = hashlib.sha256()
+    for path in sorted(paths):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            h.update(f"{path}\x1f{stat.st_size}\x1f{stat.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+def context_key(chunk_ids):
+    # Order-insensitive: the same retrieved set gives the same key
+    return hashlib.sha256("\x1f".join(sorted(str(i) for i in chunk_ids)).encode("utf-8")).hexdigest()
+
+def document_key(doc):
+    # Chroma search results carry no stable ID, so key LangChain documents on their content
+    raw = f"{doc.metadata.get('source', '')}\x1f{doc.metadata.get('title', '')}\x1f{doc.page_content}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+def unit_vector(vec):
+    vec = np.asarray(vec, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+# ---------- Semantic answer cache ----------
+class AnswerCache:
+    # namespace separates callers (unit chunks vs the Chroma course DB) sharing one cache file
+    def __init__(self, namespace, version, path=ANSWER_CACHE_DB, threshold=SIMILARITY_THRESHOLD, ttl_sec=TTL_SEC, max_entries=MAX_ENTRIES):
+        self.namespace = namespace
+        self.version = version
+        self.threshold = threshold
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0}
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "id INTEGER PRIMARY KEY, namespace TEXT, model TEXT, context TEXT, version TEXT, query TEXT, "
+            "embedding BLOB, answer TEXT, created REAL, last_used REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS answers_lookup ON answers (namespace, model, context)")
+        # Answers built from an older chunk store / course DB are no longer trustworthy
+        self.db.execute(
+            "DELETE FROM answers WHERE (namespace = ? AND version != ?) OR created < ?",
+            (namespace, version, time.time() - ttl_sec),
+        )
+        self.db.commit()
+
+    def lookup(self, query_vec, chunk_ids, model):
+        query_vec = unit_vector(query_vec)
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, embedding, answer FROM answers "
+                "WHERE namespace = ? AND model = ? AND context = ? AND version = ? AND created >= ?",
+                (self.namespace, model, context_key(chunk_ids), self.version, time.time() - self.ttl_sec),
+            ).fetchall()
+            best_id, best_score, best_answer = None, -1.0, None
+            for row_id, blob, answer in rows:
+                score = float(np.frombuffer(blob, dtype=np.float32) @ query_vec)
+                if score > best_score:
+                    best_id, best_score, best_answer = row_id, score, answer
+
+            if best_id is not None and best_score >= self.threshold:
+                self.db.execute("UPDATE answers SET last_used = ? WHERE id = ?", (time.time(), best_id))
+                self.db.commit()
+                self.stats["hits"] += 1
+                return best_answer
+            self.stats["misses"] += 1
+            return None
+
+    def store(self, query, query_vec, chunk_ids, model, answer):
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO answers (namespace, model, context, version, query, embedding, answer, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.namespace, model, context_key(chunk_ids), self.version, query, unit_vector(query_vec).tobytes(), answer, now, now),
+            )
+            # Size-based eviction: drop the least recently used answers
+            self.db.execute(
+                "DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self.db.commit()
+
+    def summary(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return f"📈 Answer cache: {self.stats['hits']}/{total} hits"
@@ -1,106 +1,195 @@
-import requests
-from bs4 import BeautifulSoup
-import time
 import json
 import os
+import hashlib
+import pickle
+import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from askus_crawler import AskUsCrawler, HttpCache
+from retrieval import top_k_indices
+
+FAQ_FILE = "faq_data.json"
+FAQ_INDEX_FILE = "faq_index.pkl"     # fitted vectorizer + row -> FAQ mapping
+FAQ_MATRIX_FILE = "faq_matrix.npz"   # sparse TF-IDF document matrix
+REFIT_RATIO = 0.2                    # refit the vocabulary when more than 20% of entries changed
 
 # -----------------------------
 # Crawl FAQs from AskUs site
 # -----------------------------
-def crawl_askus_faq(keyword="enrol", max_pages=3, sleep_sec=1):
-    base_url = "https://askus.utas.edu.au"
-    search_url = f"{base_url}/app/answers/list/kw/{keyword}/page/{{page}}"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    faq_data = []
-
-    # Use session to maintain headers and cookies
-    session = requests.Session()
-    session.headers.update(headers)
-
-    # Create a folder to save raw HTML for debugging
-    os.makedirs("html_debug", exist_ok=True)
-
-    for page in range(1, max_pages + 1):
-        print(f"📥 Crawling page {page}...")
-        try:
-            res = session.get(search_url.format(page=page), timeout=10)
-            html_path = f"html_debug/page_{page}.html"
-            with open(html_path, "w", encoding="utf-8") as f:
-                f.write(res.text)
-
-            soup = BeautifulSoup(res.text, 'html.parser')
-            links = soup.select("a[href*='/app/answers/detail/']")
-
-            print(f"🔎 Found {len(links)} FAQ links on page {page}")
-            if len(links) == 0:
-                print(f"⚠️ Page structure might have changed. Saved HTML to {html_path}")
-
-            for link in links:
-                title = link.text.strip()
-                href = base_url + link.get("href")
-                print(f"🔗 Fetching: {title}")
-                detail = session.get(href, timeout=10)
-                detail_soup = BeautifulSoup(detail.text, 'html.parser')
-                answer_div = detail_soup.select_one(".answer_text")
-                answer = answer_div.get_text(strip=True) if answer_div else ""
-                faq_data.append({
-                    "question": title,
-                    "answer": answer,
-                    "url": href
-                })
-                time.sleep(sleep_sec)
+def crawl_askus_faq(keyword="enrol", max_pages=3, sleep_sec=None, keywords=None, max_workers=8, rate_per_sec=5.0):
+    # sleep_sec is kept for old callers: it becomes the per-host request interval
+    if sleep_sec:
+        rate_per_sec = 1.0 / sleep_sec
+    # Start an empty HTTP cache so a later incremental refresh has validators to send
+    cache = HttpCache(fresh=True)
+    crawler = AskUsCrawler(max_workers=max_workers, rate_per_sec=rate_per_sec, cache=cache)
+    faq_data = crawler.crawl(keywords or [keyword], max_pages=max_pages)
+    cache.save()
 
-        except Exception as e:
-            print(f"❌ Failed to fetch page {page}: {e}")
-    
     # Save all scraped data into a local JSON file
-    with open("faq_data.json", "w", encoding="utf-8") as f:
+    with open(FAQ_FILE, "w", encoding="utf-8") as f:
         json.dump(faq_data, f, indent=2, ensure_ascii=False)
     
-    print("✅ FAQ data saved to faq_data.json")
+    print(f"✅ FAQ data saved to {FAQ_FILE}")
     return faq_data
 
+# -----------------------------
+# Incremental refresh: conditional GETs + merge into the FAQ store
+# -----------------------------
+def merge_faq_data(old_data, fresh_data, changed_urls):
+    # Existing entries keep their position so unchanged index rows stay valid
+    data = [dict(item) for item in old_data]
+    position = {item["url"]: i for i, item in enumerate(data)}
+    changed_ids = []
+    for item in fresh_data:
+        i = position.get(item["url"])
+        if i is None:
+            position[item["url"]] = len(data)
+            changed_ids.append(len(data))
+            data.append(item)
+        elif item["url"] in changed_urls or data[i] != item:
+            data[i] = item
+            changed_ids.append(i)
+    return data, changed_ids
+
+def refresh_askus_faq(keywords=("enrol",), max_pages=3, max_workers=8, rate_per_sec=5.0):
+    old_data = load_faq_data() if os.path.exists(FAQ_FILE) else []
+    cache = HttpCache()
+    crawler = AskUsCrawler(max_workers=max_workers, rate_per_sec=rate_per_sec, cache=cache)
+    fresh_data = crawler.crawl(list(keywords), max_pages=max_pages)
+    cache.save()
+
+    data, changed_ids = merge_faq_data(old_data, fresh_data, crawler.changed_urls)
+    stats = crawler.stats
+    print(f"📊 {stats['fetched']} requests, {stats['not_modified']} not modified, "
+          f"{stats['same_hash']} unchanged bodies, {len(changed_ids)} new/changed entries")
+
+    if changed_ids:
+        with open(FAQ_FILE, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        print(f"✅ FAQ data saved to {FAQ_FILE}")
+    update_faq_index(data, changed_ids, base_fingerprint=faq_fingerprint(old_data))
+    return data
+
 # -----------------------------
 # Load JSON data from file
 # -----------------------------
 def load_faq_data():
-    with open("faq_data.json", encoding="utf-8") as f:
+    with open(FAQ_FILE, encoding="utf-8") as f:
         return json.load(f)
 
 # -----------------------------
-# Search FAQ using TF-IDF
+# Prebuilt TF-IDF index (fitted once, saved next to faq_data.json)
 # -----------------------------
-def search_faq(user_query, data, top_n=1):
-    def normalize(text):
-        return text.lower().replace("enroll", "enrol")  # US to UK spelling fix
+def normalize(text):
+    return text.lower().replace("enroll", "enrol")  # US to UK spelling fix
+
+def faq_fingerprint(data):
+    # Any change to the FAQ entries changes the hash and forces a rebuild
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
 
-    # Combine question and answer for semantic search
-    documents = [
-        normalize(item["question"] + " " + item["answer"])
-        for item in data if item["question"].strip()
-    ]
-    user_query = normalize(user_query)
+def build_faq_index(data):
+    # Keep track of which FAQ entry each matrix row belongs to
+    doc_ids = [i for i, item in enumerate(data) if item["question"].strip()]
+    documents = [normalize(data[i]["question"] + " " + data[i]["answer"]) for i in doc_ids]
 
     if not documents:
         raise ValueError("❌ No valid FAQ entries found.")
 
-    vectorizer = TfidfVectorizer().fit(documents + [user_query])
-    doc_vecs = vectorizer.transform(documents)
-    user_vec = vectorizer.transform([user_query])
-    sims = cosine_similarity(user_vec, doc_vecs).flatten()
-    top_indices = sims.argsort()[-top_n:][::-1]
-    return [data[i] for i in top_indices]
+    # Rows are L2-normalised by TfidfVectorizer, so a dot product is the cosine similarity
+    vectorizer = TfidfVectorizer(dtype=np.float32).fit(documents)
+    return {
+        "fingerprint": faq_fingerprint(data),
+        "vectorizer": vectorizer,
+        "doc_ids": np.asarray(doc_ids, dtype=np.int64),
+        "matrix": vectorizer.transform(documents).tocsr(),
+    }
+
+def save_faq_index(index, index_path=FAQ_INDEX_FILE, matrix_path=FAQ_MATRIX_FILE):
+    sparse.save_npz(matrix_path, index["matrix"])
+    meta = {k: v for k, v in index.items() if k != "matrix"}
+    with open(index_path, "wb") as f:
+        pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def load_faq_index(data, index_path=FAQ_INDEX_FILE, matrix_path=FAQ_MATRIX_FILE):
+    fingerprint = faq_fingerprint(data)
+    if os.path.exists(index_path) and os.path.exists(matrix_path):
+        try:
+            with open(index_path, "rb") as f:
+                meta = pickle.load(f)
+            if meta.get("fingerprint") == fingerprint:
+                meta["matrix"] = sparse.load_npz(matrix_path).tocsr()
+                return meta
+            print("🔄 FAQ data changed, rebuilding index...")
+        except Exception as e:
+            print(f"⚠️ Could not load FAQ index ({e}), rebuilding...")
+
+    index = build_faq_index(data)
+    save_faq_index(index, index_path, matrix_path)
+    print(f"✅ FAQ index saved to {index_path} / {matrix_path}")
+    return index
+
+def update_faq_index(data, changed_ids, base_fingerprint=None, index_path=FAQ_INDEX_FILE, matrix_path=FAQ_MATRIX_FILE):
+    # Re-vectorise only the changed entries with the existing vocabulary/IDF.
+    # Large changes drift the IDF weights too far, so fall back to a full refit.
+    if not (os.path.exists(index_path) and os.path.exists(matrix_path)):
+        return load_faq_index(data, index_path, matrix_path)
+    with open(index_path, "rb") as f:
+        index = pickle.load(f)
+    index["matrix"] = sparse.load_npz(matrix_path).tocsr()
+
+    if index["fingerprint"] == faq_fingerprint(data):
+        return index
+    if base_fingerprint and index["fingerprint"] != base_fingerprint:
+        # The saved index was not built from the data we merged into, so patching it is unsafe
+        return load_faq_index(data, index_path, matrix_path)
+    if len(changed_ids) > REFIT_RATIO * max(1, len(index["doc_ids"])):
+        print("🔄 Many FAQ entries changed, refitting index...")
+        index = build_faq_index(data)
+        save_faq_index(index, index_path, matrix_path)
+        return index
+
+    changed = set(changed_ids)
+    keep = np.array([doc_id not in changed for doc_id in index["doc_ids"]], dtype=bool)
+    new_ids = [i for i in sorted(changed) if data[i]["question"].strip()]
+    new_rows = index["vectorizer"].transform(
+        [normalize(data[i]["question"] + " " + data[i]["answer"]) for i in new_ids]
+    )
+
+    # Drop the stale rows and append the re-vectorised ones at the end
+    index["matrix"] = sparse.vstack([index["matrix"][keep], new_rows], format="csr")
+    index["doc_ids"] = np.concatenate([index["doc_ids"][keep], np.asarray(new_ids, dtype=np.int64)])
+    index["fingerprint"] = faq_fingerprint(data)
+    save_faq_index(index, index_path, matrix_path)
+    print(f"✅ Re-indexed {len(new_ids)} changed FAQ entries")
+    return index
+
+# -----------------------------
+# Search FAQ using TF-IDF
+# -----------------------------
+def search_faq(user_query, data, top_n=1, index=None):
+    if index is None:
+        index = load_faq_index(data)
+
+    user_vec = index["vectorizer"].transform([normalize(user_query)])
+    sims = (index["matrix"] @ user_vec.T).toarray().ravel()
+    top_indices = top_k_indices(sims, top_n)
+    return [data[index["doc_ids"][i]] for i in top_indices]
 
 # -----------------------------
 # Main interactive console loop
 # -----------------------------
 def main():
     print("📚 UTAS AskUs FAQ Chatbot (Console + Debug)")
-    choice = input("Do you want to re-crawl FAQ data? (y/n): ").strip().lower()
-    if choice == 'y':
-        data = crawl_askus_faq(keyword="enrol", max_pages=3)
+    choice = input("Re-crawl FAQ data? (y = full / i = incremental refresh / n = use saved): ").strip().lower()
+    if choice in ("y", "i"):
+        raw = input("Keywords to crawl, comma separated (default: enrol): ").strip()
+        keywords = [k.strip() for k in raw.split(",") if k.strip()] or ["enrol"]
+        if choice == "y":
+            data = crawl_askus_faq(keywords=keywords, max_pages=3)
+        else:
+            data = refresh_askus_faq(keywords=keywords, max_pages=3)
     else:
         data = load_faq_data()
 
@@ -108,12 +197,15 @@ def main():
         print("❌ FAQ data is empty. Please check html_debug folder for debugging.")
         return
 
+    # Fit once (or load from disk); each query is then just transform + sparse dot product
+    index = load_faq_index(data)
+
     while True:
         query = input("\nWhat is your question? (type 'exit' to quit)\n> ")
         if query.lower() == "exit":
             break
         try:
-            results = search_faq(query, data)
+            results = search_faq(query, data, index=index)
             if results:
                 res = results[0]
                 print("\n✅ Best matched question:", res["question"])
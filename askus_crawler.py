@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+BASE_URL = "https://askus.utas.edu.au"
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+DEBUG_DIR = "html_debug"
+HTTP_CACHE_FILE = "askus_http_cache.json"
+
+# -----------------------------
+# Politeness: token bucket per host
+# -----------------------------
+class TokenBucket:
+    def __init__(self, rate_per_sec, burst=1):
+        self.rate = float(rate_per_sec)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Blocks until one token is available; callers sleep outside the lock
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class HostRateLimiter:
+    def __init__(self, rate_per_sec, burst=1):
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.rate_per_sec:
+            return
+        host = urlparse(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate_per_sec, self.burst)
+        bucket.acquire()
+
+# -----------------------------
+# On-disk HTTP cache: validators + content hash per URL
+# -----------------------------
+class HttpCache:
+    def __init__(self, path=HTTP_CACHE_FILE, fresh=False):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        if not fresh and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, url):
+        with self.lock:
+            return self.entries.get(url)
+
+    def put(self, url, **fields):
+        with self.lock:
+            self.entries.setdefault(url, {}).update(fields)
+
+    def save(self):
+        # Write to a temp file first so an interrupted run never leaves a broken cache
+        tmp_path = self.path + ".tmp"
+        with self.lock, open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+# -----------------------------
+# HTTP session with a shared connection pool
+# -----------------------------
+def make_session(max_workers):
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# -----------------------------
+# Page parsers (same selectors as the original sequential crawler)
+# -----------------------------
+def parse_list_page(html, base_url=BASE_URL):
+    soup = BeautifulSoup(html, "html.parser")
+    links = soup.select("a[href*='/app/answers/detail/']")
+    return [(link.text.strip(), base_url + link.get("href")) for link in links]
+
+def parse_detail_page(html):
+    soup = BeautifulSoup(html, "html.parser")
+    answer_div = soup.select_one(".answer_text")
+    return answer_div.get_text(strip=True) if answer_div else ""
+
+# -----------------------------
+# Concurrent crawl engine
+# -----------------------------
+class AskUsCrawler:
+    def __init__(self, base_url=BASE_URL, max_workers=8, rate_per_sec=5.0, burst=2, timeout=10, debug_dir=DEBUG_DIR, cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.changed_urls = set()
+        self.stats = {"fetched": 0, "not_modified": 0, "same_hash": 0, "changed": 0}
+        self.stats_lock = threading.Lock()
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.debug_dir = debug_dir
+        self.limiter = HostRateLimiter(rate_per_sec, burst)
+        self.session = make_session(max_workers)
+
+    def get(self, url, **kwargs):
+        self.limiter.wait(url)
+        return self.session.get(url, timeout=self.timeout, **kwargs)
+
+    def count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def conditional_get(self, url):
+        # Returns (cached_entry, response); response is None when the cached copy is still valid
+        entry = self.cache.get(url) if self.cache else None
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        res = self.get(url, headers=headers)
+        self.count("fetched")
+        if entry and res.status_code == 304:
+            self.count("not_modified")
+            return entry, None
+        if res.status_code != 200:
+            # Error pages must never become the cached copy (or an empty "answer")
+            res.raise_for_status()
+            raise requests.HTTPError(f"Unexpected status {res.status_code} for {url}", response=res)
+
+        body_hash = content_hash(res.content)
+        validators = {
+            "etag": res.headers.get("ETag", ""),
+            "last_modified": res.headers.get("Last-Modified", ""),
+            "hash": body_hash,
+        }
+        if entry and entry.get("hash") == body_hash:
+            self.count("same_hash")
+            self.cache.put(url, **validators)
+            return entry, None
+
+        if self.cache:
+            self.cache.put(url, **validators)
+        return entry, res
+
+    def fetch_list_page(self, keyword, page):
+        url = f"{self.base_url}/app/answers/list/kw/{keyword}/page/{page}"
+        try:
+            cached, res = self.conditional_get(url)
+        except Exception as e:
+            print(f"❌ Failed to fetch page {page} for '{keyword}': {e}")
+            return []
+
+        if res is None:
+            # Unchanged list page: reuse the links parsed last time
+            return [tuple(link) for link in cached.get("links", [])]
+
+        if self.debug_dir:
+            os.makedirs(self.debug_dir, exist_ok=True)
+            html_path = os.path.join(self.debug_dir, f"{keyword}_page_{page}.html")
+            with open(html_path, "w", encoding="utf-8") as f:
+                f.write(res.text)
+
+        links = parse_list_page(res.text, self.base_url)
+        if self.cache:
+            self.cache.put(url, links=links)
+        print(f"🔎 Found {len(links)} FAQ links on page {page} for '{keyword}'")
+        if len(links) == 0 and self.debug_dir:
+            print(f"⚠️ Page structure might have changed. Saved HTML to {html_path}")
+        return links
+
+    def fetch_detail(self, title, href):
+        try:
+            cached, detail = self.conditional_get(href)
+            if detail is None:
+                # 304 or identical body: skip parsing entirely
+                return {"question": title, "answer": cached.get("answer", ""), "url": href}
+            answer = parse_detail_page(detail.text)
+        except Exception as e:
+            print(f"❌ Failed to fetch {href}: {e}")
+            return None
+
+        # cached is the live cache entry, so read the old answer before put() overwrites it
+        previous = (cached.get("question"), cached.get("answer")) if cached else None
+        if self.cache:
+            self.cache.put(href, question=title, answer=answer)
+        # Page markup can change without the answer changing; only real edits need re-indexing
+        if previous != (title, answer):
+            self.changed_urls.add(href)
+            self.count("changed")
+        print(f"🔗 Fetched: {title}")
+        return {"question": title, "answer": answer, "url": href}
+
+    def crawl(self, keywords, max_pages=3):
+        jobs = [(keyword, page) for keyword in keywords for page in range(1, max_pages + 1)]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # Step 1: list pages for every keyword, in parallel
+            print(f"📥 Crawling {len(jobs)} list pages for {len(keywords)} keyword(s)...")
+            pages = list(pool.map(lambda job: self.fetch_list_page(*job), jobs))
+
+            # Step 2: dedupe detail URLs across keywords and pages, keeping first-seen order
+            seen = set()
+            targets = []
+            for links in pages:
+                for title, href in links:
+                    if href not in seen:
+                        seen.add(href)
+                        targets.append((title, href))
+
+            # Step 3: detail pages, bounded by max_workers and the per-host rate limit
+            print(f"📥 Fetching {len(targets)} unique answers with {self.max_workers} workers...")
+            results = pool.map(lambda target: self.fetch_detail(*target), targets)
+            return [item for item in results if item is not None]
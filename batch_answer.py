@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+from embedding_cache import CachedEmbeddings
+from answer_cache import AnswerCache, corpus_version, document_key
+from retrieval import DenseRetriever
+from llm_client import LLMClient
+from unit_lookup import load_unit_index
+from context_packer import ContextPacker, CONTEXT_TOKENS
+
+# === Configuration (same corpus and model as query_llm.py) ===
+CHROMA_DIR      = "chroma_db"
+EMBED_MODEL     = "sentence-transformers/all-MiniLM-L6-v2"
+LLM_MODEL       = "llama3-70b-8192"
+COLLECTION_NAME = "course_info"
+
+PROMPT = """
+        You are a helpful assistant answering questions about University of Tasmania courses based on the provided context.
+
+        Context from course database:
+        {context}
+
+        Question: {question}
+
+        Based *only* on the context provided, answer the question clearly and concisely. If the context doesn't contain the answer, say "I'm sorry, I don't have enough information to answer that question. Please check the UTAS website (www.utas.edu.au) for more information."
+        """
+
+# ---------- Input / resume ----------
+def load_questions(path):
+    # One JSON object per line: {"id": "...", "question": "..."}; a bare string or missing id is fine
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"question": item}
+            item.setdefault("id", str(line_no))
+            item["id"] = str(item["id"])
+            questions.append(item)
+    return questions
+
+def answered_ids(path):
+    # The last record per id wins, so a question that failed earlier is retried on resume
+    status = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # half-written line from an interrupted run
+                status[str(record.get("id"))] = "answer" in record
+    return {qid for qid, ok in status.items() if ok}
+
+# ---------- Async rate limit ----------
+class AsyncTokenBucket:
+    def __init__(self, rate_per_sec, burst=1):
+        self.rate = float(rate_per_sec)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# ---------- Corpus: every Chroma document as one matrix ----------
+def load_corpus():
+    db = Chroma(persist_directory=CHROMA_DIR, embedding_function=None, collection_name=COLLECTION_NAME)
+    data = db.get(include=["embeddings", "documents", "metadatas"])
+    docs = [Document(page_content=text, metadata=meta or {}) for text, meta in zip(data["documents"], data["metadatas"])]
+    return docs, DenseRetriever(data["embeddings"])
+
+# ---------- LLM call (blocking; run in worker threads by asyncio) ----------
+def ask_llm(llm, prompt, model):
+    messages = [
+        {"role": "system", "content": "You are a course information assistant for the University of Tasmania."},
+        {"role": "user", "content": prompt}
+    ]
+    return llm.stream_chat(model, messages, out=None, temperature=0.1, max_tokens=1024)
+
+# ---------- Batch run ----------
+async def answer_all(pending, docs, doc_hits, query_vecs, answers, packer, out, args, base_timings):
+    llm = LLMClient(pool_size=args.concurrency, timeout=(5, args.timeout))
+    semaphore = asyncio.Semaphore(args.concurrency)
+    bucket = AsyncTokenBucket(args.rate, burst=args.concurrency)
+    counts = {"answered": 0, "cached": 0, "failed": 0}
+
+    def write(record):
+        # One line per finished question, flushed so an interrupted run loses nothing
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    async def answer_one(item, hits, query_vec):
+        question = item["question"]
+        hit_docs = [docs[i] for i, _ in hits]
+        doc_ids = [document_key(doc) for doc in hit_docs]
+        timings = dict(base_timings)
+        record = {"id": item["id"], "question": question, "sources": [doc.metadata.get("source", "") for doc in hit_docs]}
+
+        start = time.perf_counter()
+        cached = answers.lookup(query_vec, doc_ids, args.model)
+        timings["cache_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        if cached is not None:
+            counts["cached"] += 1
+            write({**record, "answer": cached, "cached": True, "timings": timings})
+            return
+
+        # Sentence vectors were encoded for the whole batch up front; the rest of pack() is numpy
+        # work, kept off the event loop so the other questions keep going
+        start = time.perf_counter()
+        packed, packing = await asyncio.to_thread(packer.pack, query_vec, [doc.page_content for doc in hit_docs], "\n\n---\n\n")
+        timings["pack_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        record["prompt_tokens_saved"] = packing["saved_tokens"]
+        prompt = PROMPT.format(context="\n\n---\n\n".join(text for _, text in packed), question=question)
+        queued = time.perf_counter()
+        async with semaphore:
+            await bucket.acquire()
+            timings["queue_ms"] = round((time.perf_counter() - queued) * 1000, 1)
+            try:
+                answer, stats = await asyncio.to_thread(ask_llm, llm, prompt, args.model)
+            except Exception as e:
+                counts["failed"] += 1
+                write({**record, "error": str(e), "timings": timings})
+                return
+        answers.store(question, query_vec, doc_ids, args.model, answer)
+        timings.update(ttft_ms=stats["ttft_ms"], llm_ms=stats["total_ms"], tokens_per_sec=stats["tokens_per_sec"])
+        counts["answered"] += 1
+        write({**record, "answer": answer, "cached": False, "completion_tokens": stats["completion_tokens"], "timings": timings})
+        print(f"✅ [{item['id']}] TTFT {stats['ttft_ms']} ms, total {stats['total_ms']} ms")
+
+    await asyncio.gather(*(answer_one(item, hits, vec) for item, hits, vec in zip(pending, doc_hits, query_vecs)))
+    print(llm.summary())
+    llm.close()
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions against the Chroma course DB")
+    parser.add_argument("input", help="JSONL with one {\"id\", \"question\"} per line")
+    parser.add_argument("-o", "--output", default="answers.jsonl", help="appended to; rerun to resume")
+    parser.add_argument("-k", type=int, default=4, help="documents retrieved per question")
+    parser.add_argument("--concurrency", type=int, default=8, help="LLM requests in flight")
+    parser.add_argument("--rate", type=float, default=0.5, help="LLM requests started per second (0 = unlimited)")
+    parser.add_argument("--timeout", type=float, default=120, help="read timeout per LLM request (seconds)")
+    parser.add_argument("--model", default=LLM_MODEL)
+    parser.add_argument("--context-tokens", type=int, default=CONTEXT_TOKENS, help="token budget for the packed context")
+    args = parser.parse_args(argv)
+
+    questions = load_questions(args.input)
+    done = answered_ids(args.output)
+    pending = [q for q in questions if q["id"] not in done]
+    print(f"📄 {len(questions)} questions, {len(done & {q['id'] for q in questions})} already answered, {len(pending)} to go")
+
+    # Stage 0: structured unit questions are answered from the unit index, no embedding or LLM
+    unit_index = load_unit_index()
+    rag_pending = []
+    with open(args.output, "a", encoding="utf-8") as out:
+        for item in pending:
+            start = time.perf_counter()
+            fast_answer = unit_index.answer(item["question"])
+            if fast_answer is None:
+                rag_pending.append(item)
+                continue
+            timings = {"lookup_ms": round((time.perf_counter() - start) * 1000, 3)}
+            out.write(json.dumps({"id": item["id"], "question": item["question"], "answer": fast_answer,
+                                  "source": "unit_index", "timings": timings}, ensure_ascii=False) + "\n")
+    if len(rag_pending) < len(pending):
+        print(f"⚡ {len(pending) - len(rag_pending)} answered from the unit index")
+    pending = rag_pending
+    if not pending:
+        return 0
+
+    # Stage 1: embed every question in one batch
+    embedding = CachedEmbeddings(EMBED_MODEL)
+    start = time.perf_counter()
+    query_vecs = embedding.embed_queries([q["question"] for q in pending])
+    embed_ms = (time.perf_counter() - start) * 1000
+
+    # Stage 2: one matrix product scores every question against every document
+    start = time.perf_counter()
+    docs, retriever = load_corpus()
+    load_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    doc_hits = retriever.search_batch(query_vecs, k=args.k)
+    retrieve_ms = (time.perf_counter() - start) * 1000
+    print(f"🔎 Embedded {len(pending)} questions in {embed_ms:.0f} ms, loaded {len(docs)} docs in {load_ms:.0f} ms, "
+          f"retrieved in {retrieve_ms:.1f} ms")
+
+    # Batch stages are shared, so each record carries its per-question share
+    base_timings = {
+        "embed_ms": round(embed_ms / len(pending), 2),
+        "retrieve_ms": round(retrieve_ms / len(pending), 3),
+    }
+
+    # Stage 3: concurrent LLM calls, answers appended as they finish
+    answers = AnswerCache(COLLECTION_NAME, corpus_version([os.path.join(CHROMA_DIR, "chroma.sqlite3")]))
+    packer = ContextPacker(embedding.embed_documents, budget=args.context_tokens)
+    start = time.perf_counter()
+    # Every retrieved passage's sentences in one encode call, before the concurrent stage starts
+    sentences = packer.warm(list(dict.fromkeys(docs[i].page_content for hits in doc_hits for i, _ in hits)))
+    print(f"✂️ Encoded {sentences} candidate sentences for packing in {(time.perf_counter() - start) * 1000:.0f} ms")
+    start = time.perf_counter()
+    with open(args.output, "a", encoding="utf-8") as out:
+        counts = asyncio.run(answer_all(pending, docs, doc_hits, query_vecs, answers, packer, out, args, base_timings))
+    elapsed = time.perf_counter() - start
+
+    print(f"💾 {counts['answered']} answered, {counts['cached']} from cache, {counts['failed']} failed "
+          f"in {elapsed:.1f}s -> {args.output}")
+    print(embedding.cache.summary())
+    print(answers.summary())
+    print(packer.summary())
+    return 1 if counts["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
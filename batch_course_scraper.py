@@ -0,0 +1,179 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import xml.etree.ElementTree as ET
+from urllib.parse import urlparse, urlencode, parse_qsl, urlunparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import requests
+from requests.adapters import HTTPAdapter
+from course_content_scraper import fetch_course_html, parse_course_page, HEADERS
+
+# ---------- Settings ----------
+OUTPUT_DIR = "course_pages"
+MANIFEST_FILE = "manifest.json"
+COURSE_URL_PATTERN = re.compile(r"/courses/[^/]+/courses/[^/?#]+")
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+# ---------- Step 1: Collect course URLs (plain list or sitemap) ----------
+def with_year(url, year):
+    if not year:
+        return url
+    parts = urlparse(url)
+    query = dict(parse_qsl(parts.query))
+    query["year"] = str(year)
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+def url_year(url):
+    return dict(parse_qsl(urlparse(url).query)).get("year", "")
+
+def read_sitemap(source, session):
+    if source.startswith("http://") or source.startswith("https://"):
+        xml_text = session.get(source, timeout=30).content
+    else:
+        with open(source, "rb") as f:
+            xml_text = f.read()
+
+    root = ET.fromstring(xml_text)
+    locs = [loc.text.strip() for loc in root.iter(f"{SITEMAP_NS}loc") if loc.text]
+    if root.tag == f"{SITEMAP_NS}sitemapindex":
+        # A sitemap index points to more sitemaps; only follow the course ones
+        urls = []
+        for child in locs:
+            if "course" in child:
+                urls.extend(read_sitemap(child, session))
+        return urls
+    return locs
+
+def collect_course_urls(url_file=None, sitemap=None, year=None, session=None):
+    urls = []
+    if url_file:
+        with open(url_file, encoding="utf-8") as f:
+            urls.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    if sitemap:
+        urls.extend(u for u in read_sitemap(sitemap, session or requests) if COURSE_URL_PATTERN.search(u))
+
+    # Dedupe on path + year so a course listed with extra query params is scraped once
+    seen = set()
+    unique = []
+    for url in urls:
+        url = with_year(url, year)
+        key = (urlparse(url).path, url_year(url))
+        if key not in seen:
+            seen.add(key)
+            unique.append(url)
+    return unique
+
+# ---------- Step 2: Helpers for output naming ----------
+def course_slug(url):
+    return urlparse(url).path.rstrip("/").split("/")[-1] or "course"
+
+def course_filename(url):
+    # One file per course and year, so a multi-year batch keeps every year ("k7i-..._2026.json")
+    year = url_year(url)
+    return f"{course_slug(url)}_{year}.json" if year else f"{course_slug(url)}.json"
+
+def course_code(course_data, url):
+    match = re.search(r"\(([A-Z0-9]{2,5})\)\s*$", course_data.get("title", ""))
+    if match:
+        return match.group(1)
+    return course_slug(url).split("-")[0].upper()
+
+def parse_job(url, html):
+    # Runs in a worker process: BeautifulSoup parsing is CPU-bound
+    start = time.perf_counter()
+    course_data = parse_course_page(html)
+    return url, course_data, time.perf_counter() - start
+
+def make_session(pool_size):
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+# ---------- Step 3: Fetch concurrently, parse in a process pool ----------
+def scrape_courses(urls, output_dir=OUTPUT_DIR, fetch_workers=16, parse_workers=None, use_browser_fallback=True):
+    os.makedirs(output_dir, exist_ok=True)
+    session = make_session(fetch_workers)
+    manifest = {}
+    started = time.perf_counter()
+
+    def fetch(url):
+        start = time.perf_counter()
+        html, method = fetch_course_html(url, session=session, use_browser_fallback=use_browser_fallback)
+        return url, html, method, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+            ProcessPoolExecutor(max_workers=parse_workers) as parse_pool:
+        fetch_futures = {fetch_pool.submit(fetch, url): url for url in urls}
+        parse_futures = {}
+
+        # Hand each page to the parser pool as soon as it arrives
+        for future in as_completed(fetch_futures):
+            url = fetch_futures[future]
+            try:
+                url, html, method, fetch_sec = future.result()
+            except Exception as e:
+                print(f"❌ Fetch failed: {url}: {e}")
+                manifest[url] = {"url": url, "status": "fetch_failed", "error": str(e)}
+                continue
+            manifest[url] = {"url": url, "fetch_method": method, "fetch_sec": round(fetch_sec, 3)}
+            parse_futures[parse_pool.submit(parse_job, url, html)] = url
+
+        for future in as_completed(parse_futures):
+            url = parse_futures[future]
+            try:
+                url, course_data, parse_sec = future.result()
+            except Exception as e:
+                print(f"❌ Parse failed: {url}: {e}")
+                manifest[url].update(status="parse_failed", error=str(e))
+                continue
+
+            code = course_code(course_data, url)
+            filename = course_filename(url)
+            with open(os.path.join(output_dir, filename), "w", encoding="utf-8") as f:
+                json.dump(course_data, f, indent=4, ensure_ascii=False)
+            manifest[url].update(
+                status="ok",
+                file=filename,
+                title=course_data.get("title", ""),
+                course_code=code,
+                year=url_year(url),
+                parse_sec=round(parse_sec, 3),
+            )
+            print(f"✅ {code}: {filename}")
+
+    # Keep the manifest in input order so reruns diff cleanly
+    entries = [manifest[url] for url in urls if url in manifest]
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump({"elapsed_sec": round(time.perf_counter() - started, 2), "courses": entries}, f, indent=4, ensure_ascii=False)
+
+    ok = sum(1 for e in entries if e.get("status") == "ok")
+    print(f"📦 Scraped {ok}/{len(urls)} courses into {output_dir} in {time.perf_counter() - started:.1f}s")
+    return entries
+
+# ---------- CLI ----------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape many UTAS course pages in one run")
+    parser.add_argument("--urls", help="text file with one course URL per line")
+    parser.add_argument("--sitemap", help="sitemap URL or file to take course URLs from")
+    parser.add_argument("--year", help="course year to request, e.g. 2026")
+    parser.add_argument("-o", "--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--fetch-workers", type=int, default=16)
+    parser.add_argument("--parse-workers", type=int, default=None, help="defaults to the CPU count")
+    parser.add_argument("--no-browser", action="store_true", help="never start headless Chrome")
+    args = parser.parse_args(argv)
+
+    if not args.urls and not args.sitemap:
+        parser.error("give --urls and/or --sitemap")
+
+    urls = collect_course_urls(args.urls, args.sitemap, args.year, session=make_session(2))
+    print(f"🔎 {len(urls)} course URLs to scrape")
+    scrape_courses(urls, args.output_dir, args.fetch_workers, args.parse_workers, not args.no_browser)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import os
+import sys
+import json
+import time
+import argparse
+from course_content_scraper import parse_course_page, PARSERS
+
+# Save the pages first, e.g.
+#   python course_content_scraper.py --save-html html_debug/master_course.html -o master_course_data.json
+PAGES = [
+    ("html_debug/master_course.html", "master_course_data.json"),
+    ("html_debug/bachelor_course.html", "bachelor_course_data.json"),
+]
+
+def dump(course_data):
+    # Same serialisation as save_course_data, so "identical" means identical bytes on disk
+    return json.dumps(course_data, indent=4, ensure_ascii=False)
+
+def time_parse(html, parser, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = parse_course_page(html, parser=parser)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return result, samples[len(samples) // 2] * 1000
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare course page parser backends")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--page", nargs=2, action="append", metavar=("HTML", "EXPECTED_JSON"),
+                        help="saved page and the JSON it should produce (repeatable)")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for html_path, expected_path in args.page or PAGES:
+        if not os.path.exists(html_path):
+            print(f"⚠️ Skipping {html_path}: not found")
+            continue
+        with open(html_path, encoding="utf-8") as f:
+            html = f.read()
+
+        outputs = {}
+        print(f"\n📄 {html_path} ({len(html) / 1024:.0f} KiB)")
+        for backend in PARSERS:
+            try:
+                result, median_ms = time_parse(html, backend, args.repeats)
+            except Exception as e:  # e.g. lxml not installed
+                print(f"  {backend:>12}: unavailable ({e})")
+                continue
+            outputs[backend] = dump(result)
+            print(f"  {backend:>12}: {median_ms:8.1f} ms")
+
+        if len(set(outputs.values())) > 1:
+            failed = True
+            print("  ❌ Backends produced different JSON")
+        elif outputs:
+            print("  ✅ Backends produced identical JSON")
+
+        if outputs and expected_path and os.path.exists(expected_path):
+            with open(expected_path, encoding="utf-8") as f:
+                expected = dump(json.load(f))
+            same = all(out == expected for out in outputs.values())
+            failed = failed or not same
+            print(f"  {'✅' if same else '❌'} Output {'matches' if same else 'differs from'} {expected_path}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
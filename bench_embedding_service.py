@@ -0,0 +1,67 @@
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from embedding_service import serve, DEFAULT_MODEL
+from embedding_client import ServiceEncoder, service_available
+
+QUESTIONS = [
+    "what will I learn in KIT514",
+    "how much are the fees for international students",
+    "what are the entry requirements for the master of IT",
+    "when is KIT712 offered",
+    "what are the assessments in KIT509",
+]
+
+def run_clients(encoder_factory, clients, requests_per_client, texts_per_request):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(_):
+        encoder = encoder_factory()
+        for r in range(requests_per_client):
+            texts = [QUESTIONS[(r + i) % len(QUESTIONS)] for i in range(texts_per_request)]
+            start = time.perf_counter()
+            encoder.encode(texts)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - start
+    total_texts = clients * requests_per_client * texts_per_request
+    return total_texts / elapsed, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 99) * 1000
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Encoding throughput of the embedding service under concurrent load")
+    parser.add_argument("--url", default="http://127.0.0.1:8766")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--texts", type=int, default=1, help="texts per request")
+    args = parser.parse_args(argv)
+
+    if not service_available(args.url):
+        # Start a private service in this process so the benchmark is self-contained
+        host, port = args.url.split("//")[1].split(":")
+        server = serve(host, int(port))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"🚀 Started embedding service on {args.url}")
+
+    from sentence_transformers import SentenceTransformer
+    start = time.perf_counter()
+    local_model = SentenceTransformer(DEFAULT_MODEL)
+    print(f"🧊 Cold in-process model load: {time.perf_counter() - start:.2f}s (paid by every script without the service)")
+
+    print(f"{'clients':>8} | {'mode':>10} | {'texts/s':>9} | {'p50 ms':>8} | {'p99 ms':>8}")
+    for clients in args.clients:
+        # Baseline: one shared in-process model, one encode call per request
+        rate, p50, p99 = run_clients(lambda: local_model, clients, args.requests, args.texts)
+        print(f"{clients:>8} | {'in-process':>10} | {rate:>9.0f} | {p50:>8.1f} | {p99:>8.1f}")
+        rate, p50, p99 = run_clients(lambda: ServiceEncoder(DEFAULT_MODEL, args.url), clients, args.requests, args.texts)
+        print(f"{clients:>8} | {'service':>10} | {rate:>9.0f} | {p50:>8.1f} | {p99:>8.1f}")
+
+if __name__ == "__main__":
+    sys.exit(main())
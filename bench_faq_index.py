@@ -0,0 +1,68 @@
+import time
+import random
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+from askus_chatbot import build_faq_index, search_faq, normalize
+
+# ---------- Settings ----------
+SIZES = [1_000, 10_000, 100_000]
+QUERIES = [
+    "how do I enrol in units",
+    "when is the census date",
+    "how can I withdraw from a unit without penalty",
+    "where do I pay my student fees",
+    "can I change my course enrolment online",
+]
+VOCAB = [
+    "enrol", "unit", "course", "census", "date", "withdraw", "fee", "pay", "student",
+    "online", "campus", "exam", "timetable", "results", "graduation", "scholarship",
+    "international", "domestic", "credit", "transfer", "library", "email", "password",
+    "special", "consideration", "extension", "assessment", "semester", "mylo", "id",
+]
+
+# ---------- Synthetic FAQ corpus ----------
+def make_faq(n, seed=0):
+    rng = random.Random(seed)
+    data = []
+    for i in range(n):
+        question = " ".join(rng.choices(VOCAB, k=8)) + f" q{i}"
+        answer = " ".join(rng.choices(VOCAB, k=60)) + f" a{i}"
+        data.append({"question": question, "answer": answer, "url": f"https://askus.example/{i}"})
+    return data
+
+# ---------- Old behaviour: refit TF-IDF on every query ----------
+def search_faq_refit(user_query, data, top_n=1):
+    documents = [normalize(item["question"] + " " + item["answer"]) for item in data if item["question"].strip()]
+    user_query = normalize(user_query)
+    vectorizer = TfidfVectorizer().fit(documents + [user_query])
+    doc_vecs = vectorizer.transform(documents)
+    user_vec = vectorizer.transform([user_query])
+    sims = cosine_similarity(user_vec, doc_vecs).flatten()
+    top_indices = sims.argsort()[-top_n:][::-1]
+    return [data[i] for i in top_indices]
+
+def time_per_query(fn, repeats):
+    samples = []
+    for r in range(repeats):
+        query = QUERIES[r % len(QUERIES)]
+        start = time.perf_counter()
+        fn(query)
+        samples.append(time.perf_counter() - start)
+    return np.median(samples) * 1000
+
+# ---------- Run ----------
+if __name__ == "__main__":
+    print(f"{'entries':>8} | {'build (s)':>9} | {'refit/query (ms)':>16} | {'index/query (ms)':>16}")
+    for n in SIZES:
+        data = make_faq(n)
+
+        start = time.perf_counter()
+        index = build_faq_index(data)
+        build_sec = time.perf_counter() - start
+
+        indexed_ms = time_per_query(lambda q: search_faq(q, data, top_n=5, index=index), repeats=200)
+        # The refit path is slow at large sizes, so only sample it a few times
+        refit_ms = time_per_query(lambda q: search_faq_refit(q, data, top_n=5), repeats=3 if n >= 100_000 else 10)
+
+        print(f"{n:>8} | {build_sec:>9.2f} | {refit_ms:>16.2f} | {indexed_ms:>16.3f}")
@@ -0,0 +1,294 @@
+import sys
+import json
+import time
+import resource
+import argparse
+import threading
+import subprocess
+from datetime import datetime
+import numpy as np
+from context_packer import ContextPacker
+
+# ---------- Settings ----------
+GOLDEN_FILE = "rag_golden.jsonl"   # one question per line, see the "expected" / "expect_text" fields
+OUTPUT_FILE = "bench_rag.json"
+KS = [1, 3, 5]
+CHROMA_DIR = "chroma_db"
+COLLECTION_NAME = "course_info"
+COURSE_EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"   # query_llm.py
+CHUNK_EMBED_MODEL = "all-MiniLM-L6-v2"                          # query_chunks_llm.py
+LLM_MODEL = "llama3-70b-8192"
+RETRIEVERS = ["course_dense", "course_hybrid", "chunks_dense", "chunks_hybrid", "faq_tfidf", "unit_index", "timetable"]
+
+PROMPT = """You are a helpful assistant at UTAS. Use the following context to answer the user's question clearly and accurately.
+
+Context:
+{context}
+
+Question: {question}
+
+Answer:"""
+
+# ---------- Measurement helpers ----------
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+
+    def time(self, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.samples.setdefault(stage, []).append((time.perf_counter() - start) * 1000)
+        return result
+
+    def last(self, stage):
+        return round(self.samples[stage][-1], 3) if self.samples.get(stage) else None
+
+    def percentiles(self):
+        return {stage: {"p50": round(float(np.percentile(ms, 50)), 3), "p95": round(float(np.percentile(ms, 95)), 3),
+                        "p99": round(float(np.percentile(ms, 99)), 3), "n": len(ms)}
+                for stage, ms in self.samples.items()}
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+# ---------- Relevance: a retrieved item counts when it matches one expected metadata subset ----------
+def matches(item, expected, substring=False):
+    for key, want in expected.items():
+        have = str(item.get(key, ""))
+        if substring and want.lower() not in have.lower():
+            return False
+        if not substring and have.upper() != str(want).upper():
+            return False
+    return True
+
+def rank_metrics(items, expected, substring=False):
+    # recall@k: share of expected documents found in the top k; rr: 1 / rank of the first one found
+    found_at = []
+    for want in expected:
+        ranks = [r for r, item in enumerate(items) if matches(item, want, substring)]
+        found_at.append(ranks[0] if ranks else None)
+    hit_ranks = [r for r in found_at if r is not None]
+    metrics = {f"recall@{k}": sum(1 for r in hit_ranks if r < k) / len(expected) for k in KS}
+    metrics["rr"] = 1.0 / (min(hit_ranks) + 1) if hit_ranks else 0.0
+    return metrics
+
+# ---------- Retrievers under test: setup() loads models / indexes, retrieve() returns ranked items ----------
+class CourseRetriever:
+    corpus = "course"
+
+    def __init__(self, hybrid):
+        self.hybrid = hybrid
+
+    def setup(self):
+        from langchain_community.vectorstores import Chroma
+        from embedding_client import get_langchain_embeddings
+        from course_catalog import CatalogFilters
+        from hybrid_retrieval import HybridCourseRetriever
+        # Uncached embeddings: the encode stage should measure the model, not the embedding cache
+        self.embedding = get_langchain_embeddings(COURSE_EMBED_MODEL)
+        self.db = Chroma(persist_directory=CHROMA_DIR, embedding_function=self.embedding, collection_name=COLLECTION_NAME)
+        if self.hybrid:
+            self.catalog = CatalogFilters(self.db.get(include=["metadatas"])["metadatas"])
+            self.retriever = HybridCourseRetriever(self.db, CHROMA_DIR)
+            self.retriever.bm25.index  # build / load BM25 now, not inside the first query
+        self.encode_passages = self.embedding.embed_documents
+
+    def retrieve(self, question, timer, k):
+        query_vec = timer.time("encode", self.embedding.embed_query, question)
+        if self.hybrid:
+            docs = timer.time("search", self.search_hybrid, question, query_vec, k)
+        else:
+            docs = timer.time("search", self.db.similarity_search_by_vector, query_vec, k=k)
+        return query_vec, [doc.metadata for doc in docs], [doc.page_content for doc in docs]
+
+    def search_hybrid(self, question, query_vec, k):
+        # Same order as query_llm.py: metadata filters first, unfiltered search as the fallback
+        filters = self.catalog.detect(question)
+        docs = self.retriever.search(question, query_vec, k=k, filters=filters) if filters else []
+        return docs or self.retriever.search(question, query_vec, k=k)
+
+class ChunkRetriever:
+    corpus = "chunks"
+
+    def __init__(self, hybrid):
+        self.hybrid = hybrid
+
+    def setup(self):
+        from embedding_client import get_encoder
+        from chunk_store import ChunkStore, STORE_DIR
+        from retrieval import load_retriever
+        from hybrid_retrieval import HybridChunkRetriever
+        self.store = ChunkStore(STORE_DIR)
+        self.model = get_encoder(CHUNK_EMBED_MODEL)
+        dense = load_retriever(self.store)
+        self.retriever = HybridChunkRetriever(dense, self.store) if self.hybrid else dense
+        if self.hybrid:
+            self.retriever.bm25.index
+        self.encode_passages = self.model.encode
+
+    def retrieve(self, question, timer, k):
+        query_vec = timer.time("encode", self.model.encode, [question])
+        if self.hybrid:
+            hits = timer.time("search", self.retriever.search, question, query_vec, k=k)
+        else:
+            hits = timer.time("search", self.retriever.search, query_vec, k=k, units=self.retriever.units_in_query(question))
+        chunks = [self.store[i] for i, _ in hits]
+        return query_vec, chunks, [f"{c['chunk_title']} ({c['unit']}):\n{c['text']}" for c in chunks]
+
+class FaqRetriever:
+    corpus = "faq"
+    substring = True   # FAQ entries have no IDs; golden questions name a word the right FAQ question contains
+
+    def setup(self):
+        from askus_chatbot import load_faq_data, load_faq_index
+        self.data = load_faq_data()
+        self.index = load_faq_index(self.data)
+
+    def retrieve(self, question, timer, k):
+        from askus_chatbot import search_faq
+        results = timer.time("search", search_faq, question, self.data, top_n=k, index=self.index)
+        return None, results, None
+
+class StructuredAnswerer:
+    # unit_index / timetable answer directly; a hit is an answer containing expect_text
+    def __init__(self, corpus):
+        self.corpus = corpus
+
+    def setup(self):
+        if self.corpus == "unit_index":
+            from unit_lookup import load_unit_index
+            self.index = load_unit_index()
+        else:
+            from timetable import load_timetable
+            self.timetable = load_timetable()
+
+    def answer(self, item, timer):
+        if self.corpus == "unit_index":
+            return timer.time("search", self.index.answer, item["question"])
+        from timetable import answer_timetable_question
+        now = datetime.fromisoformat(item["now"]) if item.get("now") else None
+        return timer.time("search", answer_timetable_question, self.timetable, item["student_id"], item["question"], now)
+
+def make_retriever(name):
+    return {
+        "course_dense": lambda: CourseRetriever(hybrid=False),
+        "course_hybrid": lambda: CourseRetriever(hybrid=True),
+        "chunks_dense": lambda: ChunkRetriever(hybrid=False),
+        "chunks_hybrid": lambda: ChunkRetriever(hybrid=True),
+        "faq_tfidf": FaqRetriever,
+        "unit_index": lambda: StructuredAnswerer("unit_index"),
+        "timetable": lambda: StructuredAnswerer("timetable"),
+    }[name]()
+
+# ---------- Mock LLM (mock_llm_server.py in a background thread) ----------
+def start_mock_llm(ttft_ms, token_ms):
+    from mock_llm_server import serve
+    from llm_client import LLMClient
+    server = serve(port=0, ttft_sec=ttft_ms / 1000, token_sec=token_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, LLMClient(base_url=f"http://{host}:{port}/openai/v1", api_key="bench", hedge=False)
+
+# ---------- Run one retriever over its share of the golden set ----------
+def run_retriever(name, questions, llm):
+    retriever = make_retriever(name)
+    items = [q for q in questions if q["corpus"] == retriever.corpus]
+    if not items:
+        return {"skipped": f"no golden questions for corpus {retriever.corpus}"}
+    timer = StageTimer()
+    try:
+        timer.time("model_load", retriever.setup)
+    except (ImportError, OSError, ValueError) as e:
+        return {"skipped": f"{type(e).__name__}: {e}"}
+    packer = ContextPacker(retriever.encode_passages) if hasattr(retriever, "encode_passages") else None
+
+    rows = []
+    for item in items:
+        row = {"id": item["id"], "category": item["category"]}
+        if isinstance(retriever, StructuredAnswerer):
+            answer = retriever.answer(item, timer)
+            hit = answer is not None and item["expect_text"].lower() in answer.lower()
+            row.update({f"recall@{k}": float(hit) for k in KS}, rr=float(hit))
+        else:
+            query_vec, ranked, passages = retriever.retrieve(item["question"], timer, max(KS))
+            row.update(rank_metrics(ranked, item["expected"], getattr(retriever, "substring", False)))
+            if packer is not None and passages:
+                packed, packing = timer.time("prompt_build", packer.pack, query_vec, passages)
+                prompt = PROMPT.format(context="\n\n".join(text for _, text in packed), question=item["question"])
+                row["prompt_tokens_saved"] = packing["saved_tokens"]
+                if llm is not None:
+                    messages = [{"role": "user", "content": prompt}]
+                    _, stats = timer.time("llm", llm.stream_chat, LLM_MODEL, messages, out=None)
+                    row["llm_ttft_ms"] = stats["ttft_ms"]
+        row["stage_ms"] = {stage: timer.last(stage) for stage in timer.samples if stage != "model_load"}
+        rows.append(row)
+
+    metrics = {key: round(float(np.mean([r[key] for r in rows])), 4) for key in [f"recall@{k}" for k in KS] + ["rr"]}
+    metrics["mrr"] = metrics.pop("rr")
+    return {
+        "questions": len(rows),
+        "metrics": metrics,
+        "mrr_by_category": {cat: round(float(np.mean([r["rr"] for r in rows if r["category"] == cat])), 4)
+                        for cat in sorted({r["category"] for r in rows})},
+        "model_load_ms": round(timer.samples["model_load"][0], 1),
+        "latency_ms": {stage: p for stage, p in timer.percentiles().items() if stage != "model_load"},
+        "peak_rss_mb": peak_rss_mb(),
+        "per_question": rows,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retrieval quality (recall@k, MRR) and per-stage latency on the golden question set")
+    parser.add_argument("--golden", default=GOLDEN_FILE)
+    parser.add_argument("-o", "--output", default=OUTPUT_FILE)
+    parser.add_argument("--retrievers", nargs="+", default=RETRIEVERS, choices=RETRIEVERS)
+    parser.add_argument("--no-llm", action="store_true", help="skip the mocked LLM stage")
+    parser.add_argument("--llm-ttft-ms", type=float, default=50)
+    parser.add_argument("--llm-token-ms", type=float, default=2)
+    args = parser.parse_args(argv)
+
+    with open(args.golden, "r", encoding="utf-8") as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+    print(f"📋 {len(questions)} golden questions from {args.golden}")
+
+    server, llm = start_mock_llm(args.llm_ttft_ms, args.llm_token_ms) if not args.no_llm else (None, None)
+    results = {}
+    try:
+        for name in args.retrievers:
+            results[name] = run_retriever(name, questions, llm)
+            result = results[name]
+            if "skipped" in result:
+                print(f"⏭️ {name}: skipped ({result['skipped']})")
+                continue
+            m, lat = result["metrics"], result["latency_ms"]
+            print(f"✅ {name:>14}: " + "  ".join(f"{k} {v:.2f}" for k, v in m.items())
+                  + f"  | load {result['model_load_ms']:.0f} ms, "
+                  + ", ".join(f"{stage} p50 {p['p50']:.2f} ms" for stage, p in lat.items())
+                  + f" | peak RSS {result['peak_rss_mb']} MB")
+    finally:
+        if server is not None:
+            llm.close()
+            server.shutdown()
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "golden": args.golden,
+        "ks": KS,
+        "llm": None if args.no_llm else {"mock": True, "ttft_ms": args.llm_ttft_ms, "token_ms": args.llm_token_ms},
+        "peak_rss_mb": peak_rss_mb(),
+        "retrievers": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Results written to {args.output}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+import sys
+import time
+import argparse
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+from retrieval import DenseRetriever
+
+# ---------- Settings ----------
+SIZES = [10**3, 10**4, 10**5, 10**6]
+DIM = 384                # all-MiniLM-L6-v2
+LEGACY_MAX_ROWS = 20_000  # the per-chunk loop is timed on at most this many rows, then scaled up
+
+def legacy_search(embeddings, query_vec, k=3):
+    # What query_chunks.py used to do: one cosine_similarity call per chunk, then a full sort
+    scores = []
+    for idx, chunk_vec in enumerate(embeddings):
+        score = cosine_similarity([chunk_vec], query_vec)[0][0]
+        scores.append((score, idx))
+    return sorted(scores, key=lambda x: x[0], reverse=True)[:k]
+
+def median_ms(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1000
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Top-k retrieval latency: per-chunk loop vs matrix search")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--batch", type=int, default=32, help="queries per batched search")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>9} | {'loop (ms)':>12} | {'1 query (ms)':>12} | {f'{args.batch} queries (ms)':>16} | {'unit filter (ms)':>16}")
+    for n in args.sizes:
+        embeddings = rng.standard_normal((n, DIM), dtype=np.float32)
+        units = np.array([f"KIT{500 + i % 300}" for i in range(n)])
+        queries = rng.standard_normal((args.batch, DIM), dtype=np.float32)
+        retriever = DenseRetriever(embeddings, units=units)
+
+        legacy_rows = min(n, LEGACY_MAX_ROWS)
+        loop_ms = median_ms(lambda: legacy_search(embeddings[:legacy_rows], queries[:1]), repeats=1) * n / legacy_rows
+        single_ms = median_ms(lambda: retriever.search(queries[:1], k=3), repeats=20)
+        batch_ms = median_ms(lambda: retriever.search_batch(queries, k=3), repeats=5)
+        filtered_ms = median_ms(lambda: retriever.search(queries[:1], k=3, units=["KIT514"]), repeats=20)
+
+        note = "*" if legacy_rows < n else " "
+        print(f"{n:>9} | {loop_ms:>11.1f}{note} | {single_ms:>12.3f} | {batch_ms:>16.3f} | {filtered_ms:>16.3f}")
+    print("* extrapolated linearly from a 20k-chunk run")
+
+if __name__ == "__main__":
+    sys.exit(main())
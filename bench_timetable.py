@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, datetime, timedelta
+import numpy as np
+from timetable import Timetable, DAY_NAMES
+
+# ---------- Settings ----------
+STUDENTS = 50_000
+UNITS = [f"KIT{n}" for n in range(101, 121)] + [f"KIT{n}" for n in range(501, 521)] + [f"KIT{n}" for n in range(701, 721)]
+SEMESTER_START = date(2025, 7, 21)
+WEEKS = 12
+SLOTS = ["09:00", "11:00", "13:00", "15:00"]
+
+# ---------- Synthetic cohort in the student_detail_timetable.json shape ----------
+def synthetic_cohort(n_students, seed=0):
+    rng = random.Random(seed)
+    # Every unit gets a fixed lecture slot; tutorials are picked per student, so some of them clash
+    lecture_slot = {u: (rng.randrange(5), rng.choice(SLOTS)) for u in UNITS}
+    records = []
+    for s in range(n_students):
+        classes = []
+        for unit in rng.sample(UNITS, rng.randint(2, 4)):
+            for kind, (weekday, start) in (("lecture", lecture_slot[unit]), ("tutorial", (rng.randrange(5), rng.choice(SLOTS)))):
+                end = f"{int(start[:2]) + 2:02d}:00"
+                first = SEMESTER_START + timedelta(days=weekday)
+                dates = [{"date": (first + timedelta(weeks=w)).strftime("%d-%m-%Y"), "week": w + 1} for w in range(WEEKS)]
+                classes.append({"unit_code": unit, "type": kind, "day": DAY_NAMES[weekday], "start": start, "end": end, "dates": dates})
+        records.append({"student_id": str(100000 + s), "classes": classes})
+    return records
+
+# ---------- What the chatbot would do without the engine: scan nested dicts, parse dates each time ----------
+def naive_next_class(records, student_id, now):
+    best = None
+    for record in records:
+        if record["student_id"] != student_id:
+            continue
+        for cls in record["classes"]:
+            for meeting in cls["dates"]:
+                when = datetime.strptime(f"{meeting['date']} {cls['end']}", "%d-%m-%Y %H:%M")
+                if when > now and (best is None or when < best[0]):
+                    best = (when, cls["unit_code"], cls["type"])
+    return best
+
+def naive_clashes(record):
+    meetings = []
+    for cls in record["classes"]:
+        for meeting in cls["dates"]:
+            day = datetime.strptime(meeting["date"], "%d-%m-%Y").date()
+            meetings.append((day, cls["start"], cls["end"], cls["unit_code"]))
+    found = 0
+    for i in range(len(meetings)):
+        for j in range(i + 1, len(meetings)):
+            a, b = meetings[i], meetings[j]
+            if a[0] == b[0] and a[1] < b[2] and b[1] < a[2]:
+                found += 1
+    return found
+
+def latency_us(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return np.percentile(samples, 50) * 1e6, np.percentile(samples, 99) * 1e6
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Timetable engine vs nested-dict scans on a synthetic cohort")
+    parser.add_argument("--students", type=int, default=STUDENTS)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    records = synthetic_cohort(args.students)
+    print(f"🧪 Generated {args.students} students in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    timetable = Timetable.from_records(records)
+    build_sec = time.perf_counter() - start
+    nbytes = sum(getattr(timetable, name).nbytes for name in Timetable.COLUMNS)
+    print(f"📅 {len(timetable):,} meetings -> columns in {build_sec:.2f}s ({nbytes / 1e6:.1f} MB)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "timetable.npz")
+        timetable.save(path)
+        start = time.perf_counter()
+        Timetable.load(path)
+        print(f"💾 Cached columnar load: {(time.perf_counter() - start) * 1000:.0f} ms ({os.path.getsize(path) / 1e6:.1f} MB on disk)")
+
+    rng = random.Random(1)
+    now = datetime(2025, 9, 3, 12, 30)
+    students = [str(100000 + rng.randrange(args.students)) for _ in range(args.queries)]
+
+    print(f"\n{'query':>22} | {'p50 µs':>9} | {'p99 µs':>9}")
+    rows = [
+        ("next class", timetable.next_classes, [(s, now) for s in students]),
+        ("week 7", timetable.in_week, [(s, 7) for s in students]),
+        ("date range (7 days)", timetable.between, [(s, now.date(), now.date() + timedelta(days=6)) for s in students]),
+        ("clashes", timetable.clashes, [(s,) for s in students]),
+        ("unit pair clash", timetable.unit_clash, [(s, "KIT101", "KIT501") for s in students]),
+    ]
+    for name, fn, calls in rows:
+        p50, p99 = latency_us(fn, calls)
+        print(f"{name:>22} | {p50:>9.1f} | {p99:>9.1f}")
+
+    # Baseline: the nested-dict scan, timed on a few queries (each one walks the whole cohort)
+    naive = students[:5]
+    p50, _ = latency_us(naive_next_class, [(records, s, now) for s in naive])
+    print(f"{'next class (naive)':>22} | {p50:>9.0f} |")
+
+    start = time.perf_counter()
+    summary = timetable.clash_summary()
+    bulk_ms = (time.perf_counter() - start) * 1000
+
+    # Both sides count every overlapping pair; check they agree student by student on a sample
+    sample = records[:500]
+    start = time.perf_counter()
+    naive_pairs = [naive_clashes(r) for r in sample]
+    naive_ms = (time.perf_counter() - start) * 1000 * len(records) / len(sample)
+    engine_pairs = [len(timetable.clashes(r["student_id"])) for r in sample]
+    mismatched = sum(1 for a, b in zip(naive_pairs, engine_pairs) if a != b)
+    print(f"\n⚠️ Bulk clash detection: {summary['students_with_clashes']:,} of {args.students:,} students clash "
+          f"({summary['clashing_pairs']:,} overlapping pairs) in {bulk_ms:.0f} ms; "
+          f"pairwise loop ≈ {naive_ms / 1000:.0f} s (extrapolated from {len(sample)} students)")
+    print(f"   agreement on {len(sample)} students: {sum(naive_pairs):,} pairs by the loop, {sum(engine_pairs):,} by the engine, "
+          f"{mismatched} students differ")
+    return 1 if mismatched else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+import mmap
+import hashlib
+import argparse
+import numpy as np
+from retrieval import normalize_rows
+
+# ---------- Store layout (all inside one directory) ----------
+STORE_DIR = "unit_chunks"
+EMBEDDINGS_FILE = "embeddings.npy"   # contiguous matrix of unit-length rows, opened with mmap (float32 is searched in place)
+META_FILE = "chunks.jsonl"           # one {"unit", "chunk_title", "text"} object per line
+INDEX_FILE = "chunks_index.npz"      # byte offsets into META_FILE + unit / title / chunk_id columns
+EMBEDDING_DIM = 384                  # all-MiniLM-L6-v2; only used to shape an empty store
+
+def chunk_id(chunk):
+    # Stable 63-bit ID from the chunk content, so the same chunk keeps its ID across rebuilds
+    key = "\x1f".join([chunk["unit"], chunk["chunk_title"], chunk["text"]]).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") & 0x7FFFFFFFFFFFFFFF
+
+# ---------- Write ----------
+def atomic_path(path):
+    return path + ".tmp"
+
+def write_chunk_store(chunks, embeddings, store_dir=STORE_DIR, dtype=np.float32):
+    os.makedirs(store_dir, exist_ok=True)
+    # Rows are L2-normalised here, once, so readers can search the mmap without copying it
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if len(chunks):
+        matrix = matrix.reshape(len(chunks), -1)
+    else:
+        # Nothing extracted (no PDFs, every PDF failed): still a valid, searchable (0, dim) store
+        matrix = matrix.reshape(0, matrix.shape[1] if matrix.ndim == 2 else EMBEDDING_DIM)
+    matrix = np.ascontiguousarray(normalize_rows(matrix).astype(dtype, copy=False))
+
+    lines = [
+        (json.dumps({"unit": c["unit"], "chunk_title": c["chunk_title"], "text": c["text"]}, ensure_ascii=False) + "\n").encode("utf-8")
+        for c in chunks
+    ]
+    offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+    np.cumsum([len(line) for line in lines], out=offsets[1:])
+
+    # Write everything to temp files first so readers never see a half-written store
+    emb_path = os.path.join(store_dir, EMBEDDINGS_FILE)
+    meta_path = os.path.join(store_dir, META_FILE)
+    index_path = os.path.join(store_dir, INDEX_FILE)
+    with open(atomic_path(emb_path), "wb") as f:
+        np.save(f, matrix)
+    with open(atomic_path(meta_path), "wb") as f:
+        f.writelines(lines)
+    with open(atomic_path(index_path), "wb") as f:
+        np.savez(
+            f,
+            offsets=offsets,
+            unit=np.array([c["unit"] for c in chunks], dtype=str),
+            chunk_title=np.array([c["chunk_title"] for c in chunks], dtype=str),
+            chunk_id=np.array([chunk_id(c) for c in chunks], dtype=np.int64),
+            normalized=np.array(True),
+        )
+    for path in (emb_path, meta_path, index_path):
+        os.replace(atomic_path(path), path)
+    return matrix.shape
+
+# ---------- Read (zero-copy) ----------
+class ChunkStore:
+    def __init__(self, store_dir=STORE_DIR):
+        self.store_dir = store_dir
+        # mmap: pages are only read when a row is actually touched
+        self.embeddings = np.load(os.path.join(store_dir, EMBEDDINGS_FILE), mmap_mode="r")
+        with np.load(os.path.join(store_dir, INDEX_FILE)) as index:
+            self.offsets = index["offsets"]
+            self.units = index["unit"]
+            self.titles = index["chunk_title"]
+            self.chunk_ids = index["chunk_id"] if "chunk_id" in index.files else None
+            self.normalized = bool(index["normalized"]) if "normalized" in index.files else False
+
+        self._meta_file = open(os.path.join(store_dir, META_FILE), "rb")
+        size = os.fstat(self._meta_file.fileno()).st_size
+        self._meta = mmap.mmap(self._meta_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if self.chunk_ids is None:
+            # Stores written before chunk IDs existed: derive them from the metadata once
+            self.chunk_ids = np.array([chunk_id(self[i]) for i in range(len(self))], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        # Chunk text is decoded lazily, one row at a time
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return json.loads(self._meta[start:end])
+
+    def close(self):
+        if isinstance(self._meta, mmap.mmap):
+            self._meta.close()
+        self._meta_file.close()
+
+# ---------- One-shot converter from the old chunks.json ----------
+def convert_chunks_json(json_path, store_dir=STORE_DIR, dtype=np.float32):
+    with open(json_path, "r", encoding="utf-8") as f:
+        chunks = json.load(f)
+    embeddings = np.array([c["embedding"] for c in chunks], dtype=dtype)
+    return write_chunk_store(chunks, embeddings, store_dir, dtype)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert unit_chunks/chunks.json into the binary chunk store")
+    parser.add_argument("json_path", nargs="?", default=os.path.join(STORE_DIR, "chunks.json"))
+    parser.add_argument("-o", "--store-dir", default=STORE_DIR)
+    parser.add_argument("--float16", action="store_true", help="halve the embedding file size (searched from an in-memory float32 copy)")
+    args = parser.parse_args(argv)
+
+    shape = convert_chunks_json(args.json_path, args.store_dir, np.float16 if args.float16 else np.float32)
+    print(f"✅ Converted {shape[0]} chunks ({shape[1]}-dim) from {args.json_path} into {args.store_dir}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import re
+import threading
+import numpy as np
+from retrieval import normalize_rows
+
+# ---------- Settings ----------
+CONTEXT_TOKENS = 900        # budget for the retrieved context inside one prompt
+DEDUP_THRESHOLD = 0.92      # passages this similar to a better one add nothing new
+CHARS_PER_TOKEN = 4         # rough Llama 3 ratio for English; no tokenizer needed at query time
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\"'])|\n+")
+
+def count_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN) if text else 0
+
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_SPLIT.split(text) if s.strip()]
+
+# ---------- Packer: dedupe, trim to the best sentences, order by relevance ----------
+class ContextPacker:
+    # encode: texts -> vectors with the same model as the query (CachedEncoder.encode / CachedEmbeddings.embed_documents)
+    def __init__(self, encode, budget=CONTEXT_TOKENS, dedup_threshold=DEDUP_THRESHOLD):
+        self.encode = encode
+        self.budget = budget
+        self.dedup_threshold = dedup_threshold
+        self.totals = {"queries": 0, "raw_tokens": 0, "packed_tokens": 0, "duplicates": 0}
+        self.lock = threading.Lock()  # pack() may run in worker threads (batch_answer.py)
+
+    def warm(self, texts):
+        # Encode every sentence of many passages in one batch; with a caching encoder the
+        # later pack() calls then only read vectors from the cache
+        flat = list(dict.fromkeys(s for text in texts for s in split_sentences(text)))
+        if flat:
+            self.encode(flat)
+        return len(flat)
+
+    def pack(self, query_vec, texts, separator="\n\n"):
+        # Returns ([(passage index, trimmed text)] best first, stats)
+        sentences = [split_sentences(text) for text in texts]
+        owners = np.repeat(np.arange(len(texts)), [len(s) for s in sentences])
+        flat = [s for group in sentences for s in group]
+        raw_tokens = sum(count_tokens(text) for text in texts) + count_tokens(separator) * max(len(texts) - 1, 0)
+        if not flat:
+            return [], self._record(raw_tokens, 0, 0)
+
+        # One encode call for every sentence; a passage vector is the mean of its sentences
+        vectors = normalize_rows(np.asarray(self.encode(flat), dtype=np.float32))
+        query = normalize_rows(np.atleast_2d(np.asarray(query_vec, dtype=np.float32)))[0]
+        sentence_scores = vectors @ query
+        passage_vecs = normalize_rows(np.stack([vectors[owners == i].mean(axis=0) if len(sentences[i]) else np.zeros(vectors.shape[1])
+                                                for i in range(len(texts))]))
+        passage_scores = passage_vecs @ query
+
+        # Near-duplicates: walk passages best first, drop any too close to one already kept
+        kept = []
+        for i in np.argsort(-passage_scores, kind="stable"):
+            if not sentences[i]:
+                continue
+            if kept and float(np.max(passage_vecs[kept] @ passage_vecs[i])) >= self.dedup_threshold:
+                continue
+            kept.append(int(i))
+
+        # Each passage keeps its first line (unit title / heading), best passage first. Those lines count
+        # against the budget as well: the one that overflows it is cut short and the rest are dropped.
+        heads = {}
+        used = 0
+        for i in kept:
+            gap = count_tokens(separator) if heads else 0
+            cost = gap + count_tokens(sentences[i][0])
+            if used + cost > self.budget:
+                room = self.budget - used - gap
+                if room > 0:
+                    heads[i] = sentences[i][0][:room * CHARS_PER_TOKEN]
+                    used = self.budget
+                break
+            heads[i] = sentences[i][0]
+            used += cost
+
+        # Then the best sentences overall fill what is left of the budget
+        chosen = {i: {0} for i in heads}
+        offsets = np.concatenate([[0], np.cumsum([len(s) for s in sentences])])
+        candidates = [j for j in np.argsort(-sentence_scores, kind="stable") if int(owners[j]) in chosen]
+        for j in candidates:
+            i = int(owners[j])
+            position = int(j - offsets[i])
+            cost = count_tokens(flat[j]) + 1
+            if position in chosen[i] or used + cost > self.budget:
+                continue
+            chosen[i].add(position)
+            used += cost
+
+        packed = [(i, " ".join([heads[i]] + [sentences[i][p] for p in sorted(chosen[i]) if p])) for i in heads]
+        packed_tokens = sum(count_tokens(text) for _, text in packed) + count_tokens(separator) * max(len(packed) - 1, 0)
+        return packed, self._record(raw_tokens, packed_tokens, len(texts) - len(kept))
+
+    def _record(self, raw_tokens, packed_tokens, duplicates):
+        stats = {"raw_tokens": raw_tokens, "packed_tokens": packed_tokens, "saved_tokens": raw_tokens - packed_tokens,
+                 "duplicates": duplicates}
+        with self.lock:
+            self.totals["queries"] += 1
+            self.totals["raw_tokens"] += raw_tokens
+            self.totals["packed_tokens"] += packed_tokens
+            self.totals["duplicates"] += duplicates
+        return stats
+
+    def summary(self):
+        t = self.totals
+        saved = t["raw_tokens"] - t["packed_tokens"]
+        return (f"✂️ Context packing: {t['queries']} prompts, {saved} tokens saved "
+                f"({saved / max(t['raw_tokens'], 1):.0%} of {t['raw_tokens']}), {t['duplicates']} near-duplicates dropped")
+
+def format_packing(stats):
+    return (f"✂️ Context {stats['raw_tokens']} → {stats['packed_tokens']} tokens (saved {stats['saved_tokens']})"
+            + (f", {stats['duplicates']} near-duplicate passages dropped" if stats["duplicates"] else ""))
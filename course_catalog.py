@@ -0,0 +1,233 @@
+import os
+import re
+import glob
+import json
+import hashlib
+from urllib.parse import urlparse, parse_qsl
+
+COURSE_CODE_PATTERN = re.compile(r"\(([A-Z0-9]{2,5})\)\s*$")
+UNIT_CODE_PATTERN = re.compile(r"\b([A-Z]{3}\d{3})\b", re.IGNORECASE)
+YEAR_PATTERN = re.compile(r"(20\d\d)")
+# A course_structure category only filters questions that ask about units / majors, not fees or descriptions
+STRUCTURE_INTENT = re.compile(r"\b(units?|subjects?|majors?|minors?|speciali[sz]ations?|electives?|core|compulsory|"
+                              r"course structure|study plan|streams?)\b", re.IGNORECASE)
+OTHER_INTENT = re.compile(r"\b(fees?|cost|tuition|price|scholarships?|entry|admission|apply|application deadline)\b", re.IGNORECASE)
+MANIFEST_FILE = "manifest.json"  # written by batch_course_scraper.py
+LEVELS = [
+    ("graduate certificate", "graduate certificate"),
+    ("graduate diploma", "graduate diploma"),
+    ("associate degree", "associate degree"),
+    ("diploma", "diploma"),
+    ("bachelor", "bachelor"),
+    ("master", "master"),
+    ("doctor", "doctorate"),
+]
+
+# ---------- Step 1: Find course JSON files ----------
+def expand_inputs(inputs):
+    # Files, directories (every *.json inside) and glob patterns, in a stable order
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(p for p in glob.glob(os.path.join(item, "*.json")) if os.path.basename(p) != MANIFEST_FILE))
+        elif any(ch in item for ch in "*?["):
+            paths.extend(sorted(glob.glob(item)))
+        else:
+            paths.append(item)
+    return list(dict.fromkeys(os.path.normpath(p) for p in paths))
+
+def load_manifests(paths):
+    # batch_course_scraper.py records course code and year per file; use them when present
+    by_file = {}
+    for folder in {os.path.dirname(p) for p in paths}:
+        manifest_path = os.path.join(folder, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                for entry in json.load(f).get("courses", []):
+                    if entry.get("file"):
+                        by_file[os.path.normpath(os.path.join(folder, entry["file"]))] = entry
+    return by_file
+
+# ---------- Step 2: Course code / level / year ----------
+def course_level(title):
+    lowered = title.lower()
+    for needle, level in LEVELS:
+        if lowered.startswith(needle) or f" {needle}" in lowered[:40]:
+            return level
+    return "other"
+
+def course_year(course_data, path, manifest_entry=None):
+    if manifest_entry and manifest_entry.get("year"):
+        return str(manifest_entry["year"])
+    if course_data.get("year"):
+        return str(course_data["year"])
+    match = YEAR_PATTERN.search(os.path.basename(path))
+    if match:
+        return match.group(1)
+    # Unit links are scraped with ?year=NNNN
+    for category in (course_data.get("course_structure") or {}).values():
+        units = category.get("units", []) if isinstance(category, dict) else category
+        for unit in units if isinstance(units, list) else []:
+            link = unit.get("unit_details_link", "") if isinstance(unit, dict) else ""
+            year = dict(parse_qsl(urlparse(link).query)).get("year")
+            if year:
+                return year
+    return ""
+
+def course_metadata(course_data, path, manifest_entry=None):
+    title = course_data.get("title", "Unknown Course")
+    match = COURSE_CODE_PATTERN.search(title)
+    code = (manifest_entry or {}).get("course_code") or (match.group(1) if match else os.path.splitext(os.path.basename(path))[0])
+    return {"title": title, "course_code": code, "level": course_level(title), "year": course_year(course_data, path, manifest_entry)}
+
+# ---------- Step 3: Flatten one course into (text, metadata) chunks ----------
+def clean_text(text):
+    return re.sub(r'\s+', ' ', text).strip()
+
+def flatten_dict(d, base, parent_key=""):
+    docs = []
+    for k, v in d.items():
+        key_name = f"{parent_key} - {k}" if parent_key else k
+        if isinstance(v, str):
+            docs.append((f"{key_name.replace('_', ' ').title()}: {clean_text(v)}", {**base, "source": key_name}))
+        elif isinstance(v, dict):
+            docs.extend(flatten_dict(v, base, key_name))
+        elif isinstance(v, list):
+            for idx, item in enumerate(v, 1):
+                if isinstance(item, dict):
+                    docs.extend(flatten_dict(item, base, f"{key_name} [{idx}]"))
+                else:
+                    docs.append((f"{key_name} [{idx}]: {clean_text(str(item))}", {**base, "source": key_name}))
+    return docs
+
+def unit_text(section_title, unit):
+    unit_parts = [
+        f"Category: {section_title}",  # include category name in the searchable text
+        f"Unit Title: {unit.get('unit_title', 'N/A')}",
+        f"Unit Code: {unit.get('unit_code', 'N/A')}",
+        f"Credit Points: {unit.get('unit_credit_points', 'N/A')}",
+        f"Description: {clean_text(unit.get('unit_description', 'N/A'))}"
+    ]
+    # Add availability info
+    availability_info = []
+    for availability in unit.get("unit_availability", []):
+        if isinstance(availability, dict):
+            location = availability.get("Location", "N/A")
+            period = availability.get("Study period", "N/A")
+            attendance = availability.get("Attendance options 1", "")
+            availability_info.append(f"- {location} ({period}): {attendance}")
+    if availability_info:
+        unit_parts.append("Availability:\n" + "\n".join(availability_info))
+    return "\n".join(unit_parts)
+
+def flatten_course(course_data, meta):
+    # meta: title / course_code / level / year, copied onto every chunk for filtering
+    docs = []
+
+    # Top-level strings
+    for key, value in course_data.items():
+        if isinstance(value, str) and key != "year":
+            docs.append((f"{key.replace('_', ' ').title()}: {clean_text(value)}", {**meta, "source": key, "section": key}))
+
+    # Nested dicts
+    if isinstance(course_data.get("entry_requirements"), dict):
+        docs.extend(flatten_dict(course_data["entry_requirements"], {**meta, "section": "entry_requirements"}, "Entry Requirements"))
+    if isinstance(course_data.get("fees"), dict):
+        docs.extend(flatten_dict(course_data["fees"], {**meta, "section": "fees"}, "Fees"))
+
+    # course_structure: {category: [units]} (older scrapes) or {category: {category_description, units}}
+    structure = course_data.get("course_structure")
+    if isinstance(structure, dict):
+        for section_title, category in structure.items():
+            base = {**meta, "section": "course_structure", "category": section_title}
+            if isinstance(category, str):
+                docs.append((f"Course Structure - {section_title}: {clean_text(category)}", {**base, "source": f"course_structure-{section_title}"}))
+                continue
+            units = category
+            if isinstance(category, dict):
+                units = category.get("units", [])
+                if category.get("category_description"):
+                    docs.append((f"Category: {section_title}\n{clean_text(category['category_description'])}",
+                                 {**base, "source": f"category-{section_title}"}))
+            for unit in units:
+                code = unit.get("unit_code", "N/A")
+                docs.append((unit_text(section_title, unit), {**base, "source": f"unit-{code}", "unit_code": code}))
+    return docs
+
+def flatten_file(path, manifest_entry=None):
+    # Runs in a worker process; returns plain tuples so nothing LangChain-specific is pickled
+    with open(path, "r", encoding="utf-8") as f:
+        course_data = json.load(f)
+    meta = course_metadata(course_data, path, manifest_entry)
+    return path, meta, flatten_course(course_data, meta)
+
+# ---------- Stable Chroma IDs (course + source + content hash) ----------
+def document_id(text, meta):
+    # Same text from the same source keeps its ID across runs; any edit gives a new one.
+    # Also recomputable from a search result (page_content + metadata) to match it with other indexes.
+    code, source = meta.get("course_code", ""), meta.get("source", "")
+    raw = f"{code}\x1f{meta.get('year', '')}\x1f{source}\x1f{text}"
+    return f"{code}:{source}::{hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]}"
+
+# ---------- Query-side metadata pre-filters ----------
+class CatalogFilters:
+    # Built from the metadata stored in Chroma; finds course / category / unit code mentions in a question
+    def __init__(self, metadatas):
+        self.course_codes = {}
+        self.course_titles = {}
+        self.categories = set()
+        self.unit_codes = set()
+        self._category_patterns = None
+        for meta in metadatas:
+            if not meta:
+                continue
+            if meta.get("course_code"):
+                self.course_codes[meta["course_code"].upper()] = meta["course_code"]
+                title = re.sub(r"\s*\([A-Z0-9]{2,5}\)\s*$", "", meta.get("title", "")).lower()
+                if title:
+                    self.course_titles[title] = meta["course_code"]
+            if meta.get("category"):
+                self.categories.add(meta["category"])
+            if meta.get("unit_code"):
+                self.unit_codes.add(meta["unit_code"].upper())
+
+    def detect(self, query):
+        lowered = query.lower()
+        filters = {}
+
+        courses = {self.course_codes[t.upper()] for t in re.findall(r"\b[A-Za-z0-9]{2,5}\b", query) if t.upper() in self.course_codes}
+        courses |= {code for title, code in self.course_titles.items() if title in lowered}
+        if len(courses) == 1:
+            filters["course_code"] = courses.pop()
+
+        units = [u.upper() for u in UNIT_CODE_PATTERN.findall(query) if u.upper() in self.unit_codes]
+        if units:
+            filters["unit_code"] = list(dict.fromkeys(units))
+        elif STRUCTURE_INTENT.search(query) and not OTHER_INTENT.search(query):
+            # Whole-word match on the category name; longest wins ("Core Units" over "Units")
+            matches = sorted((c for c, pattern in self.category_patterns.items() if pattern.search(query)),
+                             key=len, reverse=True)
+            if matches:
+                filters["category"] = matches[0]
+        return filters
+
+    @property
+    def category_patterns(self):
+        if self._category_patterns is None:
+            self._category_patterns = {
+                c: re.compile(r"(?<!\w)" + r"\s+".join(map(re.escape, c.split())) + r"(?!\w)", re.IGNORECASE)
+                for c in self.categories if len(c) > 3
+            }
+        return self._category_patterns
+
+def chroma_where(filters):
+    # {"course_code": "K7I", "unit_code": ["KIT514"]} -> Chroma where clause (None when empty)
+    clauses = []
+    for key, value in filters.items():
+        if isinstance(value, list):
+            clauses.append({key: value[0]} if len(value) == 1 else {key: {"$in": value}})
+        else:
+            clauses.append({key: value})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
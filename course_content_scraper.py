@@ -1,60 +1,99 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+import sys
 import json
+import argparse
+import importlib.util
+import requests
+from bs4 import BeautifulSoup
 
-# Configure headless browser
-options = Options()
-options.add_argument('--disable-gpu')
-options.add_argument('--no-sandbox')
-
-# Setup ChromeDriver
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=options)
-
-# Load the page
-url = "https://www.utas.edu.au/courses/cse/courses/k7i-master-of-information-technology-and-systems?year=2026"
-#url = "https://www.utas.edu.au/courses/cse/courses/p3t-bachelor-of-information-and-communication-technology?year=2026"
-driver.get(url)
-
-# Parse the fully loaded HTML
-soup = BeautifulSoup(driver.page_source, 'html.parser')
-driver.quit()
-
-# Extract titles
-course_data = {
-    "title": "",
-    "overview": "",
-    "duration": "",
-    "course_objectives": "",
-    "learning_outcomes": "",
-    "practical_experience": "",
-    "work_placement": "",
-    "career_outcomes": "",
-    "entry_requirements": "",
-    "fees": "",
-    "course_structure": ""
-}
-
-title_tag = soup.find('h1', class_='l-object-page-header--page-title')
-if title_tag:
-    title_text = title_tag.contents[0].strip()
-    code_text = title_tag.find('small').get_text(strip=True) if title_tag.find('small') else ""
-    course_data["title"] = f"{title_text} {code_text}"
-
-overview_block = soup.select_one("div.richtext.richtext__medium")
-overview_text = overview_block.get_text(separator="\n", strip=True) if overview_block else "N/A"
-course_data["overview"] = overview_text
-
-duration_tag = soup.find('dd', class_='meta-list--item__time')
-if duration_tag:
-    duration_text = duration_tag.find('span', class_='meta-list--item-inner').contents[0].strip()
-    course_data["duration"] = duration_text
+BASE_URL = "https://www.utas.edu.au"
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+DEFAULT_URL = "https://www.utas.edu.au/courses/cse/courses/k7i-master-of-information-technology-and-systems?year=2026"
+#DEFAULT_URL = "https://www.utas.edu.au/courses/cse/courses/p3t-bachelor-of-information-and-communication-technology?year=2026"
+DEFAULT_OUTPUT = "master_course_data.json"
+#DEFAULT_OUTPUT = "bachelor_course_data.json"
+
+# lxml builds the tree in C and is several times faster than html.parser on the
+# large course-structure accordions; bench_course_parser.py checks both give the same JSON
+PARSERS = ["lxml", "html.parser"]
+DEFAULT_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+# ---------- Fetching: plain HTTP first, headless Chrome only as a fallback ----------
+def fetch_static(url, session=None, timeout=20):
+    session = session or requests
+    res = session.get(url, headers=HEADERS, timeout=timeout)
+    res.raise_for_status()
+    return res.text
+
+def fetch_with_browser(url):
+    # Selenium is imported lazily so the scraper works where Chrome is not installed
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    options = Options()
+    options.add_argument('--headless=new')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--no-sandbox')
+
+    service = Service(ChromeDriverManager().install())
+    driver = webdriver.Chrome(service=service, options=options)
+    try:
+        driver.get(url)
+        return driver.page_source
+    finally:
+        driver.quit()
+
+def has_course_structure(html):
+    # The unit accordions are what the static HTML sometimes lacks; a substring
+    # check is enough here and avoids parsing the page twice
+    return 'id="courseStructues"' in html and "unit-list--code" in html
+
+def fetch_course_html(url, session=None, use_browser_fallback=True):
+    try:
+        html = fetch_static(url, session=session)
+        if has_course_structure(html) or not use_browser_fallback:
+            return html, "static"
+        print(f"⚠️ Course structure missing from static HTML, falling back to browser: {url}")
+    except requests.RequestException as e:
+        if not use_browser_fallback:
+            raise
+        print(f"⚠️ Static fetch failed ({e}), falling back to browser: {url}")
+    return fetch_with_browser(url), "browser"
+
+# ---------- Extraction helpers (work on any parsed page) ----------
+def empty_course_data():
+    return {
+        "title": "",
+        "overview": "",
+        "duration": "",
+        "course_objectives": "",
+        "learning_outcomes": "",
+        "practical_experience": "",
+        "work_placement": "",
+        "career_outcomes": "",
+        "entry_requirements": "",
+        "fees": "",
+        "course_structure": ""
+    }
+
+def extract_title(soup):
+    title_tag = soup.find('h1', class_='l-object-page-header--page-title')
+    if title_tag:
+        title_text = title_tag.contents[0].strip()
+        code_text = title_tag.find('small').get_text(strip=True) if title_tag.find('small') else ""
+        return f"{title_text} {code_text}"
+    return ""
+
+def extract_overview(soup):
+    overview_block = soup.select_one("div.richtext.richtext__medium")
+    return overview_block.get_text(separator="\n", strip=True) if overview_block else "N/A"
+
+def extract_duration(soup):
+    duration_tag = soup.find('dd', class_='meta-list--item__time')
+    if duration_tag:
+        return duration_tag.find('span', class_='meta-list--item-inner').contents[0].strip()
+    return ""
 
 
 def extract_section_text(soup, section_id):
@@ -67,11 +106,6 @@ def extract_section_text(soup, section_id):
             return section_div.get_text(separator="\n", strip=True)
     return "N/A"
 
-course_data["course_objectives"] = extract_section_text(soup, "course-objectives")
-course_data["learning_outcomes"] = extract_section_text(soup, "learning-outcomes")
-course_data["practical_experience"] = extract_section_text(soup, "practical-experience")
-course_data["work_placement"] = extract_section_text(soup, "opportunities-abroad")
-
 
 def extract_section_by_heading_id(soup, heading_id):
     heading = soup.find(['h2', 'h3'], id=heading_id)
@@ -81,61 +115,111 @@ def extract_section_by_heading_id(soup, heading_id):
             return content.get_text(separator="\n", strip=True)
     return "N/A"
 
-course_data["career_outcomes"] = extract_section_by_heading_id(soup, "career-outcomes")
 
+def extract_entry_requirements(soup):
+    entry_requirements = {}
+    entry_requirements_header = soup.find("h2", id="entry-requirements")
 
-entry_requirements = {}
-entry_requirements_header = soup.find("h2", id="entry-requirements")
+    if entry_requirements_header:
+        # The container div follows the h2
+        entry_container = entry_requirements_header.find_next("div", class_="block block__pad-lg block__shadowed")
+        if entry_container:
+            accordion_sections = entry_container.find_all("section", class_="accordion--panel")
 
-if entry_requirements_header:
-    # The container div follows the h2
-    entry_container = entry_requirements_header.find_next("div", class_="block block__pad-lg block__shadowed")
-    if entry_container:
-        accordion_sections = entry_container.find_all("section", class_="accordion--panel")
-        
-        for section in accordion_sections:
-            # Get the section title (e.g., "For Domestic students")
-            title_tag = section.find("a", class_="requirements accordion--link")
-            title = title_tag.get_text(strip=True) if title_tag else "Unknown"
+            for section in accordion_sections:
+                # Get the section title (e.g., "For Domestic students")
+                title_tag = section.find("a", class_="requirements accordion--link")
+                title = title_tag.get_text(strip=True) if title_tag else "Unknown"
 
-            # Get the accordion body content
-            content_div = section.find("div", class_="accordion--content")
-            content = content_div.get_text(separator="\n", strip=True) if content_div else ""
+                # Get the accordion body content
+                content_div = section.find("div", class_="accordion--content")
+                content = content_div.get_text(separator="\n", strip=True) if content_div else ""
 
-            # Save to dictionary
-            entry_requirements[title] = content
+                # Save to dictionary
+                entry_requirements[title] = content
 
-course_data["entry_requirements"] = entry_requirements
+    return entry_requirements
 
-fees = {}
-fees_header = soup.find("h2", id="fees-and-scholarships")
 
-if fees_header:
-    fees_container = fees_header.find_next("div", class_="block block__pad-lg block__shadowed")
-    if fees_container:
-        fees_sections = fees_container.find_all("section", class_="sectioned-content")
+def extract_fees(soup):
+    fees = {}
+    fees_header = soup.find("h2", id="fees-and-scholarships")
 
-        for section in fees_sections:
-            title_tag = section.find("h4", class_="sectioned-content--title")
-            content_div = section.find("div", class_="richtext richtext__medium")
-            if not title_tag or not content_div:
-                continue
+    if fees_header:
+        fees_container = fees_header.find_next("div", class_="block block__pad-lg block__shadowed")
+        if fees_container:
+            fees_sections = fees_container.find_all("section", class_="sectioned-content")
 
-            title = title_tag.get_text(strip=True)
-            content = content_div.get_text(separator="\n", strip=True)
+            for section in fees_sections:
+                title_tag = section.find("h4", class_="sectioned-content--title")
+                content_div = section.find("div", class_="richtext richtext__medium")
+                if not title_tag or not content_div:
+                    continue
 
-            if "International" in title:
-                if title not in fees:
-                    fees[title] = content
+                title = title_tag.get_text(strip=True)
+                content = content_div.get_text(separator="\n", strip=True)
+
+                if "International" in title:
+                    if title not in fees:
+                        fees[title] = content
+                    else:
+                        fees[title] += "\n\n" + content  # Append additional content
                 else:
-                    fees[title] += "\n\n" + content  # Append additional content
-            else:
-                fees[title] = content
+                    fees[title] = content
 
-course_data["fees"] = fees
+    return fees
 
 
-def extract_course_structure_units(soup, base_url="https://www.utas.edu.au"):
+def extract_headers_with_colspan(header_row):
+    headers = []
+    for th in header_row.find_all("th"):
+        text = th.get_text(strip=True)
+        colspan = int(th.get('colspan', 1))
+        if colspan > 1:
+            for i in range(colspan):
+                # add index suffix to distinguish columns
+                headers.append(f"{text} {i+1}")
+        else:
+            headers.append(text)
+    return headers
+
+
+def has_class_ancestor(tag, class_name):
+    return any(class_name in (parent.get("class") or ()) for parent in tag.parents)
+
+
+def scan_unit_div(unit_div):
+    # One walk over the unit subtree instead of six separate select_one/find calls.
+    # Each slot keeps the first match in document order, exactly like select_one/find:
+    #   code               .unit-list--code
+    #   name               .unit-list--name
+    #   details_link       .unit-list--more.accordion--link
+    #   credit             <strong> whose string contains "Credit Points:"
+    #   description        .unit-list--introduction p
+    #   availability_table table.table__unit-availabilities
+    found = {}
+    for tag in unit_div.descendants:
+        if tag.name is None:
+            continue  # text node
+        classes = tag.get("class") or ()
+        if "code" not in found and "unit-list--code" in classes:
+            found["code"] = tag
+        if "name" not in found and "unit-list--name" in classes:
+            found["name"] = tag
+        if "details_link" not in found and "unit-list--more" in classes and "accordion--link" in classes:
+            found["details_link"] = tag
+        if "credit" not in found and tag.name == "strong" and tag.string and "Credit Points:" in tag.string:
+            found["credit"] = tag
+        if "description" not in found and tag.name == "p" and has_class_ancestor(tag, "unit-list--introduction"):
+            found["description"] = tag
+        if "availability_table" not in found and tag.name == "table" and "table__unit-availabilities" in classes:
+            found["availability_table"] = tag
+        if len(found) == 6:
+            break
+    return found
+
+
+def extract_course_structure_units(soup, base_url=BASE_URL):
     course_structure_data = {}
     course_structure_heading = soup.find(['h2', 'h3'], id="course-structure")
 
@@ -180,15 +264,17 @@ def extract_course_structure_units(soup, base_url="https://www.utas.edu.au"):
                         unit_divs = section.select("div.accordion--panel")
 
                     for unit_div in unit_divs:
+                        tags = scan_unit_div(unit_div)
+
                         # Check if this is a unit by presence of unit-list--code class
-                        code_tag = unit_div.select_one(".unit-list--code")
+                        code_tag = tags.get("code")
                         if not code_tag:
                             continue  # skip if not a unit
 
-                        name_tag = unit_div.select_one(".unit-list--name")
-                        details_link_tag = unit_div.select_one(".unit-list--more.accordion--link")
-                        credit_tag = unit_div.find("strong", string=lambda t: t and "Credit Points:" in t)
-                        description_tag = unit_div.select_one(".unit-list--introduction p")
+                        name_tag = tags.get("name")
+                        details_link_tag = tags.get("details_link")
+                        credit_tag = tags.get("credit")
+                        description_tag = tags.get("description")
 
                         credit_points = ""
                         if credit_tag:
@@ -197,21 +283,8 @@ def extract_course_structure_units(soup, base_url="https://www.utas.edu.au"):
                             if next_sib:
                                 credit_points = next_sib.strip()
 
-                        def extract_headers_with_colspan(header_row):
-                            headers = []
-                            for th in header_row.find_all("th"):
-                                text = th.get_text(strip=True)
-                                colspan = int(th.get('colspan', 1))
-                                if colspan > 1:
-                                    for i in range(colspan):
-                                        # add index suffix to distinguish columns
-                                        headers.append(f"{text} {i+1}")
-                                else:
-                                    headers.append(text)
-                            return headers
-                            
                         # Extract availability table
-                        availability_table = unit_div.find("table", class_="table__unit-availabilities")
+                        availability_table = tags.get("availability_table")
                         unit_availability = []
                         if availability_table:
                             header_row = availability_table.select_one("thead tr")
@@ -244,14 +317,55 @@ def extract_course_structure_units(soup, base_url="https://www.utas.edu.au"):
 
     return course_structure_data or "N/A"
 
-course_data["course_structure"] = extract_course_structure_units(soup)
-
-with open('master_course_data.json', 'w', encoding='utf-8') as f:
-    json.dump(course_data, f, indent=4, ensure_ascii=False)
-
-print("✅ Data saved to master_course_data.json")
-
-#with open('bachelor_course_data.json', 'w', encoding='utf-8') as f:
-#    json.dump(course_data, f, indent=4, ensure_ascii=False)
 
-#print("✅ Data saved to bachelor_course_data.json")
+# ---------- Whole page ----------
+def parse_course_page(html, base_url=BASE_URL, parser=DEFAULT_PARSER):
+    soup = BeautifulSoup(html, parser)
+    course_data = empty_course_data()
+    course_data["title"] = extract_title(soup)
+    course_data["overview"] = extract_overview(soup)
+    course_data["duration"] = extract_duration(soup)
+    course_data["course_objectives"] = extract_section_text(soup, "course-objectives")
+    course_data["learning_outcomes"] = extract_section_text(soup, "learning-outcomes")
+    course_data["practical_experience"] = extract_section_text(soup, "practical-experience")
+    course_data["work_placement"] = extract_section_text(soup, "opportunities-abroad")
+    course_data["career_outcomes"] = extract_section_by_heading_id(soup, "career-outcomes")
+    course_data["entry_requirements"] = extract_entry_requirements(soup)
+    course_data["fees"] = extract_fees(soup)
+    course_data["course_structure"] = extract_course_structure_units(soup, base_url)
+    return course_data
+
+def scrape_course(url, session=None, use_browser_fallback=True, parser=DEFAULT_PARSER):
+    html, method = fetch_course_html(url, session=session, use_browser_fallback=use_browser_fallback)
+    print(f"🌐 Fetched {url} ({method})")
+    return parse_course_page(html, parser=parser)
+
+def save_course_data(course_data, output_path):
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(course_data, f, indent=4, ensure_ascii=False)
+    print(f"✅ Data saved to {output_path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape a UTAS course page into JSON")
+    parser.add_argument("url", nargs="?", default=DEFAULT_URL)
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--html", help="parse a saved HTML file instead of fetching the URL")
+    parser.add_argument("--no-browser", action="store_true", help="never start headless Chrome")
+    parser.add_argument("--parser", choices=PARSERS, default=DEFAULT_PARSER)
+    parser.add_argument("--save-html", help="also save the fetched HTML (e.g. for bench_course_parser.py)")
+    args = parser.parse_args(argv)
+
+    if args.html:
+        with open(args.html, encoding="utf-8") as f:
+            html = f.read()
+    else:
+        html, method = fetch_course_html(args.url, use_browser_fallback=not args.no_browser)
+        print(f"🌐 Fetched {args.url} ({method})")
+        if args.save_html:
+            with open(args.save_html, "w", encoding="utf-8") as f:
+                f.write(html)
+
+    save_course_data(parse_course_page(html, parser=args.parser), args.output)
+
+if __name__ == "__main__":
+    sys.exit(main())
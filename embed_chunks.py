@@ -1,111 +1,95 @@
-import json
-import re
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain.schema import Document
+from embedding_cache import CachedEmbeddings
+from course_catalog import expand_inputs, load_manifests, flatten_file, document_id
 
 # ---------- SETTINGS ----------
-JSON_FILE = "course_data.json"  # Your JSON file path
+JSON_FILE = "course_data.json"  # default input; pass files, directories or globs to ingest more courses
 CHROMA_DIR = "chroma_db"
 EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 COLLECTION_NAME = "course_info"
+EMBED_BATCH = 64  # documents embedded and upserted per call
 
-# ---------- STEP 1: Load JSON ----------
-with open(JSON_FILE, "r", encoding="utf-8") as f:
-    course_data = json.load(f)
+# ---------- STEP 1: Flatten every course file (in parallel) ----------
+def flatten_all(paths, workers=None):
+    manifests = load_manifests(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(flatten_file, paths, [manifests.get(p) for p in paths]))
 
-course_title = course_data.get("title", "Unknown Course")
-documents = []
+    # The same course and year scraped into several files: keep the newest file
+    newest = {}
+    for path, meta, docs in results:
+        key = (meta["course_code"], meta["year"])
+        if key in newest:
+            older, newer = sorted([newest[key], (path, meta, docs)], key=lambda r: os.path.getmtime(r[0]))
+            print(f"⚠️ {meta['course_code']} {meta['year'] or '(no year)'} is in both {older[0]} and {newer[0]}; using {newer[0]}")
+            newest[key] = newer
+        else:
+            newest[key] = (path, meta, docs)
+    return list(newest.values())
 
-# ---------- STEP 2: Flattening logic ----------
-def clean_text(text):
-    return re.sub(r'\s+', ' ', text).strip()
-
-def flatten_dict(d, parent_key=""):
-    docs = []
-    for k, v in d.items():
-        key_name = f"{parent_key} - {k}" if parent_key else k
-        if isinstance(v, str):
-            docs.append(Document(
-                page_content=f"{key_name.replace('_', ' ').title()}: {clean_text(v)}",
-                metadata={"source": key_name, "title": course_title}
-            ))
-        elif isinstance(v, dict):
-            docs.extend(flatten_dict(v, key_name))
-        elif isinstance(v, list):
-            for idx, item in enumerate(v, 1):
-                if isinstance(item, dict):
-                    docs.extend(flatten_dict(item, f"{key_name} [{idx}]"))
-                else:
-                    docs.append(Document(
-                        page_content=f"{key_name} [{idx}]: {clean_text(str(item))}",
-                        metadata={"source": key_name, "title": course_title}
-                    ))
-    return docs
+# ---------- STEP 2: Diff against the collection, embed & upsert only what changed ----------
+def sync_collection(docs_by_id, courses, prune=False):
+    start = time.perf_counter()
+    embedding = CachedEmbeddings(EMBED_MODEL)  # the model is only loaded if some text is not cached yet
+    db = Chroma(persist_directory=CHROMA_DIR, embedding_function=embedding, collection_name=COLLECTION_NAME)
 
-# ---------- STEP 3: Add top-level strings ----------
-for key, value in course_data.items():
-    if isinstance(value, str):
-        documents.append(Document(
-            page_content=f"{key.replace('_', ' ').title()}: {clean_text(value)}",
-            metadata={"source": key, "title": course_title}
-        ))
+    # Only courses ingested in this run are diffed; other courses in the collection are left alone.
+    # Chunks without course metadata come from the old single-file script and are replaced.
+    stored = db.get(include=["metadatas"])
+    stored_ids = set(stored["ids"])
+    in_scope = {
+        doc_id for doc_id, meta in zip(stored["ids"], stored["metadatas"])
+        if prune or not meta or "course_code" not in meta or (meta["course_code"], meta.get("year", "")) in courses
+    }
+    new_ids = [doc_id for doc_id in docs_by_id if doc_id not in stored_ids]
+    removed_ids = sorted(in_scope - set(docs_by_id))
+    print(f"🔍 {len(docs_by_id)} chunks: {len(docs_by_id) - len(new_ids)} unchanged, "
+          f"{len(new_ids)} new/changed, {len(removed_ids)} removed")
 
-# ---------- STEP 4: Flatten nested dicts ----------
-if "entry_requirements" in course_data:
-    documents.extend(flatten_dict(course_data["entry_requirements"], "Entry Requirements"))
+    for i in range(0, len(removed_ids), EMBED_BATCH * 8):
+        db.delete(ids=removed_ids[i:i + EMBED_BATCH * 8])
 
-if "fees" in course_data:
-    documents.extend(flatten_dict(course_data["fees"], "Fees"))
+    for i in range(0, len(new_ids), EMBED_BATCH):
+        batch = new_ids[i:i + EMBED_BATCH]
+        db.add_texts(  # upserts by ID, embedding just this batch
+            texts=[docs_by_id[doc_id][0] for doc_id in batch],
+            metadatas=[docs_by_id[doc_id][1] for doc_id in batch],
+            ids=batch
+        )
+        print(f"  ↳ embedded {min(i + EMBED_BATCH, len(new_ids))}/{len(new_ids)}")
 
-# ---------- STEP 5: Flatten course_structure with category ----------
-if "course_structure" in course_data:
-    for section_title, units in course_data["course_structure"].items():
-        for unit in units:
-            unit_parts = [
-                f"Category: {section_title}",  # include category name in the searchable text
-                f"Unit Title: {unit.get('unit_title', 'N/A')}",
-                f"Unit Code: {unit.get('unit_code', 'N/A')}",
-                f"Credit Points: {unit.get('unit_credit_points', 'N/A')}",
-                f"Description: {clean_text(unit.get('unit_description', 'N/A'))}"
-            ]
-            # Add availability info
-            availability_info = []
-            for availability in unit.get("unit_availability", []):
-                if isinstance(availability, dict):
-                    location = availability.get("Location", "N/A")
-                    period = availability.get("Study period", "N/A")
-                    attendance = availability.get("Attendance options 1", "")
-                    availability_info.append(f"- {location} ({period}): {attendance}")
-            if availability_info:
-                unit_parts.append("Availability:\n" + "\n".join(availability_info))
+    if new_ids or removed_ids:
+        db.persist()
 
-            documents.append(Document(
-                page_content="\n".join(unit_parts),
-                metadata={
-                    "source": f"unit-{unit.get('unit_code', 'N/A')}",
-                    "title": course_title,
-                    "category": section_title  # this makes filtering by category possible
-                }
-            ))
+    print(f"✅ Vector DB at '{CHROMA_DIR}' up to date with {len(docs_by_id)} chunks in {time.perf_counter() - start:.2f}s")
+    print(embedding.cache.summary())
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Embed course JSON files into one Chroma collection")
+    parser.add_argument("inputs", nargs="*", default=[JSON_FILE], help="course JSON files, directories (e.g. course_pages/) or globs")
+    parser.add_argument("--workers", type=int, default=None, help="flattening processes (default: CPU count)")
+    parser.add_argument("--prune", action="store_true", help="also delete courses that are not in this run")
+    args = parser.parse_args(argv)
 
-# ---------- STEP 6: Create embeddings & store in Chroma ----------
-embedding = HuggingFaceEmbeddings(model_name=EMBED_MODEL)
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        parser.error("no course JSON files found")
 
-try:
-    db = Chroma(persist_directory=CHROMA_DIR, embedding_function=embedding, collection_name=COLLECTION_NAME)
-    db.delete_collection()
-    print(f"🧹 Cleared existing collection '{COLLECTION_NAME}'.")
-except Exception as e:
-    print(f"Collection '{COLLECTION_NAME}' does not exist or another error occurred: {e}. A new one will be created.")
+    start = time.perf_counter()
+    courses = flatten_all(paths, args.workers)
+    docs_by_id = {}
+    for path, meta, docs in courses:
+        for text, doc_meta in docs:
+            docs_by_id.setdefault(document_id(text, doc_meta), (text, doc_meta))  # exact duplicates collapse
+        print(f"📄 {meta['course_code']} {meta['level']} {meta['year'] or '(no year)'}: {len(docs)} chunks from {path}")
+    print(f"🧩 Flattened {len(courses)} courses in {time.perf_counter() - start:.2f}s")
 
-db = Chroma.from_documents(
-    documents=documents,
-    embedding=embedding,
-    persist_directory=CHROMA_DIR,
-    collection_name=COLLECTION_NAME
-)
-db.persist()
+    sync_collection(docs_by_id, {(meta["course_code"], meta["year"]) for _, meta, _ in courses}, args.prune)
 
-print(f"✅ Stored {len(documents)} chunks in vector DB at '{CHROMA_DIR}'")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from embedding_service import canonical_model_name
+
+# ---------- Settings ----------
+CACHE_DB = os.environ.get("EMBEDDING_CACHE_DB", "embedding_cache.sqlite")
+MEMORY_CAPACITY = 4096  # vectors kept in the in-process LRU
+
+def normalize_query(text):
+    # "What will I learn in KIT514?" and "what will i learn in kit514" share one entry
+    return re.sub(r"\s+", " ", text.lower()).strip(" ?!.")
+
+def cache_key(model_name, text, kind="text"):
+    # kind keeps normalised queries and exact chunk contents in separate namespaces
+    return hashlib.sha256(f"{canonical_model_name(model_name)}\x1f{kind}\x1f{text}".encode("utf-8")).hexdigest()
+
+# ---------- Two-level cache: bounded LRU in memory, SQLite on disk ----------
+class EmbeddingCache:
+    def __init__(self, path=CACHE_DB, capacity=MEMORY_CAPACITY):
+        self.capacity = capacity
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT, dim INTEGER, vector BLOB, created REAL)"
+        )
+
+    def _remember(self, key, vector):
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+
+    def get_many(self, keys):
+        found = {}
+        with self.lock:
+            missing = []
+            keys = list(dict.fromkeys(keys))
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[key] = self.memory[key]
+                    self.stats["memory_hits"] += 1
+                else:
+                    missing.append(key)
+
+            # SQLite caps bound parameters, so look keys up in slices
+            for i in range(0, len(missing), 500):
+                part = missing[i:i + 500]
+                rows = self.db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self.stats["disk_hits"] += 1
+            self.stats["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, model_name, items):
+        now = time.time()
+        with self.lock:
+            rows = []
+            for key, vector in items:
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, model_name, len(vector), vector.tobytes(), now))
+            self.db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+            self.db.commit()
+
+    def summary(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        rate = hits / total if total else 0.0
+        return (f"📈 Embedding cache: {hits}/{total} hits ({rate:.0%}) — "
+                f"{self.stats['memory_hits']} memory, {self.stats['disk_hits']} disk, {self.stats['misses']} misses")
+
+_shared_cache = None
+
+def shared_cache():
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = EmbeddingCache()
+    return _shared_cache
+
+# ---------- Lookup-then-encode wrapper ----------
+def cached_encode(cache, model_name, texts, keys, encode_missing):
+    found = cache.get_many(keys)
+    # Encode each missing text once, even if it appears several times in the batch
+    first_index = {}
+    for i, key in enumerate(keys):
+        if key not in found:
+            first_index.setdefault(key, i)
+    if first_index:
+        missing_keys = list(first_index)
+        vectors = np.asarray(encode_missing([texts[first_index[k]] for k in missing_keys]), dtype=np.float32)
+        cache.put_many(model_name, list(zip(missing_keys, vectors)))
+        found.update(zip(missing_keys, vectors))
+    return np.stack([found[key] for key in keys]) if keys else np.empty((0, 0), dtype=np.float32)
+
+class CachedEncoder:
+    # Drop-in for SentenceTransformer.encode. The model is only loaded on the first miss,
+    # so a run where every text is cached never pays the model load.
+    # normalize=True keys on normalised query text; False keys on the exact content (chunks).
+    def __init__(self, model_name, cache=None, normalize=True, encoder=None):
+        self.model_name = model_name
+        self.cache = cache or shared_cache()
+        self.normalize = normalize
+        self._encoder = encoder
+
+    @property
+    def encoder(self):
+        if self._encoder is None:
+            from embedding_client import get_encoder
+            self._encoder = get_encoder(self.model_name)
+        return self._encoder
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if self.normalize:
+            keys = [cache_key(self.model_name, normalize_query(t), "query") for t in texts]
+        else:
+            keys = [cache_key(self.model_name, t) for t in texts]
+        vectors = cached_encode(
+            self.cache, self.model_name, texts, keys,
+            lambda missing: self.encoder.encode(missing, batch_size=batch_size, **kwargs),
+        )
+        return vectors[0] if single else vectors
+
+class CachedEmbeddings:
+    # Same idea for the LangChain embedding objects used with Chroma
+    def __init__(self, model_name, cache=None, embeddings=None):
+        self.model_name = model_name
+        self.cache = cache or shared_cache()
+        self._embeddings = embeddings
+
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            from embedding_client import get_langchain_embeddings
+            self._embeddings = get_langchain_embeddings(self.model_name)
+        return self._embeddings
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        keys = [cache_key(self.model_name, t) for t in texts]
+        return cached_encode(self.cache, self.model_name, texts, keys, self.embeddings.embed_documents).tolist()
+
+    def embed_query(self, text):
+        keys = [cache_key(self.model_name, normalize_query(text), "query")]
+        vectors = cached_encode(self.cache, self.model_name, [text], keys, lambda t: [self.embeddings.embed_query(t[0])])
+        return vectors[0].tolist()
+
+    def embed_queries(self, texts):
+        # Many questions at once: cached under query keys, the misses encoded in one batch
+        texts = list(texts)
+        keys = [cache_key(self.model_name, normalize_query(t), "query") for t in texts]
+        return cached_encode(self.cache, self.model_name, texts, keys, self.embeddings.embed_documents)
@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import requests
+from embedding_service import HOST, PORT, DEFAULT_MODEL, canonical_model_name
+from retrieval import normalize_rows
+
+SERVICE_URL = os.environ.get("EMBEDDING_SERVICE_URL", f"http://{HOST}:{PORT}")
+IGNORED_OPTIONS = {"show_progress_bar", "device"}   # SentenceTransformer.encode options that don't change the vectors
+
+# ---------- Thin client: same encode() shape rules as SentenceTransformer ----------
+class ServiceEncoder:
+    def __init__(self, model_name=DEFAULT_MODEL, url=SERVICE_URL, timeout=60):
+        self.model_name = canonical_model_name(model_name)
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()  # keep-alive between calls
+
+    def encode(self, sentences, batch_size=None, normalize_embeddings=False, convert_to_numpy=True, **kwargs):
+        # The service always returns raw float32 rows; options that change the output are applied here
+        # (normalising on the client keeps the service's micro-batches shared between callers),
+        # anything else is refused rather than silently dropped
+        unsupported = sorted(set(kwargs) - IGNORED_OPTIONS)
+        if unsupported or not convert_to_numpy:
+            raise TypeError(f"ServiceEncoder.encode does not support {', '.join(unsupported) or 'convert_to_numpy=False'}")
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        res = self.session.post(
+            f"{self.url}/encode",
+            json={"model": self.model_name, "texts": texts},
+            timeout=self.timeout,
+        )
+        res.raise_for_status()
+        rows, dim = int(res.headers["X-Rows"]), int(res.headers["X-Dim"])
+        vectors = np.frombuffer(res.content, dtype=np.float32).reshape(rows, dim)
+        if normalize_embeddings:
+            vectors = normalize_rows(vectors)
+        return vectors[0] if single else vectors
+
+def service_available(url=SERVICE_URL):
+    try:
+        return requests.get(f"{url.rstrip('/')}/health", timeout=0.3).ok
+    except requests.RequestException:
+        return False
+
+def get_encoder(model_name=DEFAULT_MODEL, url=SERVICE_URL):
+    # Use the warm model in embedding_service.py when it is running, otherwise load it here
+    if service_available(url):
+        print(f"⚡ Using embedding service at {url}")
+        return ServiceEncoder(model_name, url)
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(canonical_model_name(model_name))
+
+# ---------- LangChain adapter for embed_chunks.py / query_llm.py ----------
+class EncoderEmbeddings:
+    def __init__(self, encoder):
+        self.encoder = encoder
+
+    def embed_documents(self, texts):
+        return np.asarray(self.encoder.encode(list(texts))).tolist()
+
+    def embed_query(self, text):
+        return np.asarray(self.encoder.encode([text]))[0].tolist()
+
+def get_langchain_embeddings(model_name=DEFAULT_MODEL, url=SERVICE_URL):
+    if service_available(url):
+        print(f"⚡ Using embedding service at {url}")
+        return EncoderEmbeddings(ServiceEncoder(model_name, url))
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name)
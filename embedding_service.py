@@ -0,0 +1,158 @@
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# ---------- Settings ----------
+HOST = "127.0.0.1"
+PORT = 8765
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+BATCH_WINDOW_MS = 5      # how long to wait for more requests before encoding
+MAX_BATCH = 256          # texts per model.encode call
+
+def canonical_model_name(name):
+    # "sentence-transformers/all-MiniLM-L6-v2" and "all-MiniLM-L6-v2" are the same model
+    return name.split("/", 1)[1] if name.startswith("sentence-transformers/") else name
+
+# ---------- Micro-batching: merge concurrent requests into one encode call ----------
+class MicroBatcher:
+    def __init__(self, encode_fn, window_ms=BATCH_WINDOW_MS, max_batch=MAX_BATCH):
+        self.encode_fn = encode_fn
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self.stats = {"requests": 0, "batches": 0, "texts": 0}
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, texts):
+        future = Future()
+        self.queue.put((texts, future))
+        return future
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.window
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                vectors = np.asarray(self.encode_fn(texts, batch_size=self.max_batch), dtype=np.float32)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            # Hand each caller back its own slice of the batch
+            start = 0
+            for item_texts, future in batch:
+                future.set_result(vectors[start:start + len(item_texts)])
+                start += len(item_texts)
+
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["texts"] += len(texts)
+
+# ---------- Model registry (loaded once, kept warm) ----------
+class ModelPool:
+    def __init__(self, preload=()):
+        self.batchers = {}
+        self.lock = threading.Lock()
+        for name in preload:
+            self.get(name)
+
+    def get(self, name):
+        name = canonical_model_name(name)
+        with self.lock:
+            if name not in self.batchers:
+                from sentence_transformers import SentenceTransformer
+                print(f"🧠 Loading {name}...")
+                model = SentenceTransformer(name)
+                self.batchers[name] = MicroBatcher(model.encode)
+            return self.batchers[name]
+
+# ---------- HTTP API ----------
+# GET  /health                                   -> {"models": [...], "stats": {...}}
+# POST /encode {"model": "...", "texts": [...]}  -> raw float32 bytes, shape in X-Rows / X-Dim headers
+class EmbeddingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive for the client's connection pool
+    pool = None
+
+    def log_message(self, format, *args):
+        pass  # one line per request is far too noisy under load
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self.send_json(404, {"error": "not found"})
+        stats = {name: batcher.stats for name, batcher in self.pool.batchers.items()}
+        self.send_json(200, {"models": list(self.pool.batchers), "stats": stats})
+
+    def do_POST(self):
+        if self.path != "/encode":
+            return self.send_json(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            texts = request["texts"]
+            batcher = self.pool.get(request.get("model", DEFAULT_MODEL))
+            vectors = batcher.submit(texts).result()
+        except Exception as e:
+            return self.send_json(500, {"error": str(e)})
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        rows, dim = vectors.shape if vectors.ndim == 2 else (0, 0)
+        self.send_body(200, vectors.tobytes(), "application/octet-stream", {"X-Rows": rows, "X-Dim": dim})
+
+def serve(host=HOST, port=PORT, preload=(DEFAULT_MODEL,)):
+    EmbeddingHandler.pool = ModelPool(preload)
+    server = ThreadingHTTPServer((host, port), EmbeddingHandler)
+    server.daemon_threads = True
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep sentence-transformer models warm behind a local HTTP API")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--model", action="append", help="model(s) to preload (default: all-MiniLM-L6-v2)")
+    args = parser.parse_args(argv)
+
+    server = serve(args.host, args.port, args.model or [DEFAULT_MODEL])
+    print(f"✅ Embedding service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+        server.server_close()
+
+if __name__ == "__main__":
+    sys.exit(main())
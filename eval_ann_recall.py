@@ -0,0 +1,77 @@
+import sys
+import time
+import argparse
+from types import SimpleNamespace
+import numpy as np
+from chunk_store import ChunkStore, STORE_DIR
+from retrieval import DenseRetriever
+from ann_index import HnswIndex, AnnRetriever
+
+# ---------- Settings ----------
+KS = [1, 3, 10]
+
+def synthetic_store(n, dim=384, seed=0):
+    # Clustered vectors look more like real embeddings than pure noise
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(1, n // 50), dim), dtype=np.float32)
+    embeddings = centres[rng.integers(0, len(centres), n)] + 0.3 * rng.standard_normal((n, dim), dtype=np.float32)
+    return SimpleNamespace(
+        store_dir=None,
+        embeddings=embeddings,
+        chunk_ids=np.arange(1, n + 1, dtype=np.int64),
+        units=np.array([f"KIT{500 + i % 300}" for i in range(n)]),
+        titles=np.array(["Unit Description"] * n),
+    )
+
+def subset(store, n):
+    return SimpleNamespace(**{**vars(store), "embeddings": store.embeddings[:n], "chunk_ids": store.chunk_ids[:n]})
+
+def recall_at(exact, approx, k):
+    hits = [len({i for i, _ in e[:k]} & {i for i, _ in a[:k]}) / max(1, min(k, len(e))) for e, a in zip(exact, approx)]
+    return float(np.mean(hits))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recall@k of the HNSW index against exact search")
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    parser.add_argument("--synthetic", type=int, help="evaluate on N synthetic vectors instead of the chunk store")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--incremental", type=float, default=0.9,
+                        help="build on this fraction first, then insert the rest incrementally")
+    args = parser.parse_args(argv)
+
+    store = synthetic_store(args.synthetic) if args.synthetic else ChunkStore(args.store_dir)
+    n = len(store.embeddings)
+
+    # Build on a prefix, then insert the remainder the same way pdf2chunksss does after adding PDFs
+    start = time.perf_counter()
+    index = HnswIndex(store.embeddings.shape[1], max_elements=max(1024, n))
+    index.sync(subset(store, int(n * args.incremental)))
+    initial_sec = time.perf_counter() - start
+    start = time.perf_counter()
+    added, _ = index.sync(store)
+    incremental_sec = time.perf_counter() - start
+
+    # Queries: perturbed copies of random chunks
+    rng = np.random.default_rng(1)
+    rows = rng.integers(0, n, args.queries)
+    queries = store.embeddings[rows] + 0.05 * rng.standard_normal((args.queries, store.embeddings.shape[1]), dtype=np.float32)
+
+    exact = DenseRetriever(store.embeddings)
+    ann = AnnRetriever(index, store)
+    k_max = max(KS)
+
+    start = time.perf_counter()
+    exact_results = exact.search_batch(queries, k=k_max)
+    exact_ms = (time.perf_counter() - start) * 1000 / args.queries
+    start = time.perf_counter()
+    ann_results = ann.search_batch(queries, k=k_max)
+    ann_ms = (time.perf_counter() - start) * 1000 / args.queries
+
+    print(f"📊 {n} vectors, {args.queries} queries")
+    print(f"   build: {initial_sec:.2f}s for {n - added}, incremental insert of {added}: {incremental_sec:.2f}s")
+    print(f"   latency/query: exact {exact_ms:.3f} ms, hnsw {ann_ms:.3f} ms")
+    for k in KS:
+        print(f"   recall@{k}: {recall_at(exact_results, ann_results, k):.4f}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+import os
+import re
+import sys
+import argparse
+from collections import Counter
+import numpy as np
+from retrieval import top_k_indices, units_in_query
+
+# ---------- Settings ----------
+BM25_FILE = "bm25.npz"      # saved next to the chunk store / inside the Chroma directory
+K1 = 1.2
+B = 0.75
+RRF_K = 60                  # standard reciprocal-rank-fusion constant
+CANDIDATES = 20             # results taken from each retriever before fusion
+
+# Unit codes stay one token ("kit514"); everything else splits on non-alphanumerics
+TOKEN_PATTERN = re.compile(r"[a-z]{3}\d{3}|[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "can", "do", "does", "for", "from", "how", "i", "in", "is",
+    "it", "me", "my", "of", "on", "or", "the", "there", "this", "to", "what", "when", "where", "which",
+    "who", "will", "with", "you", "your",
+}
+
+def tokenize(text):
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+# ---------- BM25 over an inverted index (postings in CSR arrays) ----------
+class BM25Index:
+    def __init__(self, vocab, idf, ptr, post_docs, post_tf, norm, extra=None):
+        self.vocab = vocab              # term -> term id
+        self.idf = idf
+        self.ptr = ptr                  # postings of term t are post_docs[ptr[t]:ptr[t + 1]]
+        self.post_docs = post_docs
+        self.post_tf = post_tf
+        self.norm = norm                # k1 * (1 - b + b * len / avg_len) per document
+        self.extra = extra or {}        # caller columns saved alongside (keys, units, ...)
+
+    @classmethod
+    def build(cls, texts, extra=None, k1=K1, b=B):
+        postings = {}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[doc] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc, tf))
+
+        terms = sorted(postings)
+        ptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(postings[t]) for t in terms], out=ptr[1:])
+        post_docs = np.fromiter((d for t in terms for d, _ in postings[t]), dtype=np.int32, count=ptr[-1])
+        post_tf = np.fromiter((tf for t in terms for _, tf in postings[t]), dtype=np.float32, count=ptr[-1])
+        df = np.diff(ptr).astype(np.float32)
+        idf = np.log(1 + (len(texts) - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg_len = lengths.mean() if len(texts) else 1.0
+        norm = (k1 * (1 - b + b * lengths / max(avg_len, 1e-6))).astype(np.float32)
+        return cls({t: i for i, t in enumerate(terms)}, idf, ptr, post_docs, post_tf, norm, extra)
+
+    def __len__(self):
+        return len(self.norm)
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                terms=np.array(sorted(self.vocab, key=self.vocab.get), dtype=str),
+                idf=self.idf, ptr=self.ptr, post_docs=self.post_docs, post_tf=self.post_tf, norm=self.norm,
+                **{f"extra_{k}": v for k, v in self.extra.items()},
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            extra = {k[len("extra_"):]: data[k] for k in data.files if k.startswith("extra_")}
+            vocab = {t: i for i, t in enumerate(data["terms"].tolist())}
+            return cls(vocab, data["idf"], data["ptr"], data["post_docs"], data["post_tf"], data["norm"], extra)
+
+    def scores(self, query):
+        scores = np.zeros(len(self.norm), dtype=np.float32)
+        for term in set(tokenize(query)):
+            t = self.vocab.get(term)
+            if t is None:
+                continue
+            start, end = self.ptr[t], self.ptr[t + 1]
+            docs, tf = self.post_docs[start:end], self.post_tf[start:end]
+            # Each document appears once per posting list, so fancy-index += is safe
+            scores[docs] += self.idf[t] * tf * (K1 + 1) / (tf + self.norm[docs])
+        return scores
+
+    def search(self, query, k=CANDIDATES, mask=None):
+        scores = self.scores(query)
+        if mask is not None:
+            scores[~mask] = 0.0
+        top = top_k_indices(scores, k)
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+# ---------- Reciprocal-rank fusion ----------
+def rrf(rankings, k=RRF_K):
+    # rankings: lists of keys, best first. Keys found by several retrievers float to the top.
+    fused = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda kv: -kv[1])
+
+# ---------- Lazy on-disk BM25 that rebuilds itself when the corpus changes ----------
+class LazyBM25:
+    # fingerprint: array identifying the corpus (chunk IDs / Chroma IDs); build_texts: called only on rebuild;
+    # required: extra columns a saved index must have to be reused (older files are rebuilt)
+    def __init__(self, path, fingerprint, build_texts, extra=None, required=()):
+        self.path = path
+        self.fingerprint = np.asarray(fingerprint)
+        self.build_texts = build_texts
+        self.extra = extra
+        self.required = required
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            if os.path.exists(self.path):
+                index = BM25Index.load(self.path)
+                if np.array_equal(index.extra.get("fingerprint"), self.fingerprint) and all(c in index.extra for c in self.required):
+                    self._index = index
+                    return index
+            print(f"🔨 Building BM25 index at {self.path}")
+            extra = dict(self.extra() if callable(self.extra) else self.extra or {})
+            extra["fingerprint"] = self.fingerprint
+            self._index = BM25Index.build(self.build_texts(), extra)
+            self._index.save(self.path)
+        return self._index
+
+# ---------- Hybrid retriever over the unit-outline chunk store ----------
+class HybridChunkRetriever:
+    # Same search() shape as DenseRetriever / AnnRetriever, plus the query text for BM25
+    def __init__(self, dense, store):
+        self.dense = dense
+        self.store = store
+        self.bm25 = LazyBM25(
+            os.path.join(store.store_dir, BM25_FILE),
+            store.chunk_ids,
+            lambda: [f"{c['unit']} {c['chunk_title']} {c['text']}" for c in (store[i] for i in range(len(store)))],
+        )
+
+    def units_in_query(self, query):
+        return units_in_query(query, self.store.units)
+
+    def search(self, query, query_vec, k=3, units=None, candidates=CANDIDATES):
+        # A unit code in the question routes to an exact lookup: only that unit's chunks compete
+        if units is None:
+            units = self.units_in_query(query)
+        mask = np.isin(self.store.units, units) if units else None
+
+        dense_hits = self.dense.search(query_vec, k=candidates, units=units)
+        bm25_hits = self.bm25.index.search(query, k=candidates, mask=mask)
+        fused = rrf([[i for i, _ in dense_hits], [i for i, _ in bm25_hits]])
+        return fused[:k]
+
+def load_hybrid_retriever(store, backend="auto"):
+    from retrieval import load_retriever
+    return HybridChunkRetriever(load_retriever(store, backend), store)
+
+# ---------- Hybrid retriever over the Chroma course collection ----------
+def column_mask(columns, filters):
+    # {"course_code": "K7I", "unit_code": [...]} -> boolean mask over metadata columns (None = no filter)
+    mask = None
+    for key, value in (filters or {}).items():
+        values = value if isinstance(value, list) else [value]
+        column = np.isin(columns[key], values)
+        mask = column if mask is None else mask & column
+    return mask
+
+def merge_hits(exact, fused, k):
+    # (key, hit) pairs: exact unit hits keep the top slots, fused hits fill the rest without repeats
+    seen, merged = set(), []
+    for key, hit in exact + fused:
+        if key not in seen and len(merged) < k:
+            seen.add(key)
+            merged.append(hit)
+    return merged
+
+class HybridCourseRetriever:
+    # Hits are merged on content keys (course_catalog.document_id), never on Chroma IDs: vector search
+    # results carry no IDs, and older collections are keyed by random UUIDs. Identical chunks stored
+    # twice share a key, so fusion counts them once.
+    def __init__(self, db, chroma_dir):
+        from course_catalog import document_id
+        self.db = db
+        self.document_id = document_id
+        stored_ids = np.array(sorted(db.get(include=[])["ids"]), dtype=str)
+        self.bm25 = LazyBM25(os.path.join(chroma_dir, BM25_FILE), stored_ids, self._texts, self._columns,
+                             required=("content_key",))
+        self._corpus = None
+        self._stored_id = None
+
+    def _load_corpus(self):
+        if self._corpus is None:
+            data = self.db.get(include=["documents", "metadatas"])
+            order = np.argsort(np.array(data["ids"], dtype=str))  # same order as the fingerprint
+            self._corpus = [(data["ids"][i], data["documents"][i], data["metadatas"][i] or {}) for i in order]
+        return self._corpus
+
+    def _texts(self):
+        return [text for _, text, _ in self._load_corpus()]
+
+    def _columns(self):
+        corpus = self._load_corpus()
+        return {
+            "ids": np.array([doc_id for doc_id, _, _ in corpus], dtype=str),
+            "content_key": np.array([self.document_id(text, m) for _, text, m in corpus], dtype=str),
+            "course_code": np.array([m.get("course_code", "") for _, _, m in corpus], dtype=str),
+            "category": np.array([m.get("category", "") for _, _, m in corpus], dtype=str),
+            "unit_code": np.array([m.get("unit_code", "") for _, _, m in corpus], dtype=str),
+        }
+
+    def bm25_mask(self, filters):
+        return column_mask(self.bm25.index.extra, filters)
+
+    @property
+    def stored_id(self):
+        # content key -> one stored Chroma ID (the first of any duplicates)
+        if self._stored_id is None:
+            extra = self.bm25.index.extra
+            self._stored_id = {}
+            for key, doc_id in zip(extra["content_key"].tolist(), extra["ids"].tolist()):
+                self._stored_id.setdefault(key, doc_id)
+        return self._stored_id
+
+    def search(self, query, query_vec, k=4, filters=None, candidates=CANDIDATES):
+        # A unit code gives its unit documents the top slots (exact metadata lookup, at most half of k);
+        # the rest of the question still goes through BM25 + dense, so "How much does KIT514 cost"
+        # can reach the fee documents too
+        filters = dict(filters or {})
+        units = filters.pop("unit_code", None)
+        exact = self._unit_hits(query, {**filters, "unit_code": units}, max(1, k // 2)) if units else []
+        return [self._document(text, meta) for text, meta in merge_hits(exact, self._fused_hits(query, query_vec, k, filters, candidates), k)]
+
+    def _unit_hits(self, query, filters, k):
+        from course_catalog import chroma_where
+        exact = self.db.get(where=chroma_where(filters), include=["documents", "metadatas"])
+        scores = dict(zip(self.bm25.index.extra["ids"].tolist(), self.bm25.index.scores(query).tolist()))
+        ranked = sorted(zip(exact["ids"], exact["documents"], exact["metadatas"]), key=lambda d: -scores.get(d[0], 0.0))
+        hits = {}
+        for _, text, meta in ranked:
+            hits.setdefault(self.document_id(text, meta or {}), (text, meta))
+        return list(hits.items())[:k]
+
+    def _fused_hits(self, query, query_vec, k, filters, candidates):
+        from course_catalog import chroma_where
+        where = chroma_where(filters)
+        dense_docs = self.db.similarity_search_by_vector_with_relevance_scores(query_vec, k=candidates, filter=where) if where \
+            else self.db.similarity_search_by_vector_with_relevance_scores(query_vec, k=candidates)
+        by_key = {}
+        for doc, _ in dense_docs:
+            by_key.setdefault(self.document_id(doc.page_content, doc.metadata or {}), (doc.page_content, doc.metadata))
+        keys = self.bm25.index.extra["content_key"]
+        bm25_keys = list(dict.fromkeys(str(keys[i]) for i, _ in self.bm25.index.search(query, k=candidates, mask=self.bm25_mask(filters))))
+
+        fused = [key for key, _ in rrf([list(by_key), bm25_keys])[:k]]
+        missing = [self.stored_id[key] for key in fused if key not in by_key]
+        if missing:
+            # BM25-only hits: fetch their text and metadata from Chroma in one call
+            extra = self.db.get(ids=missing, include=["documents", "metadatas"])
+            for text, meta in zip(extra["documents"], extra["metadatas"]):
+                by_key[self.document_id(text, meta or {})] = (text, meta)
+        return [(key, by_key[key]) for key in fused if key in by_key]
+
+    def search_scope(self, scope, query, query_vec, k=4, filters=None, candidates=CANDIDATES):
+        # Same search, but only over a pre-built subset (see student_scope.py): dense scores come from
+        # the subset's own embeddings, BM25 scores are read at the subset's rows. Empty when the
+        # filters point outside the subset, so the caller can fall back to search().
+        index = self.bm25.index
+        if scope.bm25_rows is None:
+            scope.bm25_rows = np.searchsorted(index.extra["ids"], scope.ids)
+        filters = dict(filters or {})
+        units = filters.pop("unit_code", None)
+        mask = column_mask(scope.columns, filters)
+        if mask is not None and not mask.any():
+            return []
+
+        dense_scores = scope.dense.scores(query_vec)[0]
+        bm25_scores = index.scores(query)[scope.bm25_rows]
+        exact = []
+        if units:
+            unit_rows = np.flatnonzero(column_mask(scope.columns, {**filters, "unit_code": units}))
+            if not len(unit_rows):
+                return []
+            ranked = unit_rows[np.argsort(-bm25_scores[unit_rows], kind="stable")]
+            exact = [(int(i), int(i)) for i in ranked[:max(1, k // 2)]]
+        if mask is not None:
+            dense_scores[~mask] = -np.inf
+            bm25_scores[~mask] = 0.0
+        dense_rows = [int(i) for i in top_k_indices(dense_scores, candidates) if np.isfinite(dense_scores[i])]
+        bm25_rows = [int(i) for i in top_k_indices(bm25_scores, candidates) if bm25_scores[i] > 0]
+        fused = [(i, i) for i, _ in rrf([dense_rows, bm25_rows])[:k]]
+        return [self._document(scope.texts[i], scope.metadatas[i]) for i in merge_hits(exact, fused, k)]
+
+    @staticmethod
+    def _document(text, meta):
+        from langchain_core.documents import Document
+        return Document(page_content=text, metadata=meta or {})
+
+# ---------- CLI: (re)build the chunk-store BM25 index ahead of time ----------
+def main(argv=None):
+    from chunk_store import ChunkStore, STORE_DIR
+    parser = argparse.ArgumentParser(description="Build the BM25 index for the unit-outline chunk store")
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    parser.add_argument("--query", help="print the top BM25 chunks for a test query")
+    args = parser.parse_args(argv)
+
+    store = ChunkStore(args.store_dir)
+    retriever = HybridChunkRetriever(None, store)
+    index = retriever.bm25.index
+    print(f"✅ BM25 over {len(index)} chunks, {len(index.vocab)} terms")
+    if args.query:
+        for i, score in index.search(args.query, k=5):
+            chunk = store[i]
+            print(f"  {score:6.2f}  {chunk['unit']} · {chunk['chunk_title']}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+import os
+import sys
+import time
+import random
+import bisect
+import itertools
+import threading
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from requests.adapters import HTTPAdapter
+from llm_stream import sse_deltas, stream_answer, finish_stats
+
+# ---------- Settings (credentials come from the environment, never from the scripts) ----------
+GROQ_API_BASE = os.environ.get("GROQ_API_BASE", "https://api.groq.com/openai/v1")
+CONNECT_TIMEOUT = 5       # seconds to open the TCP/TLS connection
+READ_TIMEOUT = 60         # seconds of silence allowed between bytes (also between streamed tokens)
+MAX_RETRIES = 4           # retries after the first attempt on 429 / 5xx / connection errors
+BACKOFF_BASE = 0.5        # seconds; doubles per retry, full jitter
+BACKOFF_CAP = 20
+HEDGE_MIN_SAMPLES = 20    # hedging waits until the model's p95 time-to-first-token is known
+HEDGE_MIN_SEC = 0.5
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class LLMError(RuntimeError):
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+def api_key_from_env():
+    key = os.environ.get("GROQ_API_KEY")
+    if not key:
+        raise LLMError("GROQ_API_KEY is not set; export your Groq key (https://console.groq.com/keys)")
+    return key
+
+def parse_retry_after(value):
+    # Retry-After is either delta-seconds or an HTTP date
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, retry_after=None):
+    # Full jitter, but never earlier than the server asked for
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+# ---------- Latency histogram (log-spaced buckets, 1 ms .. ~5 min) ----------
+BUCKET_BOUNDS_MS = [round(10 ** (i / 10), 1) for i in range(0, 55)]
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, ms):
+        with self.lock:
+            self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+            self.total += 1
+            self.sum_ms += ms
+
+    def percentile(self, p):
+        # Upper bound of the bucket holding the p-th percentile
+        with self.lock:
+            if not self.total:
+                return None
+            rank = p / 100 * self.total
+            seen = 0
+            for i, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    return BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else float("inf")
+        return None
+
+    def summary(self):
+        if not self.total:
+            return "no samples"
+        return (f"n={self.total} mean={self.sum_ms / self.total:.0f} ms "
+                f"p50≤{self.percentile(50)} p95≤{self.percentile(95)} p99≤{self.percentile(99)} ms")
+
+# ---------- Shared Groq / OpenAI-compatible chat client ----------
+class LLMClient:
+    def __init__(self, base_url=None, api_key=None, pool_size=16, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 max_retries=MAX_RETRIES, hedge=True):
+        self.base_url = (base_url or GROQ_API_BASE).rstrip("/")
+        self.api_key = api_key or api_key_from_env()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.hedge = hedge and os.environ.get("LLM_HEDGE", "1") != "0"
+        self.session = requests.Session()  # keep-alive connection pool shared by every call
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"})
+        self.pool = ThreadPoolExecutor(max_workers=pool_size * 2)  # primary + hedge per request
+        self.histograms = {}
+        self.counters = {"requests": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "errors": 0}
+        self.lock = threading.Lock()
+
+    def histogram(self, model, metric):
+        with self.lock:
+            return self.histograms.setdefault((model, metric), LatencyHistogram())
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    # ----- one HTTP attempt -----
+    def _attempt(self, payload):
+        started = time.perf_counter()
+        response = self.session.post(f"{self.base_url}/chat/completions", json=payload,
+                                     stream=payload.get("stream", False), timeout=self.timeout)
+        if response.status_code != 200:
+            body = response.text[:300]
+            response.close()
+            raise LLMError(f"HTTP {response.status_code} from {self.base_url}: {body}", response.status_code,
+                           parse_retry_after(response.headers.get("Retry-After")))
+        if not payload.get("stream"):
+            return response, response.json()
+        # Pull the first token here so hedging covers time-to-first-token, not just the headers
+        usage = {}
+        deltas = sse_deltas(response, usage)
+        first = next(deltas, None)
+        # Per-attempt first-token latency (no retry sleeps) is what the hedge threshold is based on
+        self.histogram(payload["model"], "attempt_ttft_ms").record((time.perf_counter() - started) * 1000)
+        return response, (itertools.chain([first] if first is not None else [], deltas), usage)
+
+    def hedge_delay(self, model):
+        if not self.hedge:
+            return None
+        hist = self.histogram(model, "attempt_ttft_ms")
+        if hist.total < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_SEC, hist.percentile(95) / 1000)
+
+    def _hedged(self, payload):
+        # Start a second identical request if the first is slower than this model's p95
+        primary = self.pool.submit(self._attempt, payload)
+        delay = self.hedge_delay(payload["model"])
+        if delay is None or wait([primary], timeout=delay).done:
+            return primary.result()
+
+        self.count("hedges")
+        backup = self.pool.submit(self._attempt, payload)
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        self.count("hedge_wins")
+                    # The loser keeps its connection until it answers; close it then
+                    for loser in pending:
+                        loser.add_done_callback(lambda f: f.exception() is None and f.result()[0].close())
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _with_retries(self, payload):
+        self.count("requests")
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._hedged(payload)
+            except LLMError as e:
+                if e.status not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    self.count("errors")
+                    raise
+                delay = backoff_delay(attempt, e.retry_after)
+                print(f"⚠️ {payload['model']}: HTTP {e.status}, retrying in {delay:.1f}s")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    self.count("errors")
+                    raise LLMError(f"{type(e).__name__}: {e}") from e
+                delay = backoff_delay(attempt)
+                print(f"⚠️ {payload['model']}: {type(e).__name__}, retrying in {delay:.1f}s")
+            self.count("retries")
+            time.sleep(delay)
+
+    # ----- public API -----
+    def chat(self, model, messages, **params):
+        started = time.perf_counter()
+        _, body = self._with_retries({"model": model, "messages": messages, **params})
+        self.histogram(model, "total_ms").record((time.perf_counter() - started) * 1000)
+        return body["choices"][0]["message"]["content"]
+
+    def stream_chat(self, model, messages, out=sys.stdout, **params):
+        # Returns (answer, stats) like llm_stream.stream_answer; tokens are printed to out as they arrive
+        started = time.perf_counter()
+        response, (deltas, usage) = self._with_retries({"model": model, "messages": messages, "stream": True, **params})
+        with response:
+            answer, stats = stream_answer(deltas, out=out, started=started)
+        stats = finish_stats(stats, usage)
+        if stats["ttft_ms"] is not None:
+            self.histogram(model, "ttft_ms").record(stats["ttft_ms"])
+        self.histogram(model, "total_ms").record(stats["total_ms"])
+        return answer, stats
+
+    def summary(self):
+        lines = [f"📡 LLM client: {self.counters['requests']} requests, {self.counters['retries']} retries, "
+                 f"{self.counters['hedges']} hedged ({self.counters['hedge_wins']} won), {self.counters['errors']} failed"]
+        for (model, metric), hist in sorted(self.histograms.items()):
+            if hist.total:
+                lines.append(f"   {model} {metric}: {hist.summary()}")
+        return "\n".join(lines)
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+        self.session.close()
+
+_shared_client = None
+
+def shared_client():
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = LLMClient()
+    return _shared_client
@@ -0,0 +1,135 @@
+import re
+import sys
+import json
+import time
+
+# Conversational filler the 70B model likes to open with (was a regex on the full answer in query_llm.py)
+FILLER_PHRASES = [
+    "Based on the context provided, here is the answer to your question:",
+]
+
+# ---------- Server-sent events (OpenAI-compatible chat completion stream) ----------
+def iter_sse_events(lines):
+    # Yields the decoded JSON payload of each "data:" event until "data: [DONE]"
+    data = []
+    for raw in lines:
+        line = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+        line = line.rstrip("\r\n")
+        if not line:
+            # A blank line ends one event
+            if data:
+                payload = "\n".join(data)
+                data = []
+                if payload.strip() == "[DONE]":
+                    return
+                yield json.loads(payload)
+            continue
+        if line.startswith(":"):
+            continue  # comment / keep-alive
+        if line.startswith("data:"):
+            data.append(line[5:].lstrip(" "))
+    if data and "\n".join(data).strip() != "[DONE]":
+        yield json.loads("\n".join(data))
+
+def sse_deltas(response, usage=None):
+    # Text deltas from a requests response opened with stream=True
+    for event in iter_sse_events(response.iter_lines()):
+        if usage is not None:
+            # OpenAI puts usage on the last chunk; Groq puts it under x_groq
+            found = event.get("usage") or (event.get("x_groq") or {}).get("usage")
+            if found:
+                usage.update(found)
+        for choice in event.get("choices", []):
+            text = (choice.get("delta") or {}).get("content")
+            if text:
+                yield text
+
+# ---------- Streaming-safe version of re.sub(filler, "", answer).strip() ----------
+class FillerFilter:
+    def __init__(self, phrases=FILLER_PHRASES):
+        self.phrases = phrases
+        self.pattern = re.compile("|".join(re.escape(p) + r"\n+" for p in phrases))
+        self.buffer = ""
+        self.started = False
+
+    def _hold_from(self):
+        # Earliest index from which the buffer could still become (part of) a filler match
+        buf = self.buffer
+        hold = len(buf.rstrip())  # trailing whitespace waits: the final answer is strip()ped
+        body = buf.rstrip("\n")
+        for phrase in self.phrases:
+            if body != buf and body.endswith(phrase):
+                hold = min(hold, len(body) - len(phrase))  # "phrase\n\n" may still grow
+            for k in range(min(len(phrase), len(buf)), 0, -1):
+                if buf.endswith(phrase[:k]):
+                    hold = min(hold, len(buf) - k)
+                    break
+        # Whitespace right before held text waits too: if that text turns out to be trailing filler,
+        # the whitespace becomes trailing and strip() would have removed it
+        return len(buf[:hold].rstrip())
+
+    def _emit(self, text):
+        if not self.started:
+            text = text.lstrip()
+            self.started = bool(text)
+        return text
+
+    def feed(self, text):
+        self.buffer += text
+        # Matches followed by a non-newline character are final and can be dropped
+        for match in reversed(list(self.pattern.finditer(self.buffer))):
+            if match.end() < len(self.buffer):
+                self.buffer = self.buffer[:match.start()] + self.buffer[match.end():]
+        hold = self._hold_from()
+        out, self.buffer = self.buffer[:hold], self.buffer[hold:]
+        return self._emit(out)
+
+    def finish(self):
+        out = self.pattern.sub("", self.buffer).rstrip()
+        self.buffer = ""
+        return self._emit(out)
+
+# ---------- Print tokens as they arrive and time the stream ----------
+def stream_answer(deltas, out=sys.stdout, started=None):
+    # Returns (answer, stats). started: time the request was sent (defaults to now); out=None prints nothing
+    started = started or time.perf_counter()
+    first_token = None
+    chunks = 0
+    answer = []
+    text_filter = FillerFilter()
+
+    for delta in deltas:
+        if first_token is None:
+            first_token = time.perf_counter()
+        chunks += 1
+        text = text_filter.feed(delta)
+        if text:
+            answer.append(text)
+            if out is not None:
+                out.write(text)
+                out.flush()
+    tail = text_filter.finish()
+    if tail:
+        answer.append(tail)
+    if out is not None:
+        out.write(tail + "\n")
+
+    finished = time.perf_counter()
+    stats = {
+        "ttft_ms": round((first_token - started) * 1000, 1) if first_token else None,
+        "total_ms": round((finished - started) * 1000, 1),
+        "chunks": chunks,
+    }
+    return "".join(answer), stats
+
+def finish_stats(stats, usage):
+    # Prefer the server's token count; fall back to the number of streamed chunks
+    tokens = usage.get("completion_tokens") or stats["chunks"]
+    generation_sec = (stats["total_ms"] - (stats["ttft_ms"] or 0)) / 1000
+    stats["completion_tokens"] = tokens
+    stats["tokens_per_sec"] = round(tokens / generation_sec, 1) if generation_sec > 0 else None
+    return stats
+
+def format_stats(stats):
+    return (f"⏱️ TTFT {stats['ttft_ms']} ms · {stats.get('tokens_per_sec')} tok/s · "
+            f"{stats.get('completion_tokens')} tokens · total {stats['total_ms']} ms")
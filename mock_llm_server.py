@@ -0,0 +1,133 @@
+import sys
+import json
+import time
+import random
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ---------- Settings ----------
+HOST = "127.0.0.1"
+PORT = 8767
+DEFAULT_ANSWER = (
+    "Based on the context provided, here is the answer to your question:\n\n"
+    "KIT514 introduces the design and analysis of algorithms, covering sorting, searching, "
+    "graph traversal and dynamic programming, with weekly tutorials and a final exam."
+)
+
+def split_tokens(text):
+    # Roughly one token per word, keeping the whitespace so the stream re-joins exactly
+    tokens, current = [], ""
+    for ch in text:
+        if ch.isspace() and current and not current[-1].isspace():
+            tokens.append(current)
+            current = ""
+        current += ch
+    if current:
+        tokens.append(current)
+    return tokens
+
+# ---------- Fake OpenAI-compatible /chat/completions (stream and non-stream) ----------
+# Stands in for Groq so streaming, TTFT and the query scripts can be exercised offline:
+#   GROQ_API_BASE=http://127.0.0.1:8767/openai/v1 python query_llm.py
+class MockChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    answer = DEFAULT_ANSWER
+    ttft_sec = 0.2
+    token_sec = 0.02
+    fail_rate = 0.0   # share of requests answered with 429 + Retry-After (exercises llm_client retries)
+    slow_rate = 0.0   # share of requests with a 10x first-token delay (exercises hedging)
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_event(self, payload):
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        chunk = f"data: {data}\n\n".encode("utf-8")
+        # Chunked transfer encoding keeps the connection reusable after the stream ends
+        self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            return self.send_json(404, {"error": {"message": "not found"}})
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        model = request.get("model", "mock")
+        tokens = split_tokens(self.answer)
+        usage = {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)}
+        if random.random() < self.fail_rate:
+            body = json.dumps({"error": {"message": "rate limit reached"}}).encode("utf-8")
+            self.send_response(429)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Retry-After", "0.1")
+            self.end_headers()
+            return self.wfile.write(body)
+        time.sleep(self.ttft_sec * (10 if random.random() < self.slow_rate else 1))
+
+        if not request.get("stream"):
+            time.sleep(self.token_sec * len(tokens))
+            return self.send_json(200, {
+                "id": "mock", "object": "chat.completion", "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": self.answer}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        base = {"id": "mock", "object": "chat.completion.chunk", "model": model}
+        try:
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(self.token_sec)
+                self.send_event({**base, "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]})
+            self.send_event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "x_groq": {"usage": usage}})
+            self.send_event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client hung up mid-stream (e.g. the losing hedged request)
+
+def serve(host=HOST, port=PORT, answer=DEFAULT_ANSWER, ttft_sec=0.2, token_sec=0.02, fail_rate=0.0, slow_rate=0.0):
+    MockChatHandler.answer = answer
+    MockChatHandler.ttft_sec = ttft_sec
+    MockChatHandler.token_sec = token_sec
+    MockChatHandler.fail_rate = fail_rate
+    MockChatHandler.slow_rate = slow_rate
+    server = ThreadingHTTPServer((host, port), MockChatHandler)
+    server.daemon_threads = True
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat server that streams a canned answer")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--answer", default=DEFAULT_ANSWER)
+    parser.add_argument("--ttft-ms", type=float, default=200, help="delay before the first token")
+    parser.add_argument("--token-ms", type=float, default=20, help="delay between tokens")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests rejected with 429")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests with a 10x first-token delay")
+    args = parser.parse_args(argv)
+
+    server = serve(args.host, args.port, args.answer, args.ttft_ms / 1000, args.token_ms / 1000,
+                   args.fail_rate, args.slow_rate)
+    print(f"✅ Mock LLM listening on http://{args.host}:{args.port}/openai/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+        server.server_close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,60 +1,23 @@
-import os
-import re
-import json
-from pdfminer.high_level import extract_text
-from sentence_transformers import SentenceTransformer
+from embedding_client import get_encoder
+from chunk_store import write_chunk_store
+from section_chunker import chunk_pdf, token_counter, FIELD_TITLES
 
-# ---------- Step 1: Extract text from the PDF ----------
+# ---------- Step 1: Input ----------
 pdf_path = "Unit Outline.pdf"
 unit_code = "KIT514"  # Can be parameterized or auto-detected
 
-text = extract_text(pdf_path)
-
-# ---------- Step 2: Split text into sections by predefined fields ----------
-field_titles = [
-    "Contact Details",
-    "Unit Description",
-    "Intended Learning Outcomes",
-    "Teaching Arrangements",
-    "Engagement Expectations",
-    "Assessment Schedule",
-    "Assessment Details"
-]
-
-def extract_sections(text, titles):
-    results = []
-    lower_text = text.lower()
-    positions = []
-
-    for title in titles:
-        match = re.search(re.escape(title.lower()), lower_text)
-        if match:
-            positions.append((title, match.start()))
-
-    positions.sort(key=lambda x: x[1])
-
-    for i in range(len(positions)):
-        title, start = positions[i]
-        end = positions[i + 1][1] if i + 1 < len(positions) else len(text)
-        content = text[start:end].replace("\n", " ").strip()
-        results.append({"chunk_title": title, "text": content})
-    return results
-
-chunks = extract_sections(text, field_titles)
+# ---------- Step 2: Split into sections, long ones into token-budgeted windows ----------
+# Window sizes are counted with the MiniLM tokenizer (the estimate is only a fallback)
+chunks = chunk_pdf(pdf_path, FIELD_TITLES, count_tokens=token_counter())  # pages are streamed, see section_chunker.py
 
 # ---------- Step 3: Generate sentence embeddings ----------
-model = SentenceTransformer("all-MiniLM-L6-v2")
+model = get_encoder("all-MiniLM-L6-v2")  # warm service if running, else loads in-process
+embeddings = model.encode([chunk["text"] for chunk in chunks])
 for chunk in chunks:
-    embedding = model.encode(chunk["text"]).tolist()
     chunk["unit"] = unit_code
-    chunk["embedding"] = embedding
 
-# ---------- Step 4: Save the result to a JSON file ----------
+# ---------- Step 4: Save the result to the chunk store ----------
 output_dir = "unit_chunks"
-os.makedirs(output_dir, exist_ok=True)
-output_path = os.path.join(output_dir, "chunks.json")
-
-with open(output_path, "w", encoding="utf-8") as f:
-    json.dump(chunks, f, indent=2, ensure_ascii=False)
+write_chunk_store(chunks, embeddings, output_dir)
 
-print(f"✅ Successfully saved {len(chunks)} chunks to {output_path}")
+print(f"✅ Successfully saved {len(chunks)} chunks to {output_dir}")
@@ -1,69 +1,108 @@
 import os
 import re
 import json
-from pdfminer.high_level import extract_text
-from sentence_transformers import SentenceTransformer
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from embedding_cache import CachedEncoder
+from chunk_store import write_chunk_store
+from ann_index import update_ann_index, ANN_FILE, hnswlib
+from section_chunker import chunk_pdf, token_counter, chunker_version, FIELD_TITLES
 
 # ---------- Step 1: Configuration ----------
 input_dir = "unit_pdfs"  # folder where multiple PDFs are stored
-output_dir = "unit_chunks"
-output_path = os.path.join(output_dir, "chunks.json")
-
-field_titles = [
-    "Contact Details",
-    "Unit Description",
-    "Intended Learning Outcomes",
-    "Teaching Arrangements",
-    "Engagement Expectations",
-    "Assessment Schedule",
-    "Assessment Details"
-]
-
-model = SentenceTransformer("all-MiniLM-L6-v2")
-all_chunks = []
-
-# ---------- Step 2: Text splitting function ----------
-def extract_sections(text, titles):
-    results = []
-    lower_text = text.lower()
-    positions = []
-
-    for title in titles:
-        match = re.search(re.escape(title.lower()), lower_text)
-        if match:
-            positions.append((title, match.start()))
-
-    positions.sort(key=lambda x: x[1])
-
-    for i in range(len(positions)):
-        title, start = positions[i]
-        end = positions[i + 1][1] if i + 1 < len(positions) else len(text)
-        content = text[start:end].replace("\n", " ").strip()
-        results.append({"chunk_title": title, "text": content})
-    return results
-
-# ---------- Step 3: Process each PDF ----------
-os.makedirs(output_dir, exist_ok=True)
-pdf_files = [f for f in os.listdir(input_dir) if f.endswith(".pdf")]
-
-for filename in pdf_files:
-    pdf_path = os.path.join(input_dir, filename)
-    print(f"📄 Processing: {filename}")
-    text = extract_text(pdf_path)
+output_dir = "unit_chunks"  # binary chunk store: embeddings.npy + chunks.jsonl (see chunk_store.py)
+cache_dir = os.path.join(output_dir, "cache")  # one file per PDF, keyed on its content hash
+batch_size = 64
 
+# ---------- Step 2: Section chunking (see section_chunker.py) ----------
+# Headings are found in one pass, long sections are split into overlapping windows that fit
+# MiniLM's 256-token limit (counted with its own tokenizer), and the PDF is read page by page.
+
+# ---------- Step 3: Helpers ----------
+def unit_code_from_filename(filename):
     # Extract unit code from filename (e.g. "KIT514 Unit Outline.pdf" → "KIT514")
     match = re.search(r"(KIT\d{3})", filename.upper())
-    unit_code = match.group(1) if match else "UNKNOWN"
+    return match.group(1) if match else "UNKNOWN"
+
+def file_hash(path, version):
+    # Chunker settings are part of the key, so changing them re-chunks every PDF
+    h = hashlib.sha256(version.encode("utf-8"))
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def extract_pdf_chunks(pdf_path):
+    # Runs in a worker process: pdfminer is pure Python and CPU-bound; the tokenizer loads once per worker
+    return chunk_pdf(pdf_path, FIELD_TITLES, count_tokens=token_counter())
+
+def cache_path(digest):
+    return os.path.join(cache_dir, f"{digest}.json")
+
+def load_cached(digest):
+    path = cache_path(digest)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_cached(digest, chunks):
+    with open(cache_path(digest), "w", encoding="utf-8") as f:
+        json.dump(chunks, f, ensure_ascii=False)
+
+# ---------- Step 4: Process each PDF ----------
+def main():
+    os.makedirs(cache_dir, exist_ok=True)
+    pdf_files = sorted(f for f in os.listdir(input_dir) if f.endswith(".pdf"))
+    version = chunker_version(token_counter())
+    digests = {f: file_hash(os.path.join(input_dir, f), version) for f in pdf_files}
+    chunks_by_file = {f: load_cached(digests[f]) for f in pdf_files}
+
+    todo = [f for f in pdf_files if chunks_by_file[f] is None]
+    print(f"♻️ {len(pdf_files) - len(todo)} unchanged PDFs reused from cache, {len(todo)} to process")
+
+    if todo:
+        # Extract text for all new/changed PDFs in parallel
+        with ProcessPoolExecutor() as pool:
+            paths = [os.path.join(input_dir, f) for f in todo]
+            for filename, chunks in zip(todo, pool.map(extract_pdf_chunks, paths)):
+                print(f"📄 Processed: {filename}")
+                chunks_by_file[filename] = chunks
+
+        # One batched encode call for every new chunk instead of one call per chunk
+        new_chunks = [chunk for f in todo for chunk in chunks_by_file[f]]
+        if new_chunks:
+            # Keyed on the exact chunk text, so unchanged sections of an edited PDF are not re-encoded
+            model = CachedEncoder("all-MiniLM-L6-v2", normalize=False)
+            embeddings = model.encode([chunk["text"] for chunk in new_chunks], batch_size=batch_size)
+            for chunk, embedding in zip(new_chunks, embeddings):
+                chunk["embedding"] = embedding.tolist()
+            print(model.cache.summary())
+
+        for f in todo:
+            save_cached(digests[f], chunks_by_file[f])
+
+    # Drop cache entries for PDFs that were removed or replaced
+    live = {f"{d}.json" for d in digests.values()}
+    for name in os.listdir(cache_dir):
+        if name.endswith(".json") and name not in live:
+            os.remove(os.path.join(cache_dir, name))
+
+    # ---------- Step 5: Save merged result ----------
+    all_chunks = []
+    embeddings = []
+    for filename in pdf_files:
+        unit_code = unit_code_from_filename(filename)
+        for chunk in chunks_by_file[filename]:
+            all_chunks.append({"chunk_title": chunk["chunk_title"], "text": chunk["text"], "unit": unit_code})
+            embeddings.append(chunk["embedding"])
 
-    chunks = extract_sections(text, field_titles)
-    for chunk in chunks:
-        embedding = model.encode(chunk["text"]).tolist()
-        chunk["unit"] = unit_code
-        chunk["embedding"] = embedding
-        all_chunks.append(chunk)
+    write_chunk_store(all_chunks, embeddings, output_dir)
+    print(f"✅ Saved {len(all_chunks)} chunks from {len(pdf_files)} PDFs to {output_dir}")
 
-# ---------- Step 4: Save merged result ----------
-with open(output_path, "w", encoding="utf-8") as f:
-    json.dump(all_chunks, f, indent=2, ensure_ascii=False)
+    # Keep the HNSW index (if one was built) in step: only new chunks are inserted
+    if hnswlib is not None and os.path.exists(os.path.join(output_dir, ANN_FILE)):
+        update_ann_index(output_dir)
 
-print(f"✅ Saved {len(all_chunks)} chunks from {len(pdf_files)} PDFs to {output_path}")
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,13 @@
-import json
-import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from embedding_cache import CachedEncoder
+from chunk_store import ChunkStore
+from hybrid_retrieval import load_hybrid_retriever
 
 # Load the sentence embedding model
-model = SentenceTransformer("all-MiniLM-L6-v2")
+model = CachedEncoder("all-MiniLM-L6-v2")  # repeated questions skip the model entirely
 
 # Load the chunks data with pre-computed embeddings
-with open("unit_chunks/chunks.json", "r") as f:
-    chunks = json.load(f)
+store = ChunkStore("unit_chunks")
+retriever = load_hybrid_retriever(store)  # BM25 + dense (HNSW if built with ann_index.py, else exact)
 
 # Get user query
 query = input("Enter your question (e.g., what will I learn in KIT500?):\n> ")
@@ -17,17 +16,20 @@ query = input("Enter your question (e.g., what will I learn in KIT500?):\n> ")
 query_vec = model.encode([query])
 
 # Compute cosine similarity between query and each chunk
-scores = []
-for chunk in chunks:
-    chunk_vec = np.array(chunk["embedding"])  # ✅ Convert to numpy array
-    score = cosine_similarity([chunk_vec], query_vec)[0][0]
-    scores.append((score, chunk["unit"], chunk["chunk_title"], chunk["text"]))
+# Dense search (matrix product or HNSW) and BM25 run side by side and are merged with
+# reciprocal-rank fusion, so exact terms like fee names or unit codes are not lost.
+# If the question names a unit we have outlines for, only that unit's chunks compete.
+hits = retriever.search(query, query_vec, k=3)
 
-# Sort and display top 3 most relevant chunks
-top_k = sorted(scores, key=lambda x: x[0], reverse=True)[:3]
+top_k = []
+for i, score in hits:
+    chunk = store[i]  # only the winning chunks' text is decoded
+    top_k.append((score, chunk["unit"], chunk["chunk_title"], chunk["text"]))
 
 print("\n📚 Most relevant course content chunks:\n")
 for i, (score, unit, title, text) in enumerate(top_k):
-    print(f"--- Top {i+1} · {unit} · {title} (score={score:.4f}) ---")
+    print(f"--- Top {i+1} · {unit} · {title} (rrf={score:.4f}) ---")
     print(text.strip())
     print()
+
+print(model.cache.summary())
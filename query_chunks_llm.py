@@ -1,43 +1,63 @@
-import json
-import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from openai import OpenAI
-
-# ====== Groq API Setup ======
-client = OpenAI(
-    base_url="https://api.groq.com/openai/v1",
-    api_key="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" #You need to use your own key
-)
+import os
+from embedding_cache import CachedEncoder
+from chunk_store import ChunkStore, EMBEDDINGS_FILE, INDEX_FILE
+from answer_cache import AnswerCache, corpus_version
+from hybrid_retrieval import load_hybrid_retriever
+from llm_stream import format_stats
+from llm_client import shared_client
+from student_scope import StudentScopes, prompt_login
+from context_packer import ContextPacker, format_packing
+
+# ====== Groq API Setup (export GROQ_API_KEY; GROQ_API_BASE can point at mock_llm_server.py) ======
+llm = shared_client()
 
 # ====== Load embedding model ======
-model = SentenceTransformer("all-MiniLM-L6-v2")
+model = CachedEncoder("all-MiniLM-L6-v2")  # repeated questions skip the model entirely
 
 # ====== Load chunked unit content ======
-with open("unit_chunks/chunks.json", "r", encoding="utf-8") as f:
-    chunks = json.load(f)
+store = ChunkStore("unit_chunks")
+retriever = load_hybrid_retriever(store)  # BM25 + dense (HNSW if built with ann_index.py, else exact)
+
+# ====== Optional student login: search only the outlines of their enrolled units ======
+scopes = StudentScopes(store=store)
+student = prompt_login(scopes.students)
+
+# ====== Answer cache (reset automatically when the chunk store is rebuilt) ======
+LLM_MODEL = "llama3-8b-8192"
+answers = AnswerCache("unit_chunks", corpus_version([os.path.join("unit_chunks", f) for f in (EMBEDDINGS_FILE, INDEX_FILE)]))
 
 # ====== Get user input ======
 query = input("📘 Enter your question (e.g., what will I learn in KIT514?):\n> ")
 query_vec = model.encode([query])
 
 # ====== Compute similarity ======
-scores = []
-for chunk in chunks:
-    chunk_vec = np.array(chunk["embedding"])
-    score = cosine_similarity([chunk_vec], query_vec)[0][0]
-    scores.append((score, chunk["unit"], chunk["chunk_title"], chunk["text"]))
+# Dense search (matrix product or HNSW) and BM25 run side by side and are merged with
+# reciprocal-rank fusion, so exact terms like fee names or unit codes are not lost.
+# If the question names a unit we have outlines for, only that unit's chunks compete.
+# Logged-in students without a unit code in the question search their enrolled units only.
+units = retriever.units_in_query(query) or (scopes.chunk_units(student["student_id"]) if student else None)
+hits = retriever.search(query, query_vec, k=3, units=units)
 
-top_k = sorted(scores, key=lambda x: x[0], reverse=True)[:3]
+top_k = []
+for i, score in hits:
+    chunk = store[i]  # only the winning chunks' text is decoded
+    top_k.append((score, chunk["unit"], chunk["chunk_title"], chunk["text"]))
 
-# ====== Construct context ======
-context = "\n\n".join(
-    f"{title} ({unit}):\n{text.strip()}"
-    for _, unit, title, text in top_k
-)
+# ====== Answer cache: a paraphrase with the same chunks was answered already ======
+chunk_ids = [int(store.chunk_ids[i]) for i, _ in hits]
+answer = answers.lookup(query_vec, chunk_ids, LLM_MODEL)
+print("\n💡 Answer from LLM:\n")
+if answer is None:
+    # ====== Construct context (only on a cache miss) ======
+    # Near-duplicate chunks (overlapping windows of one section) are dropped and each chunk keeps only the
+    # sentences closest to the question, within a fixed token budget.
+    packer = ContextPacker(model.encode)
+    packed, packing = packer.pack(query_vec, [f"{title} ({unit}):\n{text.strip()}" for _, unit, title, text in top_k])
+    context = "\n\n".join(text for _, text in packed)
+    print(format_packing(packing))
 
-# ====== LLM Prompt ======
-prompt = f"""You are a helpful assistant at UTAS. Use the following course unit context to answer the user's question clearly and accurately.
+    # ====== LLM Prompt ======
+    prompt = f"""You are a helpful assistant at UTAS. Use the following course unit context to answer the user's question clearly and accurately.
 
 Context:
 {context}
@@ -46,14 +66,19 @@ Question: {query}
 
 Answer:"""
 
-# ====== Query Groq (LLaMA3) ======
-response = client.chat.completions.create(
-    model="llama3-8b-8192",
-    messages=[
-        {"role": "system", "content": "You are a helpful UTAS course assistant."},
-        {"role": "user", "content": prompt}
-    ]
-)
-
-print("\n💡 Answer from LLM:\n")
-print(response.choices[0].message.content)
+    # ====== Query Groq (LLaMA3) ======
+    # Stream the answer so the first words show up as soon as Groq produces them
+    answer, stats = llm.stream_chat(
+        LLM_MODEL,
+        [
+            {"role": "system", "content": "You are a helpful UTAS course assistant."},
+            {"role": "user", "content": prompt}
+        ]
+    )
+    answers.store(query, query_vec, chunk_ids, LLM_MODEL, answer)
+    print(format_stats(stats))
+else:
+    print(answer)
+print(model.cache.summary())
+print(answers.summary())
+print(llm.summary())
@@ -1,24 +1,49 @@
-import requests
-import re
+import os
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from embedding_cache import CachedEmbeddings
+from answer_cache import AnswerCache, corpus_version, document_key
+from llm_stream import format_stats
+from llm_client import shared_client, LLMError
+from course_catalog import CatalogFilters
+from hybrid_retrieval import HybridCourseRetriever
+from unit_lookup import load_unit_index
+from student_scope import StudentScopes, prompt_login
+from context_packer import ContextPacker, format_packing
 
 # === Configuration ===
-GROQ_API_BASE = "https://api.groq.com/openai/v1"
-GROQ_API_KEY  = "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"
 CHROMA_DIR    = "chroma_db"
 EMBED_MODEL   = "sentence-transformers/all-MiniLM-L6-v2"
 LLM_MODEL     = "llama3-70b-8192"
 COLLECTION_NAME = "course_info"
 
+# === Groq client (GROQ_API_KEY / GROQ_API_BASE from the environment, see llm_client.py) ===
+llm = shared_client()
+
 # === Load embedding + Chroma ===
-embedding = HuggingFaceEmbeddings(model_name=EMBED_MODEL)
+embedding = CachedEmbeddings(EMBED_MODEL)  # repeated questions are served from the embedding cache
 db = Chroma(
     persist_directory=CHROMA_DIR,
     embedding_function=embedding,
     collection_name=COLLECTION_NAME
 )
 
+# === Metadata pre-filters: course / category / unit codes known to the collection ===
+catalog = CatalogFilters(db.get(include=["metadatas"])["metadatas"])
+retriever = HybridCourseRetriever(db, CHROMA_DIR)  # BM25 index is built / loaded on the first question
+
+# === Structured unit facts (credit points, availability, courses) answered without the LLM ===
+unit_index = load_unit_index()
+
+# === Optional student login: questions are then searched within their course, fee status and units ===
+scopes = StudentScopes(db)
+student = prompt_login(scopes.students)
+
+# === Context packing: near-duplicate documents dropped, the rest trimmed to the sentences that match ===
+packer = ContextPacker(embedding.embed_documents)
+
+# === Answer cache (reset automatically when embed_chunks.py rewrites the Chroma DB) ===
+answers = AnswerCache(COLLECTION_NAME, corpus_version([os.path.join(CHROMA_DIR, "chroma.sqlite3")]))
+
 # === Suggestion display ===
 suggestions = [
     "What can I learn in Master of Information Communication and Technology?"
@@ -33,11 +58,44 @@ for s in suggestions:
 while True:
     query = input("\n❓ Your question: ")
     if query.lower() == "exit":
+        print(embedding.cache.summary())
+        print(answers.summary())
+        print(packer.summary())
+        print(llm.summary())
         break
 
-    # Step 1: Retrieve from Chroma
-    results = db.similarity_search(query, k=4)
-    context_texts = "\n\n---\n\n".join([doc.page_content for doc in results])
+    # Step 0: "How many credit points is KIT509?" is a dictionary lookup, not a RAG question
+    fast_answer = unit_index.answer(query)
+    if fast_answer is not None:
+        print("\n⚡ Answer (unit index):", fast_answer)
+        continue
+
+    # Step 1: Retrieve (embed once; the vector is reused for the answer cache).
+    # A course, category or unit code named in the question narrows the search to that slice;
+    # unit codes put an exact lookup of that unit first, the rest is BM25 + dense with RRF.
+    query_vec = embedding.embed_query(query)
+    filters = catalog.detect(query)
+    results = []
+    scope = scopes.scope_for(student["student_id"]) if student else None
+    if scope is not None:
+        # Logged in: only the student's course documents compete (memoized per course and status)
+        results = retriever.search_scope(scope, query, query_vec, k=4, filters=filters)
+        print(f"🎓 Scope: {len(scope)} documents for {student['course_code']}")
+    if not results and filters:
+        results = retriever.search(query, query_vec, k=4, filters=filters)
+        print("🔎 Filter:", ", ".join(f"{k}={v}" for k, v in filters.items()))
+    if not results:
+        results = retriever.search(query, query_vec, k=4)
+    doc_ids = [document_key(doc) for doc in results]
+
+    cached = answers.lookup(query_vec, doc_ids, LLM_MODEL)
+    if cached is not None:
+        print("\n💬 Answer (cached):", cached)
+        continue
+
+    packed, packing = packer.pack(query_vec, [doc.page_content for doc in results], separator="\n\n---\n\n")
+    context_texts = "\n\n---\n\n".join(text for _, text in packed)
+    print(format_packing(packing))
 
     # Step 2: Build prompt for LLaMA
     prompt = f"""
@@ -51,31 +109,17 @@ while True:
         Based *only* on the context provided, answer the question clearly and concisely. If the context doesn't contain the answer, say "I'm sorry, I don't have enough information to answer that question. Please check the UTAS website (www.utas.edu.au) for more information."
         """
 
-    # Step 3: Call Groq API
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": LLM_MODEL,
-        "messages": [
-            {"role": "system", "content": "You are a course information assistant for the University of Tasmania."},
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": 0.1,
-        "max_tokens": 1024
-    }
-
-    response = requests.post(
-        f"{GROQ_API_BASE}/chat/completions",
-        headers=headers,
-        json=payload
-    )
-
-    if response.status_code == 200:
-        answer = response.json()["choices"][0]["message"]["content"]
-        # Post-process to remove conversational filler if the model adds it
-        answer = re.sub(r"Based on the context provided, here is the answer to your question:\n+", "", answer).strip()
-        print("\n💬 Answer:", answer)
-    else:
-        print("❌ Error:", response.text)
\ No newline at end of file
+    # Step 3: Call Groq API (streamed; pooled connection, retries and hedging live in llm_client.py)
+    messages = [
+        {"role": "system", "content": "You are a course information assistant for the University of Tasmania."},
+        {"role": "user", "content": prompt}
+    ]
+    print("\n💬 Answer: ", end="", flush=True)
+    try:
+        # Conversational filler is removed on the fly by the streaming filter
+        answer, stats = llm.stream_chat(LLM_MODEL, messages, temperature=0.1, max_tokens=1024)
+    except LLMError as e:
+        print("\n❌ Error:", e)
+        continue
+    answers.store(query, query_vec, doc_ids, LLM_MODEL, answer)
+    print(format_stats(stats))
@@ -0,0 +1,98 @@
+import os
+import re
+import numpy as np
+
+UNIT_CODE_PATTERN = re.compile(r"\b([A-Z]{3}\d{3})\b", re.IGNORECASE)
+
+# ---------- Helpers ----------
+def normalize_rows(matrix):
+    # L2-normalise once so cosine similarity becomes a plain dot product
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def top_k_indices(scores, k):
+    # argpartition is O(n); only the k winners get sorted
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+def units_in_query(query, chunk_units):
+    # Unit codes mentioned in the question that we actually have chunks for
+    if chunk_units is None:
+        return []
+    known = set(chunk_units.tolist())
+    return [code for code in dict.fromkeys(m.upper() for m in UNIT_CODE_PATTERN.findall(query)) if code in known]
+
+def filter_mask(chunk_units, chunk_titles, units=None, titles=None):
+    # Filters are boolean masks over all chunks; None means "no filter"
+    mask = None
+    if units:
+        mask = np.isin(chunk_units, [u.upper() for u in units])
+    if titles:
+        title_mask = np.isin(np.char.lower(chunk_titles.astype(str)), [t.lower() for t in titles])
+        mask = title_mask if mask is None else mask & title_mask
+    return mask
+
+# ---------- Dense retriever shared by query_chunks / query_chunks_llm ----------
+class DenseRetriever:
+    def __init__(self, embeddings, units=None, titles=None, normalized=False):
+        # A normalised float32 store is searched straight from the mmap. A float16 one is widened to
+        # float32 once here, otherwise every query's matrix product would upcast the whole matrix again;
+        # anything not normalised gets a normalised copy.
+        if not normalized:
+            embeddings = normalize_rows(embeddings)
+        elif embeddings.dtype != np.float32:
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.embeddings = embeddings
+        self.units = np.asarray(units) if units is not None else None
+        self.titles = np.asarray(titles) if titles is not None else None
+
+    @classmethod
+    def from_store(cls, store):
+        if not store.normalized:
+            print(f"⚠️ {store.store_dir} predates normalised stores; rebuild it to search the mmap without a copy")
+        return cls(store.embeddings, store.units, store.titles, store.normalized)
+
+    def __len__(self):
+        return len(self.embeddings)
+
+    def units_in_query(self, query):
+        return units_in_query(query, self.units)
+
+    def mask(self, units=None, titles=None):
+        return filter_mask(self.units, self.titles, units, titles)
+
+    def scores(self, query_vecs):
+        # One matrix product for the whole batch: (n_queries, dim) @ (dim, n_chunks)
+        query_vecs = normalize_rows(np.atleast_2d(query_vecs))
+        return query_vecs @ self.embeddings.T
+
+    def search_batch(self, query_vecs, k=3, units=None, titles=None):
+        all_scores = self.scores(query_vecs)
+        mask = self.mask(units, titles)
+        if mask is not None:
+            all_scores[:, ~mask] = -np.inf
+
+        results = []
+        for scores in all_scores:
+            top = top_k_indices(scores, k)
+            results.append([(int(i), float(scores[i])) for i in top if np.isfinite(scores[i])])
+        return results
+
+    def search(self, query_vec, k=3, units=None, titles=None):
+        return self.search_batch(query_vec, k, units, titles)[0]
+
+# ---------- Backend selection ----------
+def load_retriever(store, backend="auto"):
+    # "auto" uses the HNSW index when one has been built (see ann_index.py), else exact search
+    if backend in ("auto", "hnsw"):
+        from ann_index import AnnRetriever, ANN_FILE, hnswlib
+        if os.path.exists(os.path.join(store.store_dir, ANN_FILE)) and hnswlib is not None:
+            return AnnRetriever.load(store, store.store_dir)
+        if backend == "hnsw":
+            raise FileNotFoundError(f"No HNSW index in {store.store_dir}; run `python ann_index.py` first")
+    return DenseRetriever.from_store(store)
@@ -0,0 +1,174 @@
+import re
+import sys
+import json
+import argparse
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LTTextContainer
+
+try:
+    from transformers import AutoTokenizer
+except ImportError:
+    AutoTokenizer = None
+
+# ---------- Settings ----------
+FIELD_TITLES = [
+    "Contact Details",
+    "Unit Description",
+    "Intended Learning Outcomes",
+    "Teaching Arrangements",
+    "Engagement Expectations",
+    "Assessment Schedule",
+    "Assessment Details"
+]
+TOKENIZER_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+CHUNK_TOKENS = 200      # MiniLM truncates at 256 word pieces; leaves room for [CLS]/[SEP] and the title
+OVERLAP_TOKENS = 40     # tail of the previous sub-chunk repeated at the start of the next
+CHUNKER_VERSION = f"sections-v3-{CHUNK_TOKENS}-{OVERLAP_TOKENS}"  # part of the PDF cache key
+
+# ---------- Token counting ----------
+WORD_PIECES = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(word):
+    # Word-piece estimate without a tokenizer: punctuation is its own piece, long words split every ~6 chars
+    return sum(1 + (len(piece) - 1) // 6 for piece in WORD_PIECES.findall(word)) or 1
+
+def load_token_counter(model_name=TOKENIZER_MODEL):
+    # Exact counts from the model's own tokenizer when transformers (and its files) are available
+    if AutoTokenizer is not None:
+        try:
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+        except (OSError, ValueError):
+            tokenizer = None
+        if tokenizer is not None:
+            cache = {}
+            def count(word):
+                if word not in cache:
+                    cache[word] = len(tokenizer.tokenize(word)) or 1
+                return cache[word]
+            return count
+    print(f"⚠️ {model_name} tokenizer unavailable; window sizes use the word-piece estimate")
+    return estimate_tokens
+
+_token_counter = None
+
+def token_counter():
+    # load_token_counter() once per process (ingestion workers each call this)
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = load_token_counter()
+    return _token_counter
+
+def chunker_version(count_tokens):
+    # Exact and estimated counts cut different windows, so they must not share cached chunks
+    return f"{CHUNKER_VERSION}-{'estimate' if count_tokens is estimate_tokens else 'exact'}"
+
+# ---------- Page-by-page text (one page in memory at a time) ----------
+def iter_pdf_pages(pdf_path):
+    for page in extract_pages(pdf_path):
+        yield " ".join(element.get_text() for element in page if isinstance(element, LTTextContainer))
+
+# ---------- Single-pass chunker ----------
+def heading_pattern(titles):
+    # One alternation for every title; longest first so "Assessment Details" beats a shorter prefix
+    parts = [r"\s+".join(map(re.escape, t.split())) for t in sorted(titles, key=len, reverse=True)]
+    return re.compile("|".join(f"({p})" for p in parts), re.IGNORECASE)
+
+class SectionChunker:
+    def __init__(self, titles=FIELD_TITLES, count_tokens=estimate_tokens, chunk_tokens=CHUNK_TOKENS, overlap_tokens=OVERLAP_TOKENS):
+        self.titles = sorted(titles, key=len, reverse=True)  # same order as the pattern groups
+        self.pattern = heading_pattern(titles)
+        self.count_tokens = count_tokens
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def chunks(self, pages):
+        # pages: iterable of page texts. Yields {"chunk_title", "part", "text"} as soon as a window fills,
+        # so memory holds one page plus one window. Like the old extract_sections, text before the
+        # first heading is skipped and only the first occurrence of each title starts a section.
+        seen = set()
+        self._title, self._part, self._emitted = None, 0, set()
+        self._words, self._costs, self._total, self._carry = [], [], 0, 0
+        for page in pages:
+            pos = 0
+            for match in self.pattern.finditer(page):
+                title = self.titles[match.lastindex - 1]
+                if title in seen:
+                    continue
+                yield from self._add(page[pos:match.start()])
+                yield from self._flush()
+                seen.add(title)
+                self._title, self._part = title, 0
+                pos = match.start()
+            yield from self._add(page[pos:])
+        yield from self._flush()
+
+    def _add(self, text):
+        if self._title is None:
+            return
+        for word in text.split():
+            for piece, cost in self._pieces(word):
+                # Emit before the window would pass the budget, never after
+                if self._words and self._total + cost > self.chunk_tokens:
+                    yield from self._emit()
+                    # The last OVERLAP_TOKENS worth of words start the next window (leaving room for this piece)
+                    room = min(self.overlap_tokens, self.chunk_tokens - cost)
+                    keep, total = 0, 0
+                    while keep < len(self._costs) - 1 and total + self._costs[-1 - keep] <= room:
+                        total += self._costs[-1 - keep]
+                        keep += 1
+                    self._words, self._costs = self._words[len(self._words) - keep:], self._costs[len(self._costs) - keep:]
+                    self._total, self._carry = total, keep
+                self._words.append(piece)
+                self._costs.append(cost)
+                self._total += cost
+
+    def _pieces(self, word):
+        # A single "word" over the whole budget (a long URL, a run of punctuation) is cut into slices that fit
+        cost = self.count_tokens(word)
+        if cost <= self.chunk_tokens:
+            yield word, cost
+            return
+        start, step = 0, max(1, len(word) * self.chunk_tokens // cost)
+        while start < len(word):
+            end = min(len(word), start + step)
+            while end - start > 1 and self.count_tokens(word[start:end]) > self.chunk_tokens:
+                end = start + (end - start) * 3 // 4
+            yield word[start:end], self.count_tokens(word[start:end])
+            start = end
+
+    def _flush(self):
+        # Section ended: emit the rest unless it is only the overlap carried from the last window
+        if self._title is not None and len(self._words) > self._carry:
+            yield from self._emit()
+        self._words, self._costs, self._total, self._carry = [], [], 0, 0
+
+    def _emit(self):
+        text = " ".join(self._words)
+        if self._part:
+            text = f"{self._title} (continued): {text}"
+        # chunk_store.chunk_id hashes unit + title + text, so identical windows would share an ID: drop repeats
+        if text not in self._emitted:
+            self._emitted.add(text)
+            yield {"chunk_title": self._title, "part": self._part, "text": text}
+            self._part += 1
+
+def chunk_pdf(pdf_path, titles=FIELD_TITLES, count_tokens=estimate_tokens):
+    return list(SectionChunker(titles, count_tokens).chunks(iter_pdf_pages(pdf_path)))
+
+def extract_sections(text, titles=FIELD_TITLES, count_tokens=estimate_tokens):
+    # Whole-string entry point kept for callers that already have the text
+    return list(SectionChunker(titles, count_tokens).chunks([text]))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split a unit outline PDF into token-budgeted section chunks")
+    parser.add_argument("pdf")
+    parser.add_argument("--estimate-tokens", action="store_true", help="use the word-piece estimate instead of the MiniLM tokenizer")
+    args = parser.parse_args(argv)
+
+    count = estimate_tokens if args.estimate_tokens else token_counter()
+    for chunk in chunk_pdf(args.pdf, count_tokens=count):
+        tokens = sum(count(w) for w in chunk["text"].split())
+        print(json.dumps({**chunk, "tokens": tokens, "text": chunk["text"][:80]}, ensure_ascii=False))
+
+if __name__ == "__main__":
+    sys.exit(main())
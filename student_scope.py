@@ -0,0 +1,135 @@
+import os
+import sys
+import hmac
+import json
+import time
+import argparse
+import getpass
+import numpy as np
+from retrieval import DenseRetriever
+from timetable import load_timetable, TIMETABLE_FILE
+
+# ---------- Settings ----------
+STUDENT_FILE = "student_data.json"
+FEE_SOURCES = {True: "Fees - Domestic students", False: "Fees - International students"}  # flatten_dict source names
+LOGIN_ATTEMPTS = 3
+
+# ---------- Students and login ----------
+def load_students(path=STUDENT_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return {str(s["student_id"]): s for s in json.load(f)}
+
+def login(students, student_id, password):
+    student = students.get(str(student_id).strip())
+    if student is None or not hmac.compare_digest(str(student.get("password", "")), password):
+        return None
+    return student
+
+def prompt_login(students):
+    # Returns the student record, or None to keep asking about the whole catalogue
+    for _ in range(LOGIN_ATTEMPTS):
+        student_id = input("🔐 Student ID (press Enter to continue as a guest): ").strip()
+        if not student_id:
+            return None
+        student = login(students, student_id, getpass.getpass("🔑 Password: "))
+        if student is not None:
+            print(f"👋 Welcome {student['first_name']} ({student['course_code']}, "
+                  f"{'domestic' if student.get('domestic') else 'international'})")
+            return student
+        print("❌ Unknown student ID or wrong password")
+    return None
+
+# ---------- The subset of the course collection one student can be asking about ----------
+def in_course_scope(meta, course_code, domestic):
+    # Their course's documents. The one fee table written for the other residency status is left out;
+    # every other fee document (their own table, scholarships, ...) stays in.
+    if (meta or {}).get("course_code") != course_code:
+        return False
+    return meta.get("section") != "fees" or not meta.get("source", "").startswith(FEE_SOURCES[not domestic])
+
+class CourseScope:
+    # Documents, metadata and embeddings pulled from Chroma once; searched by HybridCourseRetriever.search_scope
+    def __init__(self, ids, texts, metadatas, embeddings):
+        order = np.argsort(np.array(ids, dtype=str))  # sorted like the BM25 index
+        self.ids = np.array(ids, dtype=str)[order]
+        self.texts = [texts[i] for i in order]
+        self.metadatas = [metadatas[i] or {} for i in order]
+        self.dense = DenseRetriever(np.asarray(embeddings, dtype=np.float32)[order])
+        self.columns = {key: np.array([m.get(key, "") for m in self.metadatas], dtype=str)
+                        for key in ("course_code", "category", "unit_code")}
+        self.bm25_rows = None  # filled in on the first search
+
+    def __len__(self):
+        return len(self.ids)
+
+# ---------- Per-student candidate sets, memoized ----------
+class StudentScopes:
+    def __init__(self, db=None, store=None, students=None, timetable_path=TIMETABLE_FILE):
+        self.db = db                # Chroma course collection (query_llm.py)
+        self.store = store          # unit-outline ChunkStore (query_chunks_llm.py)
+        self.students = students if students is not None else load_students()
+        self.timetable_path = timetable_path
+        self._courses = {}          # (course_code, domestic) -> CourseScope, shared by classmates
+        self._units = {}            # student_id -> enrolled unit codes
+
+    def units(self, student_id):
+        student_id = str(student_id)
+        if student_id not in self._units:
+            units = []
+            if os.path.exists(self.timetable_path):
+                try:
+                    units = load_timetable(self.timetable_path).units(student_id)
+                except KeyError:
+                    pass  # no classes this semester
+            self._units[student_id] = units
+        return self._units[student_id]
+
+    def chunk_units(self, student_id):
+        # Enrolled units that actually have outline chunks; None means "search everything"
+        known = set(self.store.units.tolist()) if self.store is not None else set()
+        units = [u for u in self.units(student_id) if u in known]
+        return units or None
+
+    def course_scope(self, student):
+        key = (student["course_code"], bool(student.get("domestic")))
+        if key not in self._courses:
+            data = self.db.get(where={"course_code": key[0]}, include=["documents", "metadatas", "embeddings"])
+            keep = [i for i, meta in enumerate(data["metadatas"]) if in_course_scope(meta, *key)]
+            scope = CourseScope([data["ids"][i] for i in keep], [data["documents"][i] for i in keep],
+                                [data["metadatas"][i] for i in keep], [data["embeddings"][i] for i in keep])
+            self._courses[key] = scope if len(scope) else None
+        return self._courses[key]
+
+    def scope_for(self, student_id):
+        student = self.students[str(student_id)]
+        return self.course_scope(student) if self.db is not None else None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the retrieval subset built for a student")
+    parser.add_argument("student_id")
+    parser.add_argument("--chroma-dir", default="chroma_db")
+    parser.add_argument("--store-dir", default="unit_chunks")
+    args = parser.parse_args(argv)
+
+    from chunk_store import ChunkStore
+    scopes = StudentScopes(store=ChunkStore(args.store_dir) if os.path.isdir(args.store_dir) else None)
+    student = scopes.students[args.student_id]
+    print(f"🎓 {student['first_name']} {student['last_name']}: {student['course_code']}, "
+          f"{'domestic' if student.get('domestic') else 'international'}")
+    print(f"📚 Enrolled units: {', '.join(scopes.units(args.student_id)) or '-'}")
+    if scopes.store is not None:
+        units = scopes.chunk_units(args.student_id)
+        rows = int(np.isin(scopes.store.units, units).sum()) if units else len(scopes.store)
+        print(f"🧩 Outline chunks searched: {rows} of {len(scopes.store)}")
+
+    if os.path.isdir(args.chroma_dir):
+        from langchain_community.vectorstores import Chroma
+        scopes.db = Chroma(persist_directory=args.chroma_dir, collection_name="course_info")
+        start = time.perf_counter()
+        scope = scopes.scope_for(args.student_id)
+        total = len(scopes.db.get(include=[])["ids"])
+        print(f"📘 Course documents searched: {len(scope) if scope else total} of {total} "
+              f"(built in {(time.perf_counter() - start) * 1000:.0f} ms)")
+
+if __name__ == "__main__":
+    sys.exit(main())
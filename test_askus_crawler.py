@@ -0,0 +1,153 @@
+import time
+import hashlib
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from askus_crawler import AskUsCrawler, HttpCache
+
+# ---------- Pages in the AskUs markup the parsers expect (same shape as the html_debug dumps) ----------
+def list_page(links):
+    items = "".join(
+        f'<div class="rn_Element1"><a href="/app/answers/detail/a_id/{a_id}/~/{slug}">{title}</a></div>'
+        for a_id, slug, title in links
+    )
+    return f'<html><body><div id="rn_Content"><div class="rn_List">{items}</div></div></body></html>'
+
+def detail_page(answer):
+    return f'<html><body><div class="rn_AnswerText"><div class="answer_text"><p>{answer}</p></div></div></body></html>'
+
+FAQS = {
+    1: ("how-do-i-enrol", "How do I enrol?", "Enrol through eStudent."),
+    2: ("census-date", "When is census date?", "Census date is in week 4."),
+    3: ("apply-for-extension", "How do I apply for an extension?", "Use the extension form."),
+    4: ("special-consideration", "What is special consideration?", "Support when something affects your study."),
+}
+
+def links(*ids):
+    return [(a_id, FAQS[a_id][0], FAQS[a_id][1]) for a_id in ids]
+
+# Two keywords, two pages each; FAQs 1 and 2 show up more than once
+LIST_PAGES = {
+    "enrol": {1: links(1, 2), 2: links(3, 1)},
+    "census": {1: links(2, 4), 2: []},
+}
+
+# ---------- Local stub of askus.utas.edu.au ----------
+class StubAskUs:
+    def __init__(self):
+        self.pages = {}
+        for keyword, pages in LIST_PAGES.items():
+            for page, page_links in pages.items():
+                self.pages[f"/app/answers/list/kw/{keyword}/page/{page}"] = list_page(page_links)
+        for a_id, (slug, _, answer) in FAQS.items():
+            self.pages[f"/app/answers/detail/a_id/{a_id}/~/{slug}"] = detail_page(answer)
+        self.status = {}        # path -> forced status code
+        self.requests = []
+        self.lock = threading.Lock()
+
+        stub = self
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests.append((time.monotonic(), self.path))
+                body = stub.pages.get(self.path)
+                status = stub.status.get(self.path, 200 if body is not None else 404)
+                if status != 200:
+                    self.send_response(status)
+                    self.end_headers()
+                    self.wfile.write(b"<html><body><h1>Service unavailable</h1></body></html>")
+                    return
+                etag = '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def detail_requests(self):
+        return [path for _, path in self.requests if "/detail/" in path]
+
+class AskUsCrawlerTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = StubAskUs().__enter__()
+
+    def tearDown(self):
+        self.stub.__exit__()
+
+    def crawler(self, **kwargs):
+        options = {"max_workers": 4, "rate_per_sec": 0, "debug_dir": None}
+        options.update(kwargs)
+        return AskUsCrawler(base_url=self.stub.base_url, **options)
+
+    def test_dedupes_detail_pages_in_first_seen_order(self):
+        crawler = self.crawler()
+        results = crawler.crawl(["enrol", "census"], max_pages=2)
+
+        # Keyword order, then page order, then link order; each FAQ once
+        self.assertEqual([r["question"] for r in results], [FAQS[i][1] for i in (1, 2, 3, 4)])
+        self.assertEqual([r["answer"] for r in results], [FAQS[i][2] for i in (1, 2, 3, 4)])
+        self.assertTrue(all(r["url"].startswith(self.stub.base_url + "/app/answers/detail/") for r in results))
+
+        # 4 list pages + 4 unique answers, no detail page fetched twice
+        self.assertEqual(len(self.stub.requests), 8)
+        self.assertEqual(len(self.stub.detail_requests()), 4)
+        self.assertEqual(len(set(self.stub.detail_requests())), 4)
+        self.assertEqual(crawler.stats["fetched"], 8)
+
+    def test_rate_limit_spaces_requests_per_host(self):
+        rate = 20.0
+        crawler = self.crawler(rate_per_sec=rate, burst=1, max_workers=8)
+        crawler.crawl(["enrol", "census"], max_pages=2)
+
+        times = sorted(t for t, _ in self.stub.requests)
+        self.assertEqual(len(times), 8)
+        # Burst of one: 8 requests need at least 7 refill intervals, whatever the worker count
+        self.assertGreaterEqual(times[-1] - times[0], (len(times) - 1) / rate * 0.9)
+
+    def test_recrawl_revalidates_and_keeps_answers_on_errors(self):
+        cache = HttpCache(path=None, fresh=True)
+        first = self.crawler(cache=cache)
+        first.crawl(["enrol", "census"], max_pages=2)
+        self.assertEqual(first.stats["changed"], 4)
+
+        # Second run: every page answers 304, except one answer that now errors out
+        broken = "/app/answers/detail/a_id/3/~/apply-for-extension"
+        self.stub.status[broken] = 503
+        second = self.crawler(cache=cache)
+        results = second.crawl(["enrol", "census"], max_pages=2)
+
+        self.assertEqual([r["question"] for r in results], [FAQS[i][1] for i in (1, 2, 4)])
+        self.assertEqual(second.stats["not_modified"], 7)
+        self.assertEqual(second.stats["changed"], 0)
+        self.assertEqual(cache.get(self.stub.base_url + broken)["answer"], FAQS[3][2])
+
+        # An edited answer is reported as changed
+        self.stub.status.clear()
+        self.stub.pages[broken] = detail_page("Extensions are now requested in MyLO.")
+        third = self.crawler(cache=cache)
+        third.crawl(["enrol", "census"], max_pages=2)
+        self.assertEqual(third.changed_urls, {self.stub.base_url + broken})
+
+if __name__ == "__main__":
+    unittest.main()
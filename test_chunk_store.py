@@ -0,0 +1,41 @@
+import tempfile
+import unittest
+import numpy as np
+from chunk_store import write_chunk_store, ChunkStore, EMBEDDING_DIM
+from retrieval import DenseRetriever
+
+def chunks(n):
+    return [{"unit": f"KIT{500 + i}", "chunk_title": "Unit Description", "text": f"chunk {i}"} for i in range(n)]
+
+class ChunkStoreTest(unittest.TestCase):
+    def test_round_trip(self):
+        rng = np.random.default_rng(0)
+        embeddings = rng.standard_normal((5, 8)) * 3
+        with tempfile.TemporaryDirectory() as store_dir:
+            self.assertEqual(write_chunk_store(chunks(5), embeddings, store_dir), (5, 8))
+            store = ChunkStore(store_dir)
+            self.assertEqual(len(store), 5)
+            self.assertEqual(store[3]["text"], "chunk 3")
+            self.assertTrue(store.normalized)
+            np.testing.assert_allclose(np.linalg.norm(store.embeddings, axis=1), 1.0, rtol=1e-5)
+            hits = DenseRetriever.from_store(store).search(embeddings[2], k=1)
+            self.assertEqual(hits[0][0], 2)
+            store.close()
+
+    def test_empty_store(self):
+        # An ingestion run that extracted nothing must still leave a readable store behind
+        with tempfile.TemporaryDirectory() as store_dir:
+            write_chunk_store(chunks(3), np.ones((3, EMBEDDING_DIM)), store_dir)
+            self.assertEqual(write_chunk_store([], [], store_dir), (0, EMBEDDING_DIM))
+            store = ChunkStore(store_dir)
+            self.assertEqual(len(store), 0)
+            self.assertEqual(store.embeddings.shape, (0, EMBEDDING_DIM))
+            self.assertEqual(DenseRetriever.from_store(store).search(np.ones(EMBEDDING_DIM), k=3), [])
+            store.close()
+
+    def test_empty_store_keeps_given_dim(self):
+        with tempfile.TemporaryDirectory() as store_dir:
+            self.assertEqual(write_chunk_store([], np.zeros((0, 16)), store_dir), (0, 16))
+
+if __name__ == "__main__":
+    unittest.main()
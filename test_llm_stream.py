@@ -0,0 +1,45 @@
+import re
+import random
+import unittest
+from llm_stream import FillerFilter, FILLER_PHRASES
+
+FILLER = FILLER_PHRASES[0]
+PATTERN = re.compile("|".join(re.escape(p) + r"\n+" for p in FILLER_PHRASES))
+
+def reference(text):
+    # What query_llm.py used to do with the whole answer
+    return PATTERN.sub("", text).strip()
+
+def streamed(text, sizes):
+    text_filter = FillerFilter()
+    out, i = [], 0
+    for size in sizes:
+        out.append(text_filter.feed(text[i:i + size]))
+        i += size
+    out.append(text_filter.feed(text[i:]))
+    out.append(text_filter.finish())
+    return "".join(out)
+
+class FillerFilterTest(unittest.TestCase):
+    def test_filler_at_the_end(self):
+        for text in [f"Census date is 31 March. \n{FILLER}\n", f"Yes.\t \n\n{FILLER}\n\n", f"Yes.  {FILLER}\n"]:
+            for size in range(1, 8):
+                with self.subTest(text=text, size=size):
+                    self.assertEqual(streamed(text, [size] * len(text)), reference(text))
+
+    def test_filler_at_the_start_and_middle(self):
+        text = f"{FILLER}\n\nKIT514 is worth 12.5 credit points. \n{FILLER}\nIt runs in Semester 1."
+        for size in range(1, 10):
+            with self.subTest(size=size):
+                self.assertEqual(streamed(text, [size] * len(text)), reference(text))
+
+    def test_random_chunking_matches_reference(self):
+        rng = random.Random(0)
+        pieces = [FILLER, FILLER + "\n", FILLER + "\n\n", "Hello", " ", "\n", "  \n ", "world.", "Based on", "\t"]
+        for _ in range(2000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 8)))
+            sizes = [rng.randint(1, 12) for _ in range(len(text))]
+            self.assertEqual(streamed(text, sizes), reference(text), repr(text))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,270 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from datetime import date, datetime, timedelta
+import numpy as np
+from answer_cache import corpus_version
+
+# ---------- Settings ----------
+TIMETABLE_FILE = "student_detail_timetable.json"
+CACHE_SUFFIX = ".npz"          # columnar copy saved next to the JSON, reused until the JSON changes
+EPOCH = date(1970, 1, 1)
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+UNIT_CODE_PATTERN = re.compile(r"\b([A-Z]{3}\d{3})\b", re.IGNORECASE)
+
+def epoch_day(ddmmyyyy):
+    # "21-07-2025" -> days since 1970-01-01
+    day, month, year = ddmmyyyy.split("-")
+    return (date(int(year), int(month), int(day)) - EPOCH).days
+
+def minutes(hhmm):
+    hours, mins = hhmm.split(":")
+    return int(hours) * 60 + int(mins)
+
+def day_to_date(day):
+    return EPOCH + timedelta(days=int(day))
+
+def clock(mins):
+    return f"{int(mins) // 60:02d}:{int(mins) % 60:02d}"
+
+# ---------- Columnar timetable: one row per class meeting ----------
+class Timetable:
+    COLUMNS = ("student", "unit", "kind", "day", "week", "start", "end")
+
+    def __init__(self, student_ids, unit_names, kind_names, columns):
+        self.student_ids = student_ids           # index -> student ID
+        self.unit_names = unit_names             # index -> unit code
+        self.kind_names = kind_names             # index -> lecture / tutorial / ...
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+        self.student_index = {sid: i for i, sid in enumerate(student_ids.tolist())}
+        # Rows are sorted by (student, day, start): each student's meetings are one contiguous slice
+        self.ptr = np.searchsorted(self.student, np.arange(len(student_ids) + 1)).astype(np.int64)
+        self.abs_start = self.day.astype(np.int64) * 1440 + self.start
+        self.abs_end = self.day.astype(np.int64) * 1440 + self.end
+
+    def __len__(self):
+        return len(self.day)
+
+    @classmethod
+    def from_records(cls, records):
+        students, units, kinds = {}, {}, {}
+        date_cache = {}
+        cols = {name: [] for name in cls.COLUMNS}
+        for record in records:
+            s = students.setdefault(str(record["student_id"]), len(students))
+            for cls_ in record.get("classes", []):
+                u = units.setdefault(cls_["unit_code"].upper(), len(units))
+                k = kinds.setdefault(cls_.get("type", ""), len(kinds))
+                start, end = minutes(cls_["start"]), minutes(cls_["end"])
+                for meeting in cls_.get("dates", []):
+                    d = date_cache.get(meeting["date"])
+                    if d is None:
+                        d = date_cache[meeting["date"]] = epoch_day(meeting["date"])
+                    cols["student"].append(s)
+                    cols["unit"].append(u)
+                    cols["kind"].append(k)
+                    cols["day"].append(d)
+                    cols["week"].append(meeting.get("week", 0))
+                    cols["start"].append(start)
+                    cols["end"].append(end)
+
+        dtypes = {"student": np.int32, "unit": np.int16, "kind": np.int8, "day": np.int32,
+                  "week": np.int16, "start": np.int16, "end": np.int16}
+        columns = {name: np.asarray(values, dtype=dtypes[name]) for name, values in cols.items()}
+        order = np.lexsort((columns["start"], columns["day"], columns["student"]))
+        columns = {name: values[order] for name, values in columns.items()}
+        return cls(np.array(list(students), dtype=str), np.array(list(units), dtype=str),
+                   np.array(list(kinds), dtype=str), columns)
+
+    def save(self, path, version=""):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, version=version, student_ids=self.student_ids, unit_names=self.unit_names,
+                     kind_names=self.kind_names, **{name: getattr(self, name) for name in self.COLUMNS})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            columns = {name: data[name] for name in cls.COLUMNS}
+            return cls(data["student_ids"], data["unit_names"], data["kind_names"], columns), str(data["version"])
+
+    # ----- per-student interval queries (binary search inside the student's slice) -----
+    def rows(self, student_id):
+        s = self.student_index.get(str(student_id))
+        if s is None:
+            raise KeyError(f"Unknown student {student_id}")
+        return self.ptr[s], self.ptr[s + 1]
+
+    def units(self, student_id):
+        # Enrolled unit codes, i.e. every unit with at least one meeting in the student's timetable
+        lo, hi = self.rows(student_id)
+        return self.unit_names[np.unique(self.unit[lo:hi])].tolist()
+
+    def describe(self, i):
+        return {
+            "unit_code": str(self.unit_names[self.unit[i]]),
+            "type": str(self.kind_names[self.kind[i]]),
+            "date": day_to_date(self.day[i]).isoformat(),
+            "day": DAY_NAMES[day_to_date(self.day[i]).weekday()],
+            "week": int(self.week[i]),
+            "start": clock(self.start[i]),
+            "end": clock(self.end[i]),
+        }
+
+    def next_classes(self, student_id, now=None, n=1):
+        lo, hi = self.rows(student_id)
+        now = now or datetime.now()
+        key = ((now.date() - EPOCH).days) * 1440 + now.hour * 60 + now.minute
+        # Classes already under way count as "next" until they end; none runs longer than a day
+        first = lo + np.searchsorted(self.abs_start[lo:hi], key - 1440, side="left")
+        candidates = np.arange(first, hi)
+        candidates = candidates[self.abs_end[candidates] > key][:n]
+        return [self.describe(i) for i in candidates]
+
+    def between(self, student_id, first_day, last_day):
+        # Inclusive date range; dates are datetime.date
+        lo, hi = self.rows(student_id)
+        days = self.day[lo:hi]
+        a = lo + np.searchsorted(days, (first_day - EPOCH).days, side="left")
+        b = lo + np.searchsorted(days, (last_day - EPOCH).days, side="right")
+        return [self.describe(i) for i in range(a, b)]
+
+    def in_week(self, student_id, week):
+        lo, hi = self.rows(student_id)
+        return [self.describe(i) for i in lo + np.flatnonzero(self.week[lo:hi] == week)]
+
+    def clashes(self, student_id):
+        lo, hi = self.rows(student_id)
+        pairs = overlapping_pairs(self.abs_start[lo:hi], self.abs_end[lo:hi])
+        return [(self.describe(lo + a), self.describe(lo + b)) for a, b in pairs]
+
+    def unit_clash(self, student_id, unit_a, unit_b):
+        wanted = {unit_a.upper(), unit_b.upper()}
+        return [(a, b) for a, b in self.clashes(student_id) if {a["unit_code"], b["unit_code"]} == wanted]
+
+    # ----- whole cohort at once -----
+    def bulk_clashes(self):
+        # Offset each student's timeline so one sorted pass covers everybody without cross-student matches
+        span = (int(self.day.max()) - int(self.day.min()) + 2) * 1440 if len(self) else 1
+        base = self.student.astype(np.int64) * span - int(self.day.min() if len(self) else 0) * 1440
+        pairs = overlapping_pairs(self.abs_start + base, self.abs_end + base)
+        return pairs  # every (earlier row, later row) overlapping pair, in table row numbers
+
+    def clash_summary(self):
+        pairs = self.bulk_clashes()
+        students = np.unique(self.student[pairs[:, 0]]) if len(pairs) else np.empty(0, dtype=np.int32)
+        return {"clashing_pairs": int(len(pairs)), "clashing_meetings": int(len(np.unique(pairs))),
+                "students_with_clashes": int(len(students)),
+                "student_ids": self.student_ids[students].tolist()}
+
+def overlapping_pairs(starts, ends):
+    # starts sorted ascending. Every row j after row i with starts[j] < ends[i] overlaps it, and those
+    # rows are a contiguous run, so one searchsorted per row finds all of them: returns every (i, j) pair.
+    if len(starts) < 2:
+        return np.empty((0, 2), dtype=np.int64)
+    idx = np.arange(len(starts))
+    last = np.searchsorted(starts, ends, side="left")  # first row starting at or after this one ends
+    counts = np.maximum(last - idx - 1, 0)
+    first = np.repeat(idx, counts)
+    # Offsets 1..count for each row, built without a Python loop
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    return np.stack([first, first + offsets], axis=1).astype(np.int64)
+
+# ---------- Loading with an on-disk columnar cache ----------
+_loaded = {}
+
+def load_timetable(path=TIMETABLE_FILE, cache=True):
+    # Parsed once per process; the .npz copy skips JSON parsing on later runs
+    if path in _loaded:
+        return _loaded[path]
+    version = corpus_version([path])
+    cache_path = path + CACHE_SUFFIX
+    timetable = None
+    if cache and os.path.exists(cache_path):
+        timetable, cached_version = Timetable.load(cache_path)
+        if cached_version != version:
+            timetable = None
+    if timetable is None:
+        with open(path, "r", encoding="utf-8") as f:
+            timetable = Timetable.from_records(json.load(f))
+        if cache:
+            timetable.save(cache_path, version)
+    _loaded[path] = timetable
+    return timetable
+
+# ---------- Natural-language routing for the chatbot ----------
+def format_meetings(meetings):
+    return "\n".join(f"- {m['day']} {m['date']} {m['start']}-{m['end']}: {m['unit_code']} {m['type']} (week {m['week']})" for m in meetings)
+
+def answer_timetable_question(timetable, student_id, query, now=None):
+    # Returns None when the question is not about the student's timetable
+    lowered = query.lower()
+    now = now or datetime.now()
+    if "clash" in lowered or "overlap" in lowered:
+        codes = [c.upper() for c in UNIT_CODE_PATTERN.findall(query)]
+        if len(codes) >= 2:
+            pairs = timetable.unit_clash(student_id, codes[0], codes[1])
+            if not pairs:
+                return f"No, {codes[0]} and {codes[1]} do not clash in your timetable."
+        else:
+            pairs = timetable.clashes(student_id)
+            if not pairs:
+                return "You have no timetable clashes."
+        return "These classes overlap:\n" + "\n".join(
+            f"- {a['date']} {a['unit_code']} {a['type']} {a['start']}-{a['end']} vs {b['unit_code']} {b['type']} {b['start']}-{b['end']}"
+            for a, b in pairs)
+
+    week = re.search(r"\bweek\s*(\d{1,2})\b", lowered)
+    if week:
+        meetings = timetable.in_week(student_id, int(week.group(1)))
+        return format_meetings(meetings) if meetings else f"You have no classes in week {week.group(1)}."
+
+    if re.search(r"\bnext (class|lecture|tutorial)\b|\bwhat do i have next\b|\bnext\b.*\bclass", lowered):
+        meetings = timetable.next_classes(student_id, now)
+        return "Your next class:\n" + format_meetings(meetings) if meetings else "You have no more classes this semester."
+
+    for word, offset, length in (("today", 0, 1), ("tomorrow", 1, 1), ("this week", -now.weekday(), 7)):
+        if word in lowered and ("class" in lowered or "timetable" in lowered or "on" in lowered.split()):
+            first = now.date() + timedelta(days=offset)
+            meetings = timetable.between(student_id, first, first + timedelta(days=length - 1))
+            return format_meetings(meetings) if meetings else f"You have no classes {word}."
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the student timetable")
+    parser.add_argument("--file", default=TIMETABLE_FILE)
+    parser.add_argument("--student", help="student ID for per-student questions")
+    parser.add_argument("--ask", help='e.g. "what do I have next", "what\'s on in week 7", "do KIT509 and KIT712 clash"')
+    parser.add_argument("--now", help="pretend the current time is YYYY-MM-DDTHH:MM")
+    parser.add_argument("--bulk-clashes", action="store_true", help="report clashes across every student")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    timetable = load_timetable(args.file)
+    print(f"📅 {len(timetable)} class meetings for {len(timetable.student_ids)} students "
+          f"loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if args.bulk_clashes:
+        start = time.perf_counter()
+        summary = timetable.clash_summary()
+        print(f"⚠️ {summary['clashing_pairs']} clashing pairs ({summary['clashing_meetings']} meetings), "
+              f"{summary['students_with_clashes']} students affected "
+              f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+        for sid in summary["student_ids"][:20]:
+            print("  -", sid)
+
+    if args.student and args.ask:
+        now = datetime.fromisoformat(args.now) if args.now else None
+        start = time.perf_counter()
+        answer = answer_timetable_question(timetable, args.student, args.ask, now)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        print(f"\n❓ {args.ask}  ({elapsed_us:.0f} µs)")
+        print(answer if answer is not None else "↪️ Not a timetable question")
+
+if __name__ == "__main__":
+    sys.exit(main())
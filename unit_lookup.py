@@ -0,0 +1,197 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from course_catalog import expand_inputs, course_metadata, UNIT_CODE_PATTERN
+from answer_cache import corpus_version
+
+# ---------- Settings ----------
+COURSE_FILES = ["*course_data*.json", "course_pages/"]   # same JSONs embed_chunks.py can ingest
+UNIT_INDEX_FILE = "unit_index.json"
+
+# Intent keywords; a question is only answered here when it names a known unit code and exactly one of these
+INTENTS = [
+    ("credit_points", re.compile(r"\bcredit|\bcp\b|\bpoints?\b|how many credits", re.I)),
+    ("availability", re.compile(r"\bwhere\b|\bwhen\b|offered|available|availability|semester|trimester|campus|study period|location|on[- ]?campus|online", re.I)),
+    ("courses", re.compile(r"which (course|degree)s?|what (course|degree)s?|part of|belong|\bcore\b|\belective\b|category|compulsory", re.I)),
+    ("title", re.compile(r"\b(name|title|called)\b", re.I)),
+]
+# Facts the index does not hold: a question touching any of these goes to RAG even if an intent matched
+OTHER_TOPICS = re.compile(r"assess|exam|assignment|learn|outcome|teach|lectur|tutor|coordinat|requisite|content|\btopics?\b|"
+                          r"\babout\b|describ|\bfees?\b|\bcost|workload|\bpass\b|\bfail|\bshould\b|recommend", re.I)
+# Words that carry no topic of their own; anything else left after the intent keywords means the
+# question is about more than the one fact
+FILLER = {
+    "a", "all", "an", "and", "any", "are", "at", "be", "by", "can", "could", "do", "does", "during", "for", "from",
+    "full", "give", "has", "have", "how", "i", "in", "is", "it", "its", "many", "me", "much", "my", "of", "on",
+    "or", "please", "s", "tell", "that", "the", "this", "to", "unit", "units", "what", "whats", "which", "worth",
+    "you", "year", "take", "taken", "study", "studied", "run", "runs", "held", "there", "they", "was",
+}
+
+# "Location" values that are delivery modes rather than campuses ("not offered online", not "at Online")
+DELIVERY_MODES = {"online"}
+
+# ---------- Build: unit_code -> structured facts ----------
+def unit_entries(course_data):
+    # Yields (category, unit dict) for both course_structure layouts
+    structure = course_data.get("course_structure")
+    if not isinstance(structure, dict):
+        return
+    for category, block in structure.items():
+        units = block.get("units", []) if isinstance(block, dict) else block
+        if isinstance(units, list):
+            for unit in units:
+                if isinstance(unit, dict) and unit.get("unit_code"):
+                    yield category, unit
+
+def availability_rows(unit):
+    rows = []
+    for entry in unit.get("unit_availability", []):
+        if not isinstance(entry, dict):
+            continue
+        rows.append({
+            "location": entry.get("Location", ""),
+            "period": entry.get("Study period", ""),
+            "attendance": "; ".join(v for k, v in entry.items() if k.startswith("Attendance") and v),
+            "available_to": "; ".join(v for k, v in entry.items() if k.startswith("Available to") and v),
+        })
+    return rows
+
+def build_unit_index(paths):
+    units = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            course_data = json.load(f)
+        meta = course_metadata(course_data, path)
+        course = {"course_code": meta["course_code"], "title": meta["title"], "year": meta["year"]}
+        for category, unit in unit_entries(course_data):
+            code = unit["unit_code"].upper()
+            entry = units.setdefault(code, {
+                "unit_code": code,
+                "title": unit.get("unit_title", ""),
+                "credit_points": unit.get("unit_credit_points", ""),
+                "link": unit.get("unit_details_link", ""),
+                "courses": [],
+                "availability": [],
+            })
+            placement = {**course, "category": category}
+            if placement not in entry["courses"]:
+                entry["courses"].append(placement)
+            for row in availability_rows(unit):
+                if row not in entry["availability"]:
+                    entry["availability"].append(row)
+    return units
+
+def save_unit_index(units, version, path=UNIT_INDEX_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "units": units}, f, ensure_ascii=False)
+
+def load_unit_index(inputs=COURSE_FILES, path=UNIT_INDEX_FILE):
+    # Reuses the saved index unless one of the course JSONs changed since it was built
+    paths = [p for p in expand_inputs(inputs) if os.path.exists(p)]
+    version = corpus_version(paths)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("version") == version:
+            return UnitIndex(saved["units"])
+    units = build_unit_index(paths)
+    save_unit_index(units, version, path)
+    return UnitIndex(units)
+
+# ---------- Answer: dictionary lookup + template, no retrieval or LLM ----------
+class UnitIndex:
+    def __init__(self, units):
+        self.units = units
+        self.locations = sorted({row["location"] for u in units.values() for row in u["availability"] if row["location"]}, key=len, reverse=True)
+        self.periods = sorted({row["period"] for u in units.values() for row in u["availability"] if row["period"]}, key=len, reverse=True)
+
+    def __len__(self):
+        return len(self.units)
+
+    def get(self, code):
+        return self.units.get(code.upper())
+
+    def detect(self, query):
+        # (unit, intent) when the question is about exactly one known unit and a supported fact
+        codes = list(dict.fromkeys(c.upper() for c in UNIT_CODE_PATTERN.findall(query)))
+        if len(codes) != 1 or codes[0] not in self.units:
+            return None, None
+        unit = self.units[codes[0]]
+        intents = [(intent, pattern) for intent, pattern in INTENTS if pattern.search(query)]
+        if len(intents) != 1 or OTHER_TOPICS.search(query):
+            return unit, None
+        # Anchor: once the unit code, campus / period names and intent keywords are gone, only
+        # filler may be left, or the template would answer only part of the question
+        rest = UNIT_CODE_PATTERN.sub(" ", query.lower())
+        for name in self.locations + self.periods + [l.split()[0] for l in self.locations]:
+            rest = rest.replace(name.lower(), " ")
+        rest = intents[0][1].sub(" ", rest)
+        extra = [w for w in re.findall(r"[a-z]+", rest) if w not in FILLER]
+        if extra:
+            return unit, None
+        return unit, intents[0][0]
+
+    def answer(self, query):
+        unit, intent = self.detect(query)
+        if unit is None or intent is None:
+            return None  # not a structured question: fall through to RAG
+        name = f"{unit['unit_code']} {unit['title']}".strip()
+
+        if intent == "credit_points":
+            if not unit["credit_points"]:
+                return None
+            return f"{name} is worth {unit['credit_points']} credit points."
+
+        if intent == "title":
+            return f"{unit['unit_code']} is {unit['title']}."
+
+        if intent == "courses":
+            lines = [f"- {c['title']}{' ' + c['year'] if c['year'] else ''}: {c['category']}" for c in unit["courses"]]
+            return f"{name} appears in:\n" + "\n".join(lines)
+
+        # availability, optionally narrowed to a campus / study period named in the question
+        lowered = query.lower()
+        rows = unit["availability"]
+        location = next((l for l in self.locations if l.lower() in lowered or l.split()[0].lower() in lowered.split()), None)
+        period = next((p for p in self.periods if p.lower() in lowered), None)
+        if location:
+            rows = [r for r in rows if r["location"] == location]
+        if period:
+            rows = [r for r in rows if r["period"] == period]
+        if not unit["availability"]:
+            return None
+        if not rows:
+            where = []
+            if location:
+                where.append(location.lower() if location.lower() in DELIVERY_MODES else f"at {location}")
+            if period:
+                where.append(f"in {period}")
+            return f"{name} is not offered {' '.join(where)} in the current course data."
+        lines = []
+        for r in rows:
+            extra = ", ".join(x for x in (r["attendance"], r["available_to"]) if x)
+            lines.append(f"- {r['location']} ({r['period']})" + (f": {extra}" if extra else ""))
+        return f"{name} is offered:\n" + "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the unit-code lookup index and answer structured unit questions")
+    parser.add_argument("inputs", nargs="*", default=COURSE_FILES, help="course JSON files, directories or globs")
+    parser.add_argument("-o", "--output", default=UNIT_INDEX_FILE)
+    parser.add_argument("--query", action="append", help="question(s) to answer from the index")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = load_unit_index(args.inputs, args.output)
+    print(f"✅ {len(index)} units indexed in {args.output} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    for query in args.query or []:
+        start = time.perf_counter()
+        answer = index.answer(query)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        print(f"\n❓ {query}  ({elapsed_us:.0f} µs)")
+        print(answer if answer is not None else "↪️ Not a structured question; would fall through to RAG")
+
+if __name__ == "__main__":
+    sys.exit(main())